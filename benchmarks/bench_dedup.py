@@ -0,0 +1,85 @@
+"""Measure finding duplicate clips with an empty fingerprint cache (cold) and again with the cache filled (warm).
+
+Clips are sparse files with a few unique bytes at the start and in the middle, much smaller than real ones
+since every duplicate is hashed in full. Their sizes vary by a few MB like real clips' do, and one clip in
+--duplicate-every is copied to another folder, as when RecentClips footage is also in SavedClips or a backup of
+the drive is scanned too.
+
+Usage: python benchmarks/bench_dedup.py [--files 100000] [--duplicate-every 100]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_utils.dedup import FingerprintCache, find_duplicates
+
+CLIP_SIZE = 256 * 1024
+CLIP_SIZE_RANGE = 4 * 1024 * 1024
+
+
+def write_clip(fpath: str, size: int, content: bytes) -> None:
+    """Write a sparse clip with content at its start and in its middle."""
+    with open(fpath, 'wb') as f:
+        f.truncate(size)
+        f.write(content)
+        f.seek(size // 2)
+        f.write(content)
+
+
+def make_clips(root: str, files_count: int, duplicate_every: int) -> list:
+    """Lay out files_count clips in RecentClips, copying every duplicate_every'th one to SavedClips."""
+    rng = random.Random(0)
+    recent_dir = os.path.join(root, 'RecentClips')
+    saved_dir = os.path.join(root, 'SavedClips', 'event')
+    os.makedirs(recent_dir)
+    os.makedirs(saved_dir)
+    fpaths = []
+    for i in range(files_count):
+        size = CLIP_SIZE + rng.randrange(CLIP_SIZE_RANGE)
+        content = rng.randbytes(16)
+        is_duplicate = i % duplicate_every == duplicate_every - 1
+        fpath = os.path.join(saved_dir if is_duplicate else recent_dir, f'{i:06d}-front.mp4')
+        if is_duplicate:
+            # The same clip as the previous one.
+            size, content = previous
+        write_clip(fpath, size, content)
+        previous = size, content
+        fpaths.append(fpath)
+    return fpaths
+
+
+def timed_find_duplicates(fpaths: list, cache: FingerprintCache) -> tuple:
+    start = time.perf_counter()
+    report = find_duplicates(fpaths, cache)
+    return time.perf_counter() - start, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=100_000)
+    parser.add_argument('--duplicate-every', type=int, default=100)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fpaths = make_clips(os.path.join(tmp_dir, 'TeslaCam'), args.files, args.duplicate_every)
+        db_path = os.path.join(tmp_dir, 'fingerprints.sqlite3')
+        cache = FingerprintCache(db_path)
+        cold_elapsed, report = timed_find_duplicates(fpaths, cache)
+        cache.close()
+        cache = FingerprintCache(db_path)
+        warm_elapsed, warm_report = timed_find_duplicates(fpaths, cache)
+        cache.close()
+    print(f'{report.files_checked} files, {len(report.groups)} duplicate groups, '
+          f'{report.reclaimable_bytes / 1e9:.1f} GB reclaimable')
+    print(f'cold: {cold_elapsed * 1e3:9.1f} ms, hashed {report.files_hashed} files, '
+          f'{report.bytes_hashed / 1e6:.1f} MB read')
+    print(f'warm: {warm_elapsed * 1e3:9.1f} ms, hashed {warm_report.files_hashed} files, '
+          f'{warm_report.bytes_hashed / 1e6:.1f} MB read')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Measure the memory of an EventCatalog against VideoEventData objects, per million events.
+
+VideoEventData objects with resolved Path objects are measured on fewer events (--compare-events) and scaled
+up, a million of them would not fit in memory on many machines.
+
+Usage: python benchmarks/bench_event_catalog.py [--events 1000000] [--compare-events 100000]
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.event_catalog import EventCatalog
+from file_utils.event_query import EventQueryIndex
+from file_utils.video_events import make_directory_events
+
+# Like RecentClips, with 1% of the minutes in SavedClips event folders.
+EVENTS_PER_FOLDER = 100
+
+
+def make_directory_listings(events_count: int) -> list:
+    """Make (directory, video file names) listings holding events_count events."""
+    start = datetime.datetime(2020, 1, 1)
+    listings = []
+    for first_minute in range(0, events_count, EVENTS_PER_FOLDER):
+        minutes = range(first_minute, min(first_minute + EVENTS_PER_FOLDER, events_count))
+        dir_path = f'/media/TeslaCam/SavedClips/{(start + datetime.timedelta(minutes=first_minute)):%Y-%m-%d_%H-%M-%S}'
+        file_names = [f'{(start + datetime.timedelta(minutes=minute)):%Y-%m-%d_%H-%M-%S}-{camera_name}.mp4'
+                      for minute in minutes for camera_name in TESLAS_CAMERA_NAMES]
+        listings.append((dir_path, file_names))
+    return listings
+
+
+def build_catalog(listings: list) -> EventCatalog:
+    catalog = EventCatalog()
+    for dir_path, file_names in listings:
+        for event_data in make_directory_events(dir_path, file_names):
+            catalog.add_event_data(event_data, {camera_name: 30_000_000 for camera_name in TESLAS_CAMERA_NAMES})
+    return catalog
+
+
+def measure_catalog(listings: list) -> tuple:
+    # Timed without tracing, which slows allocation heavy code down several times.
+    start = time.perf_counter()
+    catalog = build_catalog(listings)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for event_row in catalog.iter_sorted():
+        pass
+    sorted_elapsed = time.perf_counter() - start
+    query_index = EventQueryIndex(catalog)
+    first_epoch = catalog[0].epoch
+    queries = 1000
+    start = time.perf_counter()
+    for i in range(queries):
+        # One hour windows spread over the catalog.
+        query_start = first_epoch + (i * 7919 % len(catalog)) * 60
+        query_index.query(query_start, query_start + 3600, all_cameras_only=True)
+    query_elapsed = (time.perf_counter() - start) / queries
+    del catalog, query_index
+    tracemalloc.start()
+    catalog = build_catalog(listings)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(catalog), memory, catalog.memory_usage(), elapsed, sorted_elapsed, query_elapsed
+
+
+def measure_event_data(listings: list) -> tuple:
+    tracemalloc.start()
+    events = []
+    for dir_path, file_names in listings:
+        events.extend(make_directory_events(dir_path, file_names))
+    for event_data in events:
+        # Once listed, every event's Path objects have been built.
+        event_data.camera_files_dict
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(events), memory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--compare-events', type=int, default=100_000)
+    args = parser.parse_args()
+    events_count, memory, estimated_memory, elapsed, sorted_elapsed, query_elapsed = measure_catalog(
+        make_directory_listings(args.events))
+    print(f'EventCatalog:   {events_count} events, {memory / 1e6:8.1f} MB traced '
+          f'({memory / events_count:6.1f} B/event, {memory * 1e6 / events_count / 1e6:8.1f} MB per million), '
+          f'memory_usage() {estimated_memory / 1e6:.1f} MB')
+    print(f'                built in {elapsed:.2f} s, sorted iteration in {sorted_elapsed:.2f} s, '
+          f'one hour range query in {query_elapsed * 1e6:.1f} us')
+    events_count, memory = measure_event_data(make_directory_listings(args.compare_events))
+    print(f'VideoEventData: {events_count} events, {memory / 1e6:8.1f} MB traced '
+          f'({memory / events_count:6.1f} B/event, {memory * 1e6 / events_count / 1e6:8.1f} MB per million)')
+
+
+if __name__ == '__main__':
+    main()
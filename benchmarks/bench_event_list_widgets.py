@@ -0,0 +1,81 @@
+"""Measure the time to interactive of the widget event list, adding events one widget at a time against
+queueing them.
+
+One at a time is how the event list was filled before queueing: every widget parsed its own stylesheet and the
+container's width was fitted after each one, and the window stayed frozen until the last widget was added.
+Queued rows are built in chunks between event loop iterations with one shared stylesheet, so the window is
+interactive once the first chunk is on screen. The longest event loop gap is the worst freeze while the rest
+are added. Runs offscreen unless QT_QPA_PLATFORM is set.
+
+Usage: python benchmarks/bench_event_list_widgets.py [--events 1000,10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtWidgets import QApplication
+
+from constants import TESLAS_CAMERA_NAMES
+from ui.event_list_widget import ScrollableWidget
+from ui.video_widget import EVENT_WIDGET_STYLE_SHEET, VideoEventWidget
+
+
+def make_widget(row: int) -> VideoEventWidget:
+    event_name = f'2024-01-01_00-{row // 60 % 60:02d}-{row % 60:02d}'
+    video_files = [f'/media/TeslaCam/RecentClips/{event_name}-{camera_name}.mp4'
+                   for camera_name in TESLAS_CAMERA_NAMES]
+    # No event is played, so the widgets need neither media players nor a player pool.
+    return VideoEventWidget(event_name, {}, video_files, None)
+
+
+def measure_one_at_a_time(app: QApplication, events_count: int) -> float:
+    event_list = ScrollableWidget()
+    event_list.show()
+    start = time.perf_counter()
+    for row in range(events_count):
+        widget = make_widget(row)
+        widget.set_style()
+        event_list.add_widget(widget)
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    event_list.deleteLater()
+    return elapsed
+
+
+def measure_queued(app: QApplication, events_count: int) -> tuple:
+    event_list = ScrollableWidget()
+    event_list.set_row_style_sheet(EVENT_WIDGET_STYLE_SHEET)
+    event_list.show()
+    interactive = []
+    event_list.rows_added.connect(lambda *_: interactive or interactive.append(time.perf_counter()))
+    start = time.perf_counter()
+    event_list.queue_rows(range(events_count), make_widget)
+    longest_gap = 0
+    while event_list.pending_count or not interactive:
+        iteration_start = time.perf_counter()
+        app.processEvents()
+        longest_gap = max(longest_gap, time.perf_counter() - iteration_start)
+    elapsed = time.perf_counter() - start
+    event_list.deleteLater()
+    return interactive[0] - start, elapsed, longest_gap
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', default='1000,10000', help='Comma separated event counts.')
+    args = parser.parse_args()
+    app = QApplication(sys.argv)
+    for events_count in (int(count) for count in args.events.split(',')):
+        one_at_a_time_elapsed = measure_one_at_a_time(app, events_count)
+        interactive, queued_elapsed, longest_gap = measure_queued(app, events_count)
+        print(f'{events_count:>6} events  one at a time: interactive {one_at_a_time_elapsed * 1e3:9.1f} ms  '
+              f'queued: interactive {interactive * 1e3:7.1f} ms, all added {queued_elapsed * 1e3:9.1f} ms, '
+              f'longest freeze {longest_gap * 1e3:6.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Benchmark reading the duration and video properties of many MP4s straight from their moov boxes.
+
+Each synthetic file has a large sparse mdat before its moov, like Tesla's clips, so a reader which touched
+the media data would show up immediately.
+
+Usage: python benchmarks/bench_mp4_probe.py [--files 2000] [--workers 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from file_utils.mp4_boxes import probe_mp4_files
+from synthetic_mp4 import make_moov, write_mp4
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    moov = make_moov()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fpaths = [Path(tmp_dir) / f'{i:06d}-front.mp4' for i in range(args.files)]
+        for fpath in fpaths:
+            write_mp4(fpath, mdat_size=30 * 1024 * 1024, moov=moov)
+        for max_workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            metadata = probe_mp4_files(fpaths, max_workers=max_workers)
+            elapsed = time.perf_counter() - start
+            failed = sum(1 for value in metadata.values() if value is None)
+            print(f'workers: {max_workers:2d}  {elapsed * 1000:9.1f} ms  '
+                  f'{len(fpaths) / elapsed:9.0f} files/s  failed: {failed}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark a cold scan (empty index) against a warm scan (unchanged drive) of a synthetic TeslaCam tree.
+
+Clips are sparse MP4s with a 1 MB mdat hole, one in BROKEN_CLIP_EVERY is left empty like a clip cut short by
+a power loss. Scans check every clip's box structure, as the app's scans do.
+
+Usage: python benchmarks/bench_scan_index.py [--events 10000] [--dir PATH]
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.scan_index import ScanIndex
+from file_utils.video_events import iter_video_event_batches
+from synthetic_mp4 import make_moov, write_mp4
+
+MDAT_SIZE = 1024 * 1024
+BROKEN_CLIP_EVERY = 500
+
+
+def make_tree(root: Path, events_count: int) -> None:
+    """Lay out half the events flat in RecentClips and half in per event SavedClips folders."""
+    start = datetime.datetime(2024, 1, 1)
+    moov = make_moov()
+    clips_count = 0
+    recent_dir = root / 'TeslaCam' / 'RecentClips'
+    recent_dir.mkdir(parents=True)
+    for i in range(events_count):
+        timestamp = (start + datetime.timedelta(minutes=i)).strftime('%Y-%m-%d_%H-%M-%S')
+        if i % 2:
+            event_dir = recent_dir
+        else:
+            event_dir = root / 'TeslaCam' / 'SavedClips' / timestamp
+            event_dir.mkdir(parents=True)
+        for camera_name in TESLAS_CAMERA_NAMES:
+            fpath = event_dir / f'{timestamp}-{camera_name}.mp4'
+            clips_count += 1
+            if clips_count % BROKEN_CLIP_EVERY == 0:
+                fpath.touch()
+            else:
+                write_mp4(fpath, mdat_size=MDAT_SIZE, moov=moov)
+
+
+def timed_scan(root: Path, scan_index: ScanIndex) -> tuple:
+    start = time.perf_counter()
+    events_count = sum(len(batch) for batch in iter_video_event_batches(root, scan_index=scan_index))
+    return time.perf_counter() - start, events_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=10000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir) / 'drive'
+        make_tree(root, args.events)
+        # Directory mtimes within the FAT resolution window aren't trusted, age the tree past it.
+        old = time.time() - 60
+        for dir_path, _, _ in os.walk(root):
+            os.utime(dir_path, (old, old))
+        db_path = Path(tmp_dir) / 'index.sqlite3'
+        no_index_time, events_count = timed_scan(root, None)
+        scan_index = ScanIndex(db_path)
+        cold_time, _ = timed_scan(root, scan_index)
+        scan_index.close()
+        scan_index = ScanIndex(db_path)
+        warm_time, _ = timed_scan(root, scan_index)
+        scan_index.close()
+    print(f'events: {events_count}')
+    print(f'no index:   {no_index_time * 1000:9.1f} ms')
+    print(f'cold index: {cold_time * 1000:9.1f} ms')
+    print(f'warm index: {warm_time * 1000:9.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Measure how long restoring a saved event list takes, without the Qt widgets the events are shown in.
+
+Restoring is loading every stored event with one query and making the VideoEventData objects the event list
+is filled from. Saving is measured too, in batches the size the directory scan emits.
+
+Usage: python benchmarks/bench_session_store.py [--events 20000]
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.session_store import SessionStore
+from file_utils.video_events import make_directory_events
+
+# The directory scan emits batches of this many events.
+BATCH_SIZE = 50
+
+
+def make_stored_events(events_count: int) -> list:
+    """Make (directory, timestamp, video file names) for events_count one minute events."""
+    start = datetime.datetime(2020, 1, 1)
+    events = []
+    for minute in range(events_count):
+        timestamp = f'{(start + datetime.timedelta(minutes=minute)):%Y-%m-%d_%H-%M-%S}'
+        events.append(('/media/TeslaCam/RecentClips', timestamp,
+                       [f'{timestamp}-{camera_name}.mp4' for camera_name in TESLAS_CAMERA_NAMES]))
+    return events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=20_000)
+    args = parser.parse_args()
+    events = make_stored_events(args.events)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        session_store = SessionStore(os.path.join(tmp_dir, 'session.sqlite3'))
+        start = time.perf_counter()
+        for first in range(0, len(events), BATCH_SIZE):
+            session_store.add_events(events[first:first + BATCH_SIZE])
+        save_elapsed = time.perf_counter() - start
+        for dir_path, timestamp, _ in events[::100]:
+            session_store.set_liked((dir_path, timestamp), True)
+        session_store.close()
+
+        start = time.perf_counter()
+        session_store = SessionStore(os.path.join(tmp_dir, 'session.sqlite3'))
+        stored_events = session_store.load_events()
+        load_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        event_data_objs = []
+        for stored_event in stored_events:
+            event_data_objs.extend(make_directory_events(stored_event.dir_path, stored_event.video_file_names))
+        for event_data in event_data_objs:
+            # The event list keeps every event's video files.
+            event_data.video_files
+        events_elapsed = time.perf_counter() - start
+        session_store.close()
+    print(f'{len(event_data_objs)} events, {sum(stored_event.is_liked for stored_event in stored_events)} liked')
+    print(f'save in batches of {BATCH_SIZE}: {save_elapsed * 1e3:7.1f} ms')
+    print(f'restore: open and load {load_elapsed * 1e3:7.1f} ms, make events {events_elapsed * 1e3:7.1f} ms, '
+          f'total {(load_elapsed + events_elapsed) * 1e3:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Measure the cost of reading and writing settings, AppSettings against plain QSettings calls.
+
+Plain QSettings is measured the way AppSettings used it before it cached values: every call logged at INFO
+and the file was synced after the first run's defaults were set. Both write to INI files in a temporary
+directory, logs go to os.devnull.
+
+Usage: python benchmarks/bench_settings.py [--calls 100000]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtCore import QCoreApplication, QSettings
+
+from file_utils.settings import AppSettings
+
+KEYS = [f'bench/key_{i}' for i in range(20)]
+logger = logging.getLogger('bench_settings')
+
+
+def measure_qsettings(fpath: str, calls: int) -> tuple:
+    start = time.perf_counter()
+    settings = QSettings(fpath, QSettings.IniFormat)
+    settings.setValue(KEYS[0], 0)
+    settings.sync()
+    construct_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(calls):
+        key = KEYS[i % len(KEYS)]
+        logger.info(f'Saving setting: {key} = {i}')
+        settings.setValue(key, i)
+    write_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(calls):
+        key = KEYS[i % len(KEYS)]
+        result = settings.value(key)
+        logger.info(f'Retrieving setting: {key} -> {result}')
+    read_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    settings.sync()
+    flush_elapsed = time.perf_counter() - start
+    return construct_elapsed, write_elapsed, read_elapsed, flush_elapsed
+
+
+def measure_app_settings(fpath: str, calls: int) -> tuple:
+    start = time.perf_counter()
+    settings = AppSettings(file_path=fpath)
+    construct_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(calls):
+        settings.setValue(KEYS[i % len(KEYS)], i)
+    write_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(calls):
+        settings.int_value(KEYS[i % len(KEYS)])
+    read_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    settings.flush()
+    flush_elapsed = time.perf_counter() - start
+    return construct_elapsed, write_elapsed, read_elapsed, flush_elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=100_000)
+    args = parser.parse_args()
+    app = QCoreApplication(sys.argv[:1])
+    logging.getLogger().handlers = [logging.FileHandler(os.devnull)]
+    logging.getLogger().setLevel(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, measure in (('QSettings + INFO logs', measure_qsettings), ('AppSettings', measure_app_settings)):
+            construct_elapsed, write_elapsed, read_elapsed, flush_elapsed = measure(
+                os.path.join(tmp_dir, f'{measure.__name__}.ini'), args.calls)
+            print(f'{name:22} construct {construct_elapsed * 1e3:7.2f} ms, '
+                  f'write {write_elapsed * 1e6 / args.calls:6.2f} us/call, '
+                  f'read {read_elapsed * 1e6 / args.calls:6.2f} us/call, flush {flush_elapsed * 1e3:6.2f} ms')
+    del app
+
+
+if __name__ == '__main__':
+    main()
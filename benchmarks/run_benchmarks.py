@@ -0,0 +1,188 @@
+"""Benchmark scanning, grouping, the scan index and copying on a synthetic TeslaCam drive.
+
+Each benchmark reports its wall time (best of --repeat runs), files/s and the peak memory Python allocated
+during a separate traced run, so tracing doesn't skew the times. Use --json to save the results and compare
+them between commits.
+
+Usage: python benchmarks/run_benchmarks.py [--scale small|medium|large] [--repeat 3] [--json results.json]
+           [--mode empty|sparse|tiny] [--only scan,copy]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from file_utils.copy_engine import CopyEngine, CopyJob
+from file_utils.scan_index import ScanIndex
+from file_utils.video_events import (
+    get_all_videos_in_dir,
+    group_videos_by_timestamp,
+    iter_video_event_batches,
+    make_event_data_objects_for_a_dir_path)
+from synthetic_tree import FILE_MODES, make_teslacam_tree
+
+# (RecentClips minutes, SavedClips events, SentryClips events), medium is about 50k video files.
+SCALES = {
+    'small': (600, 20, 80),
+    'medium': (6000, 100, 400),
+    'large': (30000, 500, 2000),
+}
+# Copying writes real bytes, so only this many tiny events are copied whatever the scale.
+COPY_EVENTS = 50
+
+
+def measure(run: Callable[[], int], repeat: int, setup: Callable[[], None] = None) -> Dict[str, float]:
+    """
+    Time a benchmark and measure its peak memory.
+    Args:
+        run (Callable): Runs the benchmark once and returns the number of files it handled.
+        repeat (int): The number of timed runs, the fastest is reported.
+        setup (Callable, optional): Called before every run, untimed.
+    Returns:
+        dict: wall_time_s, files, files_per_s and peak_memory_bytes.
+    """
+    times = []
+    files_count = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        files_count = run()
+        times.append(time.perf_counter() - start)
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    wall_time = min(times)
+    return {'wall_time_s': round(wall_time, 6), 'files': files_count,
+            'files_per_s': round(files_count / wall_time, 1) if wall_time else None,
+            'peak_memory_bytes': peak_memory}
+
+
+def scan_benchmarks(root: Path, work_dir: Path) -> Dict[str, Callable]:
+    """Make the scan benchmarks, keyed by name, as (run, setup) pairs."""
+    video_files = get_all_videos_in_dir(root)
+    db_path = work_dir / 'index.sqlite3'
+
+    def scan_with_index() -> int:
+        scan_index = ScanIndex(db_path)
+        try:
+            return sum(len(event_data.camera_files_dict) for batch in
+                       iter_video_event_batches(root, scan_index=scan_index) for event_data in batch)
+        finally:
+            scan_index.close()
+
+    def remove_index() -> None:
+        for fpath in work_dir.glob('index.sqlite3*'):
+            fpath.unlink()
+
+    return {
+        'get_all_videos_in_dir': (lambda: len(get_all_videos_in_dir(root)), None),
+        'group_videos_by_timestamp': (
+            lambda: sum(len(fpaths) for fpaths in group_videos_by_timestamp(video_files).values()), None),
+        'make_event_data_objects_for_a_dir_path': (
+            lambda: sum(len(event_data.camera_files_dict) for event_data in
+                        make_event_data_objects_for_a_dir_path(root)), None),
+        'iter_video_event_batches': (
+            lambda: sum(len(event_data.camera_files_dict) for batch in iter_video_event_batches(root)
+                        for event_data in batch), None),
+        'scan_index_cold': (scan_with_index, remove_index),
+        # The previous benchmark leaves a committed index behind.
+        'scan_index_warm': (scan_with_index, None),
+    }
+
+
+def copy_benchmarks(work_dir: Path) -> Dict[str, Callable]:
+    """Make the copy benchmarks, keyed by name, as (run, setup) pairs."""
+    src_root = work_dir / 'copy_src'
+    make_teslacam_tree(src_root, recent_minutes=COPY_EVENTS, saved_events=0, sentry_events=0, mode='tiny')
+    src_files = sorted(os.fspath(fpath) for fpath in get_all_videos_in_dir(src_root))
+    dst_dir = work_dir / 'copy_dst'
+    jobs = [CopyJob(fpath, os.path.join(dst_dir, os.path.basename(fpath))) for fpath in src_files]
+
+    def remove_copies() -> None:
+        if dst_dir.exists():
+            for fpath in dst_dir.iterdir():
+                fpath.unlink()
+
+    def copy() -> int:
+        report = CopyEngine().copy(jobs, os.fspath(dst_dir))
+        return report.copied + report.skipped
+
+    return {
+        'copy': (copy, remove_copies),
+        # Everything is already copied, so this measures the manifest and is_identical_copy checks.
+        'copy_resume': (copy, None),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Write the results to this file.')
+    parser.add_argument('--mode', choices=FILE_MODES, default='empty', help="The scanned drive's file contents.")
+    parser.add_argument('--only', help='Comma separated benchmark groups to run: scan, copy.')
+    parser.add_argument('--dir', help='Lay the synthetic drive out here instead of a temporary directory, '
+                                      'e.g. on a USB drive.')
+    args = parser.parse_args()
+    groups = set(args.only.split(',')) if args.only else {'scan', 'copy'}
+    results = {}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir:
+        work_dir = Path(tmp_dir)
+        root = work_dir / 'drive'
+        recent_minutes, saved_events, sentry_events = SCALES[args.scale]
+        tree_stats = make_teslacam_tree(root, recent_minutes, saved_events, sentry_events, mode=args.mode)
+        # Directory mtimes within the FAT resolution window aren't trusted by the scan index, age the tree.
+        old = time.time() - 60
+        for dir_path, _, _ in os.walk(root):
+            os.utime(dir_path, (old, old))
+        benchmarks: Dict[str, tuple] = {}
+        if 'scan' in groups:
+            benchmarks.update(scan_benchmarks(root, work_dir))
+        if 'copy' in groups:
+            benchmarks.update(copy_benchmarks(work_dir))
+        for name, (run, setup) in benchmarks.items():
+            results[name] = measure(run, args.repeat, setup)
+            result = results[name]
+            print(f'{name:<40} {result["wall_time_s"] * 1000:10.1f} ms {result["files_per_s"] or 0:12.0f} files/s '
+                  f'{result["peak_memory_bytes"] / 1e6:8.1f} MB peak')
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'mode': args.mode,
+        'tree': tree_stats._asdict(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
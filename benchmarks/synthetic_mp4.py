@@ -0,0 +1,48 @@
+"""Builds small but structurally valid MP4 files, with the box layout Tesla's dashcam writes."""
+import struct
+
+
+def box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type: bytes, payload: bytes, version: int = 0) -> bytes:
+    return box(box_type, bytes([version, 0, 0, 0]) + payload)
+
+
+def make_moov(duration_seconds: float = 60.0, fps: int = 36, gop: int = 36, width: int = 1280,
+              height: int = 960, codec: bytes = b'avc1') -> bytes:
+    """Make a moov box with one H.264 video track of duration_seconds at fps, with a keyframe every gop."""
+    timescale = fps * 1000
+    sample_count = int(duration_seconds * fps)
+    duration = sample_count * 1000
+    mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, timescale, duration) + b'\0' * 80)
+    tkhd = full_box(b'tkhd', struct.pack('>IIIII', 0, 0, 1, 0, duration) + b'\0' * 52 +
+                    struct.pack('>II', width << 16, height << 16))
+    mdhd = full_box(b'mdhd', struct.pack('>IIIIHH', 0, 0, timescale, duration, 0, 0))
+    hdlr = full_box(b'hdlr', struct.pack('>I4s', 0, b'vide') + b'\0' * 12 + b'VideoHandler\0')
+    sample_entry = box(codec, b'\0' * 6 + struct.pack('>H', 1) + b'\0' * 16 +
+                       struct.pack('>HH', width, height) + b'\0' * 50)
+    stsd = full_box(b'stsd', struct.pack('>I', 1) + sample_entry)
+    stts = full_box(b'stts', struct.pack('>III', 1, sample_count, 1000))
+    sync_samples = range(1, sample_count + 1, gop)
+    stss = full_box(b'stss', struct.pack('>I', len(sync_samples)) +
+                    b''.join(struct.pack('>I', sample) for sample in sync_samples))
+    stbl = box(b'stbl', stsd + stts + stss)
+    mdia = box(b'mdia', mdhd + hdlr + box(b'minf', stbl))
+    return box(b'moov', mvhd + box(b'trak', tkhd + mdia))
+
+
+def write_mp4(fpath, mdat_size: int = 0, moov: bytes = None, sparse: bool = True) -> None:
+    """Write an MP4 laid out as ftyp, mdat, moov. The mdat payload is a hole when sparse is True."""
+    if moov is None:
+        moov = make_moov()
+    ftyp = box(b'ftyp', b'isom\0\0\2\0isomiso2avc1mp41')
+    with open(fpath, 'wb') as f:
+        f.write(ftyp)
+        f.write(struct.pack('>I4s', 8 + mdat_size, b'mdat'))
+        if sparse:
+            f.seek(mdat_size, 1)
+        else:
+            f.write(b'\0' * mdat_size)
+        f.write(moov)
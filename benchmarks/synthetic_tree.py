@@ -0,0 +1,144 @@
+"""Lays out synthetic TeslaCam drives, with the folder structure and file names Tesla's dashcam writes.
+
+RecentClips holds one set of camera clips per minute of driving. SavedClips and SentryClips hold one folder
+per event, named after the event's time, with about ten minutes of clips plus an event.json and thumb.png.
+The same seed always makes the same tree.
+
+Usage: python benchmarks/synthetic_tree.py ROOT [--recent-minutes 600] [--saved-events 50] [--sentry-events 200]
+           [--mode empty|sparse|tiny]
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from typing import NamedTuple, Union
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from constants import TESLAS_CAMERA_NAMES
+from synthetic_mp4 import make_moov, write_mp4
+
+TIMESTAMP_FORMAT = '%Y-%m-%d_%H-%M-%S'
+# File contents: zero byte files, MP4s with a sparse (hole) mdat of a realistic size, or small fully written MP4s.
+FILE_MODES = ('empty', 'sparse', 'tiny')
+# A one minute front camera clip is about 30 MB.
+SPARSE_MDAT_SIZE = 30 * 1024 * 1024
+TINY_MDAT_SIZE = 64 * 1024
+
+
+class TreeStats(NamedTuple):
+    """What a generated tree holds."""
+    events: int
+    video_files: int
+    bytes: int
+
+
+def _write_clip(fpath: Path, mode: str, moov: bytes) -> int:
+    if mode == 'empty':
+        fpath.touch()
+        return 0
+    mdat_size = SPARSE_MDAT_SIZE if mode == 'sparse' else TINY_MDAT_SIZE
+    write_mp4(fpath, mdat_size=mdat_size, moov=moov, sparse=mode == 'sparse')
+    return fpath.stat().st_size
+
+
+def _write_minute(dir_path: Path, clip_time: datetime.datetime, mode: str, moov: bytes,
+                  rng: random.Random, missing_camera_rate: float) -> tuple:
+    timestamp = clip_time.strftime(TIMESTAMP_FORMAT)
+    files_count = bytes_count = 0
+    for camera_name in TESLAS_CAMERA_NAMES:
+        # Cameras occasionally drop a clip, e.g. when the car goes to sleep mid minute.
+        if camera_name != 'front' and rng.random() < missing_camera_rate:
+            continue
+        bytes_count += _write_clip(dir_path / f'{timestamp}-{camera_name}.mp4', mode, moov)
+        files_count += 1
+    return files_count, bytes_count
+
+
+def _write_event_folder(clips_dir: Path, event_time: datetime.datetime, clips_per_event: int, reason: str,
+                        mode: str, moov: bytes, rng: random.Random, missing_camera_rate: float) -> tuple:
+    event_dir = clips_dir / event_time.strftime(TIMESTAMP_FORMAT)
+    event_dir.mkdir(parents=True)
+    files_count = bytes_count = 0
+    # An event folder holds the minutes leading up to the event.
+    for i in range(clips_per_event, 0, -1):
+        minute_files, minute_bytes = _write_minute(
+            event_dir, event_time - datetime.timedelta(minutes=i), mode, moov, rng, missing_camera_rate)
+        files_count += minute_files
+        bytes_count += minute_bytes
+    event_info = {'timestamp': event_time.strftime('%Y-%m-%dT%H:%M:%S'), 'city': 'Springfield',
+                  'est_lat': f'{rng.uniform(-60, 60):.4f}', 'est_lon': f'{rng.uniform(-180, 180):.4f}',
+                  'reason': reason, 'camera': str(rng.randrange(len(TESLAS_CAMERA_NAMES)))}
+    (event_dir / 'event.json').write_text(json.dumps(event_info))
+    (event_dir / 'thumb.png').write_bytes(b'\x89PNG\r\n\x1a\n')
+    return files_count, bytes_count
+
+
+def make_teslacam_tree(root: Union[Path, str], recent_minutes: int = 600, saved_events: int = 50,
+                       sentry_events: int = 200, clips_per_event: int = 10, mode: str = 'empty',
+                       missing_camera_rate: float = 0.01, seed: int = 0) -> TreeStats:
+    """
+    Lay out a TeslaCam folder under root.
+    Args:
+        root (Path|str): The drive's root, created if needed.
+        recent_minutes (int): The number of one minute clip sets in RecentClips.
+        saved_events (int): The number of SavedClips event folders.
+        sentry_events (int): The number of SentryClips event folders.
+        clips_per_event (int): The number of one minute clip sets per event folder.
+        mode (str): 'empty', 'sparse' or 'tiny', see FILE_MODES.
+        missing_camera_rate (float): The chance of a non front camera's clip being missing.
+        seed (int): Seeds the random choices, the same seed makes the same tree.
+    Returns:
+        TreeStats: The number of events, video files and bytes written.
+    """
+    if mode not in FILE_MODES:
+        raise ValueError(f'mode must be one of {FILE_MODES}, not {mode!r}')
+    rng = random.Random(seed)
+    moov = make_moov() if mode != 'empty' else b''
+    teslacam_dir = Path(root) / 'TeslaCam'
+    start = datetime.datetime(2024, 1, 1, 8)
+    files_count = bytes_count = 0
+    recent_dir = teslacam_dir / 'RecentClips'
+    recent_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(recent_minutes):
+        minute_files, minute_bytes = _write_minute(
+            recent_dir, start + datetime.timedelta(minutes=i), mode, moov, rng, missing_camera_rate)
+        files_count += minute_files
+        bytes_count += minute_bytes
+    events_count = recent_minutes
+    event_time = start
+    for clips_dir_name, events, reason in (('SavedClips', saved_events, 'user_interaction_honk'),
+                                           ('SentryClips', sentry_events, 'sentry_aware_object_detection')):
+        for _ in range(events):
+            # Events are spread out so their folders' clips don't share timestamps.
+            event_time += datetime.timedelta(minutes=clips_per_event + rng.randrange(1, 120))
+            event_files, event_bytes = _write_event_folder(
+                teslacam_dir / clips_dir_name, event_time, clips_per_event, reason, mode, moov, rng,
+                missing_camera_rate)
+            files_count += event_files
+            bytes_count += event_bytes
+            events_count += clips_per_event
+    return TreeStats(events_count, files_count, bytes_count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root')
+    parser.add_argument('--recent-minutes', type=int, default=600)
+    parser.add_argument('--saved-events', type=int, default=50)
+    parser.add_argument('--sentry-events', type=int, default=200)
+    parser.add_argument('--clips-per-event', type=int, default=10)
+    parser.add_argument('--mode', choices=FILE_MODES, default='empty')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    stats = make_teslacam_tree(args.root, args.recent_minutes, args.saved_events, args.sentry_events,
+                               args.clips_per_event, args.mode, seed=args.seed)
+    print(f'events: {stats.events}  video files: {stats.video_files}  bytes: {stats.bytes}')
+
+
+if __name__ == '__main__':
+    main()
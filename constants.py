@@ -6,4 +6,11 @@ APP_SETTINGS_DATA_FOLDER = 'tesla_dashcam_viewer'
 APP_WINDOWS_SETTINGS_FILE_NAME = "tesla_dashcam_viewer_settings.ini"
 SETTINGS_KEY_DATETIME_OF_LAST_CHECK_FOR_UPDATE = 'app/datetime_of_last_check_for_updates'
 TESLAS_CAMERA_NAMES = ['back', 'front', 'left_repeater', 'right_repeater']
-REQUESTS_TIMEOUT_LIMIT = 10
\ No newline at end of file
+REQUESTS_TIMEOUT_LIMIT = 10
+SCAN_INDEX_FILE_NAME = 'scan_index.sqlite3'
+SESSION_STORE_FILE_NAME = 'session.sqlite3'
+FINGERPRINT_CACHE_FILE_NAME = 'fingerprints.sqlite3'
+SETTINGS_KEY_USE_VIRTUALIZED_EVENT_LIST = 'ui/use_virtualized_event_list'
+SETTINGS_KEY_PLAYBACK_SYNC_TOLERANCE_MS = 'playback/sync_tolerance_ms'
+THUMBNAIL_CACHE_FOLDER_NAME = 'thumbnails'
+THUMBNAIL_CACHE_MAX_BYTES = 200 * 1024 * 1024
@@ -0,0 +1,27 @@
+"""A module for locating the app's data directory. Kept free of Qt so it can be used by any module."""
+import os
+import platform
+from pathlib import Path
+
+from constants import APP_SETTINGS_DATA_FOLDER
+
+
+def get_app_data_dir(create: bool = True) -> Path:
+    """ Get the per user directory the app stores its data in, e.g. indexes and caches.
+    Args:
+        create (bool): Create the directory if it does not exist.
+
+    Returns: Path
+
+    """
+    system = platform.system()
+    if system == 'Windows':
+        base_dir = Path(os.environ['APPDATA'])
+    elif system == 'Darwin':
+        base_dir = Path.home() / 'Library' / 'Application Support'
+    else:
+        base_dir = Path(os.environ.get('XDG_DATA_HOME', Path.home() / '.local' / 'share'))
+    app_data_dir = base_dir / APP_SETTINGS_DATA_FOLDER
+    if create:
+        app_data_dir.mkdir(parents=True, exist_ok=True)
+    return app_data_dir
@@ -0,0 +1,341 @@
+"""The headless command line: scan, report on and export TeslaCam drives without a display or Qt.
+
+Only file_utils modules which don't import PySide6 may be imported here, so the commands start quickly on a
+NAS or a server.
+
+Usage:
+    python -m tesla_dashcam_viewer scan ROOT [ROOT ...] [--probe] [--no-index]
+    python -m tesla_dashcam_viewer stats ROOT [ROOT ...] [--probe] [--no-index]
+    python -m tesla_dashcam_viewer export ROOT [ROOT ...] --dest DIR [--from TIME] [--to TIME]
+        [--source SentryClips] [--all-cameras] [--skip-corrupt] [--reason REASON] [--city CITY] [--bbox S,W,N,E]
+        [--events FILE] [--tag TAG]
+    python -m tesla_dashcam_viewer duplicates ROOT [ROOT ...] [--no-cache]
+"""
+import argparse
+import collections
+import datetime
+import json
+import logging
+import queue
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple, Union
+
+from file_utils.copy_engine import CopyEngine, CopyProgress, make_liked_event_copy_jobs
+from file_utils.dedup import FingerprintCache, drop_duplicate_copy_jobs, find_duplicates
+from file_utils.event_catalog import EventCatalog
+from file_utils.event_query import CLIP_SOURCES, OTHER_CLIP_SOURCE, EventFilter, EventQueryIndex, clip_source
+from file_utils.scan_index import ScanIndex
+from file_utils.video_events import VideoEventData, iter_video_event_batches, probe_video_events
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = ('scan', 'stats', 'export', 'duplicates')
+# Marks the end of a root's events on the queue shared by the scanning threads.
+_ROOT_DONE = object()
+
+
+def iter_roots_event_batches(roots: List[str], use_scan_index: bool = True,
+                             probe: bool = False) -> Iterator[List[VideoEventData]]:
+    """
+    Scan several roots at once, one thread per root, e.g. a USB drive and a NAS share.
+    Args:
+        roots (list of str): The directories to scan.
+        use_scan_index (bool): Reuse the on-disk index of previous scans.
+        probe (bool): Read every event's duration and video properties from its MP4s.
+    Yields:
+        list of VideoEventData: Batches of events, from all roots, as they are found.
+    """
+    batches = queue.Queue(maxsize=64)
+    stop = threading.Event()
+
+    def scan_root(root: str) -> None:
+        # SQLite connections can only be used by the thread which created them.
+        scan_index = ScanIndex() if use_scan_index else None
+        try:
+            for batch in iter_video_event_batches(root, is_cancelled=stop.is_set, scan_index=scan_index):
+                if probe:
+                    probe_video_events(batch)
+                batches.put(batch)
+        except OSError as e:
+            logger.error(f'Could not scan {root}: {e}')
+        finally:
+            if scan_index is not None:
+                scan_index.close()
+            batches.put(_ROOT_DONE)
+
+    threads = [threading.Thread(target=scan_root, args=(root,), daemon=True) for root in roots]
+    for thread in threads:
+        thread.start()
+    roots_left = len(threads)
+    try:
+        while roots_left:
+            batch = batches.get()
+            if batch is _ROOT_DONE:
+                roots_left -= 1
+                continue
+            yield batch
+    finally:
+        # Stops the other roots' walks if the consumer stops early, e.g. on a closed pipe.
+        stop.set()
+        while roots_left:
+            if batches.get() is _ROOT_DONE:
+                roots_left -= 1
+
+
+def event_to_json(event_data: VideoEventData) -> Dict[str, object]:
+    """
+    Describe an event as a JSON object.
+    Args:
+        event_data (VideoEventData): The event.
+    Returns:
+        dict: timestamp, dir, source, cameras (file path keyed by camera name), integrity and clip_problems
+            (what is wrong keyed by camera name), event (reason, city, latitude and longitude) if the event's
+            folder has an event.json, and duration_ms and truncated once the event was probed.
+    """
+    event_json = {
+        'timestamp': event_data.timestamp,
+        'dir': event_data.dir_path,
+        'source': clip_source(event_data.dir_path),
+        'cameras': {camera_name: video_fpath.as_posix()
+                    for camera_name, video_fpath in event_data.camera_files_dict.items()},
+    }
+    if event_data.integrity is not None:
+        event_json['integrity'] = event_data.integrity
+        event_json['clip_problems'] = event_data.clip_problems
+    event_metadata = event_data.event_metadata
+    if event_metadata is not None:
+        event_json['event'] = {'reason': event_metadata.reason, 'city': event_metadata.city,
+                               'latitude': event_metadata.latitude, 'longitude': event_metadata.longitude}
+    if event_data.camera_metadata:
+        event_json['duration_ms'] = event_data.duration_ms
+        event_json['truncated'] = event_data.is_truncated
+    return event_json
+
+
+def parse_datetime(value: str) -> datetime.datetime:
+    """
+    Parse a --from/--to time, either ISO 8601 (2024-01-01T10:00) or a clip timestamp (2024-01-01_10-00-00).
+    Args:
+        value (str): The time.
+    Returns:
+        datetime.datetime: The naive date and time.
+    """
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d_%H-%M-%S')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Not a date and time: {value!r}')
+
+
+def parse_bounding_box(value: str) -> Tuple[float, float, float, float]:
+    """
+    Parse a --bbox, the comma separated min latitude, min longitude, max latitude and max longitude.
+    Args:
+        value (str): The bounding box.
+    Returns:
+        tuple of float: (min latitude, min longitude, max latitude, max longitude).
+    """
+    try:
+        min_latitude, min_longitude, max_latitude, max_longitude = (float(part) for part in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Not a bounding box: {value!r}')
+    return min_latitude, min_longitude, max_latitude, max_longitude
+
+
+def run_scan(args: argparse.Namespace, out: TextIO) -> int:
+    """Write every event of the roots as a JSON line, as soon as it is found."""
+    for batch in iter_roots_event_batches(args.roots, not args.no_index, args.probe):
+        out.write(''.join(json.dumps(event_to_json(event_data)) + '\n' for event_data in batch))
+        out.flush()
+    return 0
+
+
+def run_stats(args: argparse.Namespace, out: TextIO) -> int:
+    """Write a JSON summary of the roots' events."""
+    catalog = EventCatalog()
+    query_index = EventQueryIndex(catalog)
+    total_duration_ms = 0
+    truncated = 0
+    for batch in iter_roots_event_batches(args.roots, not args.no_index, args.probe):
+        for event_data in batch:
+            catalog.add_event_data(event_data)
+            if event_data.event_metadata is not None:
+                query_index.set_event_metadata(event_data.dir_path, event_data.event_metadata)
+            total_duration_ms += event_data.duration_ms or 0
+            truncated += event_data.is_truncated
+    time_range = query_index.time_range()
+    stats = {
+        'events': len(catalog),
+        'events_by_source': query_index.source_counts(),
+        'events_with_all_cameras': len(query_index.query(all_cameras_only=True)),
+        'events_by_integrity': dict(collections.Counter(
+            event_row.integrity or 'unchecked' for event_row in catalog)),
+        'first_event': time_range[0].isoformat() if time_range else None,
+        'last_event': time_range[1].isoformat() if time_range else None,
+        'event_folders_by_reason': query_index.metadata_index.reason_counts(),
+        'event_folders_by_city': query_index.metadata_index.city_counts(),
+    }
+    if args.probe:
+        stats['total_duration_ms'] = total_duration_ms
+        stats['truncated_events'] = truncated
+    out.write(json.dumps(stats, indent=2) + '\n')
+    return 0
+
+
+def read_events_file(fpath: str) -> List[Tuple[str, List[str], str]]:
+    """
+    Read the events to export from JSON lines, e.g. scan's output filtered with jq or grep.
+    Args:
+        fpath (str): The file, - for stdin.
+    Returns:
+        list of tuple: (timestamp, video files, tag) per event, the tag is the line's 'tag' if it has one.
+    """
+    if fpath == '-':
+        return _read_event_lines(sys.stdin)
+    with open(fpath, encoding='utf-8') as f:
+        return _read_event_lines(f)
+
+
+def _read_event_lines(lines: Iterable[str]) -> List[Tuple[str, List[str], str]]:
+    events = []
+    for line in lines:
+        if not line.strip():
+            continue
+        event_json = json.loads(line)
+        events.append((event_json['timestamp'], list(event_json['cameras'].values()), event_json.get('tag', '')))
+    return events
+
+
+def select_events(args: argparse.Namespace) -> List[Tuple[str, List[str], str]]:
+    """Scan the roots and pick the events matching the export's filters."""
+    catalog = EventCatalog()
+    query_index = EventQueryIndex(catalog)
+    for batch in iter_roots_event_batches(args.roots, not args.no_index):
+        for event_data in batch:
+            catalog.add_event_data(event_data)
+            if event_data.event_metadata is not None:
+                query_index.set_event_metadata(event_data.dir_path, event_data.event_metadata)
+    event_filter = EventFilter(start=args.start, end=args.end, sources=tuple(args.source) if args.source else None,
+                               all_cameras_only=args.all_cameras, reasons=tuple(args.reason) if args.reason else None,
+                               cities=tuple(args.city) if args.city else None, bounding_box=args.bbox,
+                               hide_corrupt=args.skip_corrupt)
+    return [(catalog[row].timestamp, catalog[row].video_files, args.tag)
+            for row in query_index.filter_rows(event_filter)]
+
+
+def run_export(args: argparse.Namespace, out: TextIO) -> int:
+    """Copy the selected events to the destination, one folder per event, reporting progress on stderr."""
+    if args.events:
+        events = read_events_file(args.events)
+        if args.tag:
+            events = [(timestamp, video_files, tag or args.tag) for timestamp, video_files, tag in events]
+    elif args.roots:
+        events = select_events(args)
+    else:
+        logger.error('Give roots to scan or --events.')
+        return 2
+    fingerprint_cache = FingerprintCache()
+    try:
+        jobs, duplicates_dropped = drop_duplicate_copy_jobs(make_liked_event_copy_jobs(events, args.dest),
+                                                            fingerprint_cache)
+    finally:
+        fingerprint_cache.close()
+
+    def report_progress(progress: CopyProgress) -> None:
+        sys.stderr.write(f'\r{progress.files_done}/{progress.files_total} files, '
+                         f'{progress.bytes_per_second / 1e6:.1f} MB/s')
+        sys.stderr.flush()
+
+    engine = CopyEngine(max_workers=args.workers, progress_callback=report_progress)
+    report = engine.copy(jobs, args.dest)
+    sys.stderr.write('\n')
+    out.write(json.dumps({'events': len(events), 'copied': report.copied, 'skipped': report.skipped,
+                          'duplicates_dropped': duplicates_dropped, 'errors': report.errors,
+                          'bytes_copied': report.bytes_copied,
+                          'elapsed_seconds': round(report.elapsed_seconds, 3)}) + '\n')
+    return 1 if report.errors else 0
+
+
+def run_duplicates(args: argparse.Namespace, out: TextIO) -> int:
+    """Write a JSON report of the identical clips in the roots and the space deleting the copies would free."""
+    fpaths = [video_fpath for batch in iter_roots_event_batches(args.roots, not args.no_index)
+              for event_data in batch for video_fpath in event_data.video_files]
+    fingerprint_cache = None if args.no_cache else FingerprintCache()
+    try:
+        report = find_duplicates(fpaths, fingerprint_cache, max_workers=args.workers)
+    finally:
+        if fingerprint_cache is not None:
+            fingerprint_cache.close()
+    out.write(json.dumps({
+        'files_checked': report.files_checked,
+        'files_hashed': report.files_hashed,
+        'bytes_hashed': report.bytes_hashed,
+        'reclaimable_bytes': report.reclaimable_bytes,
+        'groups': [{'size': group.size, 'keep': group.fpaths[0], 'duplicates': group.fpaths[1:]}
+                   for group in report.groups],
+        'errors': report.errors,
+    }, indent=2) + '\n')
+    return 1 if report.errors else 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='tesla_dashcam_viewer', description='Headless TeslaCam tools.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scan_parser = subparsers.add_parser('scan', help='List events as JSON lines.')
+    stats_parser = subparsers.add_parser('stats', help='Summarize events as JSON.')
+    export_parser = subparsers.add_parser('export', help='Copy events, one folder per event.')
+    duplicates_parser = subparsers.add_parser('duplicates', help='Find identical clips and the space they waste.')
+    for subparser in (scan_parser, stats_parser, export_parser, duplicates_parser):
+        subparser.add_argument('roots', nargs='*' if subparser is export_parser else '+',
+                               help='Directories to scan, several are scanned at once.')
+        subparser.add_argument('--no-index', action='store_true', help="Don't use or update the scan index.")
+    for subparser in (scan_parser, stats_parser):
+        subparser.add_argument('--probe', action='store_true',
+                               help="Read each event's duration from its MP4s, flagging truncated clips.")
+    export_parser.add_argument('--dest', required=True, help='The directory to export to.')
+    export_parser.add_argument('--from', dest='start', type=parse_datetime, help='Only events from this time on.')
+    export_parser.add_argument('--to', dest='end', type=parse_datetime, help='Only events before this time.')
+    export_parser.add_argument('--source', action='append', choices=(*CLIP_SOURCES, OTHER_CLIP_SOURCE),
+                               help='Only events from this folder, may be repeated.')
+    export_parser.add_argument('--all-cameras', action='store_true', help='Only events with all four cameras.')
+    export_parser.add_argument('--skip-corrupt', action='store_true',
+                               help='Skip events none of whose clips can be played, e.g. empty after a power cut.')
+    export_parser.add_argument('--reason', action='append',
+                               help="Only events whose event.json has this reason, e.g. user_interaction_honk.")
+    export_parser.add_argument('--city', action='append', help="Only events whose event.json has this city.")
+    export_parser.add_argument('--bbox', type=parse_bounding_box,
+                               help="Only events whose event.json location is within MIN_LAT,MIN_LON,MAX_LAT,MAX_LON.")
+    export_parser.add_argument('--events', help="Export the events of this JSON lines file (- for stdin) "
+                                                "instead of scanning, a line's 'tag' names its folder.")
+    export_parser.add_argument('--tag', default='', help='Add this tag to the exported folder names.')
+    export_parser.add_argument('--workers', type=int, default=4, help='The number of files copied at once.')
+    duplicates_parser.add_argument('--no-cache', action='store_true',
+                                   help="Don't use or update the cached fingerprints of unchanged files.")
+    duplicates_parser.add_argument('--workers', type=int, default=8, help='The number of files read at once.')
+    return parser
+
+
+def main(argv: List[str] = None, out: Union[TextIO, None] = None) -> int:
+    """
+    Run a command.
+    Args:
+        argv (list of str, optional): The arguments, starting with the command. Defaults to sys.argv[1:].
+        out (TextIO, optional): Where results are written. Defaults to stdout.
+    Returns:
+        int: The exit code.
+    """
+    args = make_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    out = out or sys.stdout
+    # Progress and diagnostics go to stderr so stdout can be piped.
+    logging.getLogger().setLevel(logging.WARNING)
+    commands = {'scan': run_scan, 'stats': run_stats, 'export': run_export, 'duplicates': run_duplicates}
+    command = commands[args.command]
+    try:
+        return command(args, out)
+    except BrokenPipeError:
+        # e.g. piped into head.
+        return 0
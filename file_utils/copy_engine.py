@@ -0,0 +1,392 @@
+"""A parallel, resumable file copy engine used to export liked events."""
+import errno
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COPY_MANIFEST_FILE_NAME = '.tesla_dashcam_viewer_copy_manifest.jsonl'
+PARTIAL_FILE_SUFFIX = '.part'
+# Next to a .part file, the size and modification time of the source it is being copied from.
+PARTIAL_SOURCE_SUFFIX = '.part.json'
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# Linux ioctl which clones a file's extents (a reflink) on btrfs, xfs and similar file systems.
+FICLONE = 0x40049409
+# Errors which mean a zero-copy path isn't supported for this pair of files, so fall back to the next one.
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF}
+
+
+class CopyJob(NamedTuple):
+    """A single file to copy."""
+    src_fpath: str
+    dst_fpath: str
+
+
+class CopyProgress(NamedTuple):
+    """A snapshot of a copy's progress."""
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int
+    bytes_per_second: float
+
+
+class CopyReport(NamedTuple):
+    """The outcome of a copy."""
+    copied: int
+    skipped: int
+    errors: List[str]
+    bytes_copied: int
+    elapsed_seconds: float
+    was_cancelled: bool
+
+
+class CopyCancelled(Exception):
+    """Raised inside a worker when the copy is cancelled."""
+
+
+def make_liked_event_copy_jobs(liked_events: List[Tuple[str, List[str], str]], dst_dir: str) -> List[CopyJob]:
+    """
+    Make the copy jobs which export liked events, one sub folder per event.
+    Args:
+        liked_events (list of tuple): (event name, video files, folder tag) for every liked event.
+        dst_dir (str): The directory to export to.
+    Returns:
+        list of CopyJob: The copy jobs.
+    """
+    jobs = []
+    for event_name, video_files, folder_tag in liked_events:
+        if folder_tag:
+            event_tag = folder_tag.replace(' ', '-')
+            event_name = f'{event_name}_{event_tag}'
+        for src_fpath in video_files:
+            jobs.append(CopyJob(src_fpath, os.path.join(dst_dir, event_name, os.path.basename(src_fpath))))
+    return jobs
+
+
+def is_identical_copy(src_stat: os.stat_result, dst_fpath: str) -> bool:
+    """
+    Whether dst_fpath already is a copy of the source. Copies keep the source's mtime, compared with the
+    2 second resolution of FAT file systems.
+    Args:
+        src_stat (os.stat_result): The source file's stat.
+        dst_fpath (str): The destination file path.
+    Returns:
+        bool: True if the destination has the same size and modification time.
+    """
+    try:
+        dst_stat = os.stat(dst_fpath)
+    except OSError:
+        return False
+    return dst_stat.st_size == src_stat.st_size and abs(dst_stat.st_mtime - src_stat.st_mtime) <= 2
+
+
+def _try_reflink(src_fd: int, dst_fd: int) -> bool:
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError as e:
+        if e.errno in UNSUPPORTED_ERRNOS or e.errno == errno.EPERM:
+            return False
+        raise
+    return True
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, size: int, on_chunk: Callable[[int], None]) -> None:
+    """Copy bytes [offset, size) of src_fd to the same offsets of dst_fd, using the kernel when possible."""
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < size:
+                copied = os.copy_file_range(src_fd, dst_fd, min(COPY_CHUNK_SIZE, size - offset), offset, offset)
+                if copied == 0:
+                    break
+                offset += copied
+                on_chunk(copied)
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+    if sys.platform.startswith('linux') and hasattr(os, 'sendfile'):
+        try:
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            while offset < size:
+                copied = os.sendfile(dst_fd, src_fd, offset, min(COPY_CHUNK_SIZE, size - offset))
+                if copied == 0:
+                    break
+                offset += copied
+                on_chunk(copied)
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+    # A plain read and write loop, the only path off Linux. Both descriptors belong to this worker, so seeking
+    # them is safe where os.pread is missing, e.g. on Windows.
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    os.lseek(dst_fd, offset, os.SEEK_SET)
+    while offset < size:
+        data = os.read(src_fd, min(COPY_CHUNK_SIZE, size - offset))
+        if not data:
+            break
+        os.write(dst_fd, data)
+        offset += len(data)
+        on_chunk(len(data))
+
+
+class CopyEngine(object):
+    """Copies files with a bounded pool of worker threads.
+
+    - At most per_device_limit files are read from, or written to, the same device at once, so a slow USB
+      stick isn't thrashed by many concurrent readers.
+    - Reflinks, copy_file_range and sendfile are used when available so data doesn't pass through python.
+    - Files which already have an identical copy are skipped.
+    - Files are written to a .part file which is renamed when complete. An interrupted copy resumes from the
+      end of its .part file if the source still has the size and modification time it was started from.
+      Completed files are recorded in a manifest in the destination directory, which is removed once a copy
+      completes without errors.
+    """
+    def __init__(self, max_workers: int = 4, per_device_limit: int = 2,
+                 progress_callback: Callable[[CopyProgress], None] = None,
+                 is_cancelled: Callable[[], bool] = None, progress_interval: float = 0.2) -> None:
+        """
+        Args:
+            max_workers (int): The number of files copied at once.
+            per_device_limit (int): The number of files copied at once from or to a single device.
+            progress_callback (Callable, optional): Called with a CopyProgress, from worker threads.
+            is_cancelled (Callable, optional): Polled between chunks, copying stops once it returns True.
+            progress_interval (float): The minimum number of seconds between progress callbacks.
+        """
+        self._max_workers = max_workers
+        self._per_device_limit = per_device_limit
+        self._progress_callback = progress_callback
+        self._is_cancelled = is_cancelled
+        self._progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._device_semaphores: Dict[int, threading.Semaphore] = {}
+
+    def copy(self, jobs: List[CopyJob], manifest_dir: Union[str, None] = None) -> CopyReport:
+        """
+        Copy files, blocking until every file is copied, skipped or failed.
+        Args:
+            jobs (list of CopyJob): The files to copy.
+            manifest_dir (str, optional): The directory the resume manifest is kept in.
+        Returns:
+            CopyReport: The outcome of the copy.
+        """
+        self._start_time = time.monotonic()
+        self._last_progress_time = 0.0
+        self._files_done = 0
+        self._files_total = len(jobs)
+        self._bytes_done = 0
+        self._bytes_copied = 0
+        self._copied = 0
+        self._skipped = 0
+        self._errors = []
+        self._manifest_file = None
+        completed = set()
+        manifest_fpath = None
+        if manifest_dir:
+            manifest_fpath = os.path.join(manifest_dir, COPY_MANIFEST_FILE_NAME)
+            completed = self._load_manifest(manifest_fpath)
+            try:
+                os.makedirs(manifest_dir, exist_ok=True)
+                self._manifest_file = open(manifest_fpath, 'a', encoding='utf-8')
+            except OSError as e:
+                # The files are still copied, an interrupted copy just can't skip them by the manifest.
+                self._errors.append(f'There was an error writing the copy manifest {manifest_fpath}: {e}')
+        sized_jobs = []
+        self._bytes_total = 0
+        for job in jobs:
+            try:
+                src_stat = os.stat(job.src_fpath)
+            except OSError as e:
+                self._errors.append(f'There was an error reading {job.src_fpath}: {e}')
+                self._files_done += 1
+                continue
+            self._bytes_total += src_stat.st_size
+            sized_jobs.append((job, src_stat, completed))
+        try:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                # Largest files first keeps the pool busy until the end.
+                sized_jobs.sort(key=lambda item: item[1].st_size, reverse=True)
+                for _ in executor.map(lambda item: self._copy_one(*item), sized_jobs):
+                    pass
+        finally:
+            if self._manifest_file is not None:
+                try:
+                    self._manifest_file.close()
+                except OSError as e:
+                    self._errors.append(f'There was an error writing the copy manifest {manifest_fpath}: {e}')
+        was_cancelled = bool(self._is_cancelled and self._is_cancelled())
+        if manifest_fpath is not None and not was_cancelled and not self._errors:
+            # Every file was copied, so there is nothing left to resume.
+            try:
+                os.remove(manifest_fpath)
+            except OSError as e:
+                logger.warning(f'Could not remove the copy manifest {manifest_fpath}: {e}')
+        self._report_progress(force=True)
+        report = CopyReport(self._copied, self._skipped, self._errors, self._bytes_copied,
+                            time.monotonic() - self._start_time, was_cancelled)
+        logger.info(f'Copied {report.copied} files, skipped {report.skipped}, {len(report.errors)} errors, '
+                    f'{report.bytes_copied / max(report.elapsed_seconds, 1e-9) / 1e6:.1f} MB/s')
+        return report
+
+    def _copy_one(self, job: CopyJob, src_stat: os.stat_result, completed: set) -> None:
+        if self._is_cancelled and self._is_cancelled():
+            return
+        try:
+            if ((job.dst_fpath, src_stat.st_size, src_stat.st_mtime_ns) in completed
+                    or is_identical_copy(src_stat, job.dst_fpath)):
+                self._file_finished(src_stat.st_size, copied=False)
+                return
+            dst_dir = os.path.dirname(job.dst_fpath)
+            os.makedirs(dst_dir, exist_ok=True)
+            semaphores = self._semaphores_for(src_stat.st_dev, os.stat(dst_dir).st_dev)
+            for semaphore in semaphores:
+                semaphore.acquire()
+            try:
+                self._copy_file(job, src_stat)
+            finally:
+                for semaphore in reversed(semaphores):
+                    semaphore.release()
+        except CopyCancelled:
+            return
+        except OSError as e:
+            with self._lock:
+                self._errors.append(f'There was an error copying {job.src_fpath} to {job.dst_fpath}: {e}')
+                self._files_done += 1
+            return
+        self._record_completed(job, src_stat)
+        self._file_finished(0, copied=True)
+
+    def _copy_file(self, job: CopyJob, src_stat: os.stat_result) -> None:
+        part_fpath = job.dst_fpath + PARTIAL_FILE_SUFFIX
+        source_fpath = job.dst_fpath + PARTIAL_SOURCE_SUFFIX
+        source = {'src': job.src_fpath, 'size': src_stat.st_size, 'mtime_ns': src_stat.st_mtime_ns}
+        size = src_stat.st_size
+        # Not opened for appending: copy_file_range, sendfile and reflinks all refuse an O_APPEND destination.
+        part_fd = os.open(part_fpath, os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o666)
+        with open(job.src_fpath, 'rb') as src_file, open(part_fd, 'wb') as dst_file:
+            src_fd = src_file.fileno()
+            dst_fd = dst_file.fileno()
+            offset = os.fstat(dst_fd).st_size
+            if offset and (offset > size or self._read_part_source(source_fpath) != source):
+                # The .part file was started from another version of the source, or it isn't known which.
+                logger.info(f'Restarting copy of {job.src_fpath}, it changed since {part_fpath} was started')
+                os.ftruncate(dst_fd, 0)
+                offset = 0
+            if offset == 0:
+                with open(source_fpath, 'w', encoding='utf-8') as source_file:
+                    json.dump(source, source_file)
+            if offset:
+                logger.info(f'Resuming copy of {job.src_fpath} at byte {offset}')
+                self._add_bytes(offset, copied=False)
+            if offset == 0 and size and _try_reflink(src_fd, dst_fd):
+                self._add_bytes(size, copied=True)
+            else:
+                _copy_range(src_fd, dst_fd, offset, size, self._on_chunk)
+        shutil.copystat(job.src_fpath, part_fpath)
+        os.replace(part_fpath, job.dst_fpath)
+        try:
+            os.remove(source_fpath)
+        except OSError:
+            pass
+
+    def _on_chunk(self, copied: int) -> None:
+        self._add_bytes(copied, copied=True)
+        if self._is_cancelled and self._is_cancelled():
+            raise CopyCancelled()
+
+    def _add_bytes(self, count: int, copied: bool) -> None:
+        with self._lock:
+            self._bytes_done += count
+            if copied:
+                self._bytes_copied += count
+        self._report_progress()
+
+    def _file_finished(self, skipped_bytes: int, copied: bool) -> None:
+        with self._lock:
+            self._files_done += 1
+            if copied:
+                self._copied += 1
+            else:
+                self._skipped += 1
+                self._bytes_done += skipped_bytes
+        self._report_progress()
+
+    def _report_progress(self, force: bool = False) -> None:
+        if self._progress_callback is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_progress_time < self._progress_interval:
+                return
+            self._last_progress_time = now
+            elapsed = max(now - self._start_time, 1e-9)
+            progress = CopyProgress(self._files_done, self._files_total, self._bytes_done, self._bytes_total,
+                                    self._bytes_copied / elapsed)
+        self._progress_callback(progress)
+
+    def _semaphores_for(self, *devices: int) -> List[threading.Semaphore]:
+        with self._lock:
+            semaphores = []
+            # Always acquired in device order so two workers can't deadlock on each other's devices.
+            for device in sorted(set(devices)):
+                if device not in self._device_semaphores:
+                    self._device_semaphores[device] = threading.Semaphore(self._per_device_limit)
+                semaphores.append(self._device_semaphores[device])
+            return semaphores
+
+    def _record_completed(self, job: CopyJob, src_stat: os.stat_result) -> None:
+        if self._manifest_file is None:
+            return
+        entry = {'src': job.src_fpath, 'dst': job.dst_fpath, 'size': src_stat.st_size,
+                 'mtime_ns': src_stat.st_mtime_ns}
+        with self._lock:
+            if self._manifest_file is None:
+                return
+            try:
+                self._manifest_file.write(json.dumps(entry) + '\n')
+                self._manifest_file.flush()
+            except OSError as e:
+                # e.g. the destination is full. The copied file is fine, only resuming can't skip it.
+                self._errors.append(f'There was an error writing the copy manifest: {e}')
+                manifest_file, self._manifest_file = self._manifest_file, None
+                try:
+                    manifest_file.close()
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _read_part_source(source_fpath: str) -> Union[dict, None]:
+        try:
+            with open(source_fpath, encoding='utf-8') as source_file:
+                return json.load(source_file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _load_manifest(manifest_fpath: str) -> set:
+        completed = set()
+        try:
+            with open(manifest_fpath, encoding='utf-8') as manifest_file:
+                for line in manifest_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by an interruption.
+                        continue
+                    if os.path.exists(entry['dst']):
+                        completed.add((entry['dst'], entry['size'], entry.get('mtime_ns')))
+        except OSError:
+            pass
+        return completed
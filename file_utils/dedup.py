@@ -0,0 +1,368 @@
+"""Find identical clips across RecentClips, SavedClips, SentryClips and several scanned roots by their contents."""
+import hashlib
+import logging
+import os
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple, Union
+
+from constants import FINGERPRINT_CACHE_FILE_NAME
+from file_utils.app_paths import get_app_data_dir
+from file_utils.copy_engine import CopyJob
+from file_utils.event_query import clip_source
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Blocks read for a sample hash, spread evenly from the start to the end of the file. Clips with the same size
+# and moov but different footage differ all through the mdat, so a few blocks tell them apart.
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_BLOCKS = 4
+FULL_HASH_CHUNK_SIZE = 8 * 1024 * 1024
+DEDUP_WORKERS = 8
+# Files statted per thread pool task, a task per file would cost more than the stat on a local drive.
+STAT_CHUNK_SIZE = 512
+# Files at most this large are read whole for their sample hash, which is then as good as a full hash.
+SAMPLE_HASH_MAX_FULL_SIZE = SAMPLE_BLOCK_SIZE * SAMPLE_BLOCKS
+# Which copy of a clip is kept, lowest first. The car deletes RecentClips after about an hour.
+_KEEP_PREFERENCE = {'SavedClips': 0, 'SentryClips': 0, 'RecentClips': 2}
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=16)
+
+
+def sample_hash(fpath: str, size: int) -> str:
+    """
+    Hash SAMPLE_BLOCKS blocks of a file, spread evenly over it, which is enough to tell apart clips of equal size.
+    Args:
+        fpath (str): The file.
+        size (int): The file's size.
+    Returns:
+        str: The hex digest.
+    """
+    file_hash = _new_hash()
+    with open(fpath, 'rb') as f:
+        if size <= SAMPLE_HASH_MAX_FULL_SIZE:
+            file_hash.update(f.read())
+        else:
+            step = (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+            for i in range(SAMPLE_BLOCKS):
+                f.seek(i * step)
+                file_hash.update(f.read(SAMPLE_BLOCK_SIZE))
+    return file_hash.hexdigest()
+
+
+def full_hash(fpath: str) -> str:
+    """
+    Hash a whole file.
+    Args:
+        fpath (str): The file.
+    Returns:
+        str: The hex digest.
+    """
+    file_hash = _new_hash()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(FULL_HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+class FingerprintCache(object):
+    """A SQLite backed cache of file hashes keyed by path, size and modification time.
+
+    TeslaCam clips are never modified once written, so a file whose size and mtime match the cached ones is not
+    read again. Every cached fingerprint is loaded with a single query the first time one is looked up.
+    """
+    def __init__(self, db_path: Union[Path, str, None] = None) -> None:
+        """
+        Args:
+            db_path (Path|str, optional): The SQLite file, defaults to a file in the app's data directory.
+        """
+        if db_path is None:
+            db_path = get_app_data_dir() / FINGERPRINT_CACHE_FILE_NAME
+        self._connection = sqlite3.connect(os.fspath(db_path))
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, '
+            "sample_hash TEXT NOT NULL DEFAULT '', full_hash TEXT NOT NULL DEFAULT '')")
+        self._connection.commit()
+        self._cache: Union[Dict[str, Tuple[int, int, str, str]], None] = None
+        self._pending_writes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fpath: str, size: int, mtime_ns: int) -> Tuple[str, str]:
+        """
+        Look up a file's hashes.
+        Args:
+            fpath (str): The file.
+            size (int): The file's size.
+            mtime_ns (int): The file's modification time.
+        Returns:
+            tuple of str: The sample hash and the full hash, empty when not cached or the file changed.
+        """
+        if self._cache is None:
+            self._cache = {path: (cached_size, cached_mtime_ns, cached_sample_hash, cached_full_hash)
+                           for path, cached_size, cached_mtime_ns, cached_sample_hash, cached_full_hash in
+                           self._connection.execute(
+                               'SELECT path, size, mtime_ns, sample_hash, full_hash FROM fingerprints')}
+        cached = self._cache.get(fpath)
+        if cached is None or cached[0] != size or cached[1] != mtime_ns:
+            self.misses += 1
+            return '', ''
+        self.hits += 1
+        return cached[2], cached[3]
+
+    def put(self, fpath: str, size: int, mtime_ns: int, sample_hash: str = '', full_hash: str = '') -> None:
+        """
+        Cache a file's hashes, merged with the ones already cached for the same size and mtime.
+        Args:
+            fpath (str): The file.
+            size (int): The file's size.
+            mtime_ns (int): The file's modification time.
+            sample_hash (str, optional): The sample hash.
+            full_hash (str, optional): The full hash.
+        """
+        if self._cache is None:
+            self.get(fpath, size, mtime_ns)
+        cached = self._cache.get(fpath)
+        if cached is not None and cached[:2] == (size, mtime_ns):
+            sample_hash = sample_hash or cached[2]
+            full_hash = full_hash or cached[3]
+        row = (size, mtime_ns, sample_hash, full_hash)
+        self._cache[fpath] = row
+        self._pending_writes[fpath] = row
+
+    def commit(self) -> None:
+        """Write the hashes cached since the last commit."""
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO fingerprints (path, size, mtime_ns, sample_hash, full_hash) '
+                'VALUES (?, ?, ?, ?, ?)', [(fpath,) + row for fpath, row in self._pending_writes.items()])
+        self._pending_writes = {}
+
+    def close(self) -> None:
+        """Close the cache's database connection."""
+        self._connection.close()
+
+
+class DuplicateGroup(NamedTuple):
+    """Files with identical contents, the one to keep first."""
+    size: int
+    fpaths: List[str]
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        """The bytes freed by deleting every file but the first."""
+        return self.size * (len(self.fpaths) - 1)
+
+
+class DuplicateReport(NamedTuple):
+    """The outcome of a duplicate search."""
+    groups: List[DuplicateGroup]
+    files_checked: int
+    files_hashed: int
+    bytes_hashed: int
+    errors: List[str]
+
+    @property
+    def reclaimable_bytes(self) -> int:
+        """The bytes freed by keeping one file of every group."""
+        return sum(group.reclaimable_bytes for group in self.groups)
+
+    def kept_fpaths(self) -> Dict[str, str]:
+        """
+        Map every duplicate to the copy which is kept.
+        Returns:
+            dict: The kept file keyed by the duplicate file, for every file but the first of each group.
+        """
+        return {fpath: group.fpaths[0] for group in self.groups for fpath in group.fpaths[1:]}
+
+
+def _keep_order(fpath: str) -> tuple:
+    source = clip_source(os.path.dirname(fpath))
+    return _KEEP_PREFERENCE.get(source, 1), fpath
+
+
+def _stat_files(fpaths: List[str]) -> List[Union[os.stat_result, OSError]]:
+    file_stats = []
+    for fpath in fpaths:
+        try:
+            file_stats.append(os.stat(fpath))
+        except OSError as e:
+            file_stats.append(e)
+    return file_stats
+
+
+def _returning_errors(hash_file: Callable[[str], str]) -> Callable[[str], Union[str, OSError]]:
+    # A file which can't be read, e.g. deleted by the car mid search, is reported instead of failing the search.
+    def hash_or_error(fpath: str) -> Union[str, OSError]:
+        try:
+            return hash_file(fpath)
+        except OSError as e:
+            return e
+    return hash_or_error
+
+
+class _Hasher(object):
+    """Hashes files on a thread pool, going through the fingerprint cache, for a single duplicate search."""
+    def __init__(self, executor: ThreadPoolExecutor, cache: Union[FingerprintCache, None],
+                 stats: Dict[str, os.stat_result], errors: List[str]) -> None:
+        self._executor = executor
+        self._cache = cache
+        self._stats = stats
+        self._errors = errors
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+
+    def group(self, fpaths: List[str], full: bool) -> List[List[str]]:
+        """Split files of equal size into the groups whose hashes match, dropping files without a match."""
+        hashes = {}
+        to_hash = []
+        for fpath in fpaths:
+            file_stat = self._stats[fpath]
+            if self._cache is not None:
+                cached_sample_hash, cached_full_hash = self._cache.get(fpath, file_stat.st_size, file_stat.st_mtime_ns)
+                cached_hash = cached_full_hash if full else cached_sample_hash
+                if cached_hash:
+                    hashes[fpath] = cached_hash
+                    continue
+            to_hash.append(fpath)
+        hash_file = full_hash if full else lambda fpath: sample_hash(fpath, self._stats[fpath].st_size)
+        for fpath, file_hash in zip(to_hash, self._executor.map(_returning_errors(hash_file), to_hash)):
+            if isinstance(file_hash, OSError):
+                self._errors.append(f'There was an error reading {fpath}: {file_hash}')
+                continue
+            hashes[fpath] = file_hash
+            file_stat = self._stats[fpath]
+            self.files_hashed += 1
+            self.bytes_hashed += file_stat.st_size if full else min(file_stat.st_size, SAMPLE_HASH_MAX_FULL_SIZE)
+            if self._cache is not None:
+                self._cache.put(fpath, file_stat.st_size, file_stat.st_mtime_ns,
+                                **{'full_hash' if full else 'sample_hash': file_hash})
+        fpaths_by_hash = defaultdict(list)
+        for fpath, file_hash in hashes.items():
+            fpaths_by_hash[file_hash].append(fpath)
+        return [hash_fpaths for hash_fpaths in fpaths_by_hash.values() if len(hash_fpaths) > 1]
+
+
+def find_duplicates(fpaths: Iterable[str], cache: Union[FingerprintCache, None] = None,
+                    max_workers: int = DEDUP_WORKERS,
+                    is_cancelled: Union[Callable[[], bool], None] = None) -> DuplicateReport:
+    """
+    Find files with identical contents.
+
+    Only files which share their size with another file are read. Those are sample hashed, and only files whose
+    size and sample hash collide are hashed in full. Paths of the same file, e.g. hard links or a root scanned
+    twice, aren't duplicates since deleting one frees nothing.
+    Args:
+        fpaths (iterable of str): The files to check.
+        cache (FingerprintCache, optional): Reuse, and save, the hashes of unchanged files.
+        max_workers (int, optional): The number of files statted or read at once. Defaults to DEDUP_WORKERS.
+        is_cancelled (Callable, optional): Polled between stages, the search stops once it returns True.
+    Returns:
+        DuplicateReport: The groups of identical files, largest reclaimable space first.
+    """
+    fpaths = list(dict.fromkeys(fpaths))
+    errors = []
+    stats = {}
+    fpaths_by_size = defaultdict(list)
+    seen_inodes = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chunks = [fpaths[first:first + STAT_CHUNK_SIZE] for first in range(0, len(fpaths), STAT_CHUNK_SIZE)]
+        file_stats = (file_stat for chunk_stats in executor.map(_stat_files, chunks) for file_stat in chunk_stats)
+        for fpath, file_stat in zip(fpaths, file_stats):
+            if isinstance(file_stat, OSError):
+                errors.append(f'There was an error reading {fpath}: {file_stat}')
+                continue
+            inode = (file_stat.st_dev, file_stat.st_ino)
+            # Empty clips are all alike and free nothing.
+            if file_stat.st_size == 0 or (file_stat.st_ino and inode in seen_inodes):
+                continue
+            seen_inodes.add(inode)
+            stats[fpath] = file_stat
+            fpaths_by_size[file_stat.st_size].append(fpath)
+        hasher = _Hasher(executor, cache, stats, errors)
+        groups = []
+        for size, size_fpaths in fpaths_by_size.items():
+            if len(size_fpaths) < 2:
+                continue
+            if is_cancelled is not None and is_cancelled():
+                break
+            for sample_fpaths in hasher.group(size_fpaths, full=False):
+                if size <= SAMPLE_HASH_MAX_FULL_SIZE:
+                    groups.append(DuplicateGroup(size, sorted(sample_fpaths, key=_keep_order)))
+                    continue
+                for identical_fpaths in hasher.group(sample_fpaths, full=True):
+                    groups.append(DuplicateGroup(size, sorted(identical_fpaths, key=_keep_order)))
+    if cache is not None:
+        cache.commit()
+    groups.sort(key=lambda group: -group.reclaimable_bytes)
+    report = DuplicateReport(groups, len(fpaths), hasher.files_hashed, hasher.bytes_hashed, errors)
+    logger.info(f'Checked {report.files_checked} files for duplicates, hashed {report.files_hashed}, '
+                f'{report.reclaimable_bytes / 1e6:.1f} MB reclaimable in {len(report.groups)} groups.')
+    return report
+
+
+def _unique_fpath(fpath: str, taken_fpaths: set) -> str:
+    root, ext = os.path.splitext(fpath)
+    number = 2
+    while f'{root}_{number}{ext}' in taken_fpaths:
+        number += 1
+    return f'{root}_{number}{ext}'
+
+
+def drop_duplicate_copy_jobs(jobs: List[CopyJob],
+                             cache: Union[FingerprintCache, None] = None) -> Tuple[List[CopyJob], int]:
+    """
+    Drop the copy jobs which would write an identical clip to a file another job already writes, e.g. the same
+    minute liked in both RecentClips and SavedClips. Hard links of one clip are identical too. Jobs writing
+    different contents to one file are all kept, each but the first under the file name with a _2, _3... suffix.
+    Args:
+        jobs (list of CopyJob): The files to copy.
+        cache (FingerprintCache, optional): Reuse, and save, the hashes of unchanged files.
+    Returns:
+        tuple: The jobs left, and the number of jobs dropped.
+    """
+    jobs_by_dst = defaultdict(list)
+    for job in jobs:
+        jobs_by_dst[job.dst_fpath].append(job)
+    colliding_src_fpaths = list(dict.fromkeys(job.src_fpath for dst_jobs in jobs_by_dst.values()
+                                              if len(dst_jobs) > 1 for job in dst_jobs))
+    if not colliding_src_fpaths:
+        return jobs, 0
+    # find_duplicates doesn't count paths of the same file as duplicates, so they are matched by inode here.
+    first_fpath_by_inode = {}
+    same_file_fpaths = {}
+    for src_fpath, file_stat in zip(colliding_src_fpaths, _stat_files(colliding_src_fpaths)):
+        if not isinstance(file_stat, OSError) and file_stat.st_ino:
+            same_file_fpaths[src_fpath] = first_fpath_by_inode.setdefault((file_stat.st_dev, file_stat.st_ino),
+                                                                          src_fpath)
+    kept_fpaths = find_duplicates((same_file_fpaths.get(fpath, fpath) for fpath in colliding_src_fpaths),
+                                  cache).kept_fpaths()
+    kept_jobs = []
+    # The file each distinct clip is written to, keyed by the file the jobs name.
+    dst_fpaths_by_contents = defaultdict(dict)
+    taken_fpaths = set(jobs_by_dst)
+    for job in jobs:
+        if len(jobs_by_dst[job.dst_fpath]) < 2:
+            kept_jobs.append(job)
+            continue
+        src_fpath = same_file_fpaths.get(job.src_fpath, job.src_fpath)
+        contents = kept_fpaths.get(src_fpath, src_fpath)
+        dst_fpaths = dst_fpaths_by_contents[job.dst_fpath]
+        if contents in dst_fpaths:
+            continue
+        dst_fpath = job.dst_fpath
+        if dst_fpaths:
+            dst_fpath = _unique_fpath(job.dst_fpath, taken_fpaths)
+            taken_fpaths.add(dst_fpath)
+            logger.info(f'{job.src_fpath} differs from the clip copied to {job.dst_fpath}, copying it to {dst_fpath}')
+        dst_fpaths[contents] = dst_fpath
+        kept_jobs.append(CopyJob(job.src_fpath, dst_fpath))
+    return kept_jobs, len(jobs) - len(kept_jobs)
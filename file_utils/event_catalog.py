@@ -0,0 +1,437 @@
+"""A compact, column oriented store of scanned events, for drives with hundreds of thousands of clips."""
+import calendar
+import datetime
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.video_events import EVENT_COMPLETE, EVENT_CORRUPT, EVENT_PARTIAL
+
+TIMESTAMP_FORMAT = '%Y-%m-%d_%H-%M-%S'
+# Stored in the durations column for events which weren't probed or couldn't be read.
+UNKNOWN_DURATION = -1
+# The integrity column stores an index into this tuple, 0 for events whose clips weren't checked.
+INTEGRITY_STATES = (None, EVENT_COMPLETE, EVENT_PARTIAL, EVENT_CORRUPT)
+_EMPTY_SLOT = -1
+# Keep the timestamp hash table at most half full so probe sequences stay short.
+_MAX_LOAD_FACTOR = 0.5
+
+
+def timestamp_to_epoch(timestamp: str) -> int:
+    """
+    Convert a Tesla clip timestamp, e.g. 2024-01-01_10-00-00, to seconds since the epoch. The car records
+    local time without a zone, so the time is taken as is, as if it were UTC.
+    Args:
+        timestamp (str): The timestamp.
+    Returns:
+        int: The seconds since the epoch.
+    """
+    if len(timestamp) != 19:
+        raise ValueError(f'Not a clip timestamp: {timestamp!r}')
+    # Slicing is several times faster than strptime, which matters at a million events.
+    return calendar.timegm((int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]),
+                            int(timestamp[11:13]), int(timestamp[14:16]), int(timestamp[17:19]), 0, 0, 0))
+
+
+def epoch_to_timestamp(epoch: int) -> str:
+    """
+    Convert seconds since the epoch back to a Tesla clip timestamp, see timestamp_to_epoch.
+    Args:
+        epoch (int): The seconds since the epoch.
+    Returns:
+        str: The timestamp.
+    """
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+class EventRow(object):
+    """A view of one event of an EventCatalog. It holds no event data itself, so views are cheap to make
+    and always reflect the catalog.
+
+    It has the same read interface as VideoEventData (timestamp, dir_path, event_key, camera_files_dict,
+    duration_ms), so either can be passed to code such as make_drive_sessions.
+    """
+    __slots__ = ('_catalog', '_row')
+
+    def __init__(self, catalog: 'EventCatalog', row: int) -> None:
+        """
+        Args:
+            catalog (EventCatalog): The catalog.
+            row (int): The event's row in the catalog.
+        """
+        self._catalog = catalog
+        self._row = row
+
+    def __repr__(self) -> str:
+        return f'EventRow({self.timestamp!r}, {self.dir_path!r})'
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, EventRow) and other._catalog is self._catalog and other._row == self._row
+
+    def __hash__(self) -> int:
+        return hash((id(self._catalog), self._row))
+
+    @property
+    def row(self) -> int:
+        """The event's row in the catalog."""
+        return self._row
+
+    @property
+    def epoch(self) -> int:
+        """The event's time in seconds since the epoch, see timestamp_to_epoch."""
+        return self._catalog._epochs[self._row]
+
+    @property
+    def timestamp(self) -> str:
+        """The event's timestamp, e.g. 2024-01-01_10-00-00."""
+        return epoch_to_timestamp(self._catalog._epochs[self._row])
+
+    @property
+    def dir_path(self) -> str:
+        """The directory the event's video files are in."""
+        return self._catalog._dir_paths[self._catalog._dir_ids[self._row]]
+
+    @property
+    def event_key(self) -> tuple:
+        """The event's directory and timestamp, see VideoEventData.event_key."""
+        return self.dir_path, self.timestamp
+
+    @property
+    def camera_mask(self) -> int:
+        """A bit per camera of TESLAS_CAMERA_NAMES, set if the camera has a video file."""
+        return self._catalog._camera_masks[self._row]
+
+    @property
+    def camera_names(self) -> List[str]:
+        """The cameras which have a video file, in TESLAS_CAMERA_NAMES order."""
+        camera_mask = self._catalog._camera_masks[self._row]
+        return [camera_name for bit, camera_name in enumerate(TESLAS_CAMERA_NAMES) if camera_mask & (1 << bit)]
+
+    @property
+    def video_files(self) -> List[str]:
+        """The event's video file paths with forward slashes, in TESLAS_CAMERA_NAMES order, spelled like
+        VideoEventData.video_files so the same clip has one path everywhere."""
+        dir_path = self.dir_path.replace(os.sep, '/').rstrip('/')
+        return [f'{dir_path}/{file_name}' for file_name in self._catalog._file_names(self._row)]
+
+    @property
+    def camera_files_dict(self) -> Dict[str, Path]:
+        """The event's video file paths keyed by camera name, built on every call."""
+        dir_path = self.dir_path
+        return {camera_name: Path(dir_path, file_name) for camera_name, file_name in
+                zip(self.camera_names, self._catalog._file_names(self._row))}
+
+    @property
+    def file_sizes(self) -> Dict[str, int]:
+        """The size in bytes of each camera's video file, keyed by camera name."""
+        return {camera_name: self._catalog._file_sizes[bit][self._row]
+                for bit, camera_name in enumerate(TESLAS_CAMERA_NAMES)
+                if self._catalog._camera_masks[self._row] & (1 << bit)}
+
+    @property
+    def total_size(self) -> int:
+        """The size in bytes of all of the event's video files."""
+        return sum(self.file_sizes.values())
+
+    @property
+    def duration_ms(self) -> Union[int, None]:
+        """The probed duration in milliseconds, None if it isn't known."""
+        duration_ms = self._catalog._durations_ms[self._row]
+        return None if duration_ms == UNKNOWN_DURATION else duration_ms
+
+    @property
+    def integrity(self) -> Union[str, None]:
+        """Whether the event's clips can be played, see VideoEventData.integrity."""
+        return INTEGRITY_STATES[self._catalog._integrity[self._row]]
+
+
+class EventCatalog(object):
+    """Stores events in parallel typed arrays, one entry per event in each.
+
+    Timestamps are int64 epochs, directories are interned and stored as ids, the cameras an event has are a
+    bit mask and file names are only stored when they differ from Tesla's {timestamp}-{camera}.mp4. This
+    costs tens of bytes per event, where a VideoEventData with its Path objects costs kilobytes. Events are
+    looked up by timestamp in O(1) through an open addressing hash table of row numbers.
+    """
+    def __init__(self) -> None:
+        self._epochs = array('q')
+        self._dir_ids = array('I')
+        self._camera_masks = array('B')
+        self._file_sizes = [array('q') for _ in TESLAS_CAMERA_NAMES]
+        self._durations_ms = array('i')
+        self._integrity = array('B')
+        self._dir_paths: List[str] = []
+        self._dir_ids_by_path: Dict[str, int] = {}
+        # Non standard file names keyed by (row, camera bit).
+        self._odd_file_names: Dict[Tuple[int, int], str] = {}
+        self._slots = array('q', [_EMPTY_SLOT]) * 16
+        # The table's size is a power of two, slot indexes are the top bits of the hash.
+        self._slot_shift = 64 - 4
+        # Rows in time order, rebuilt when an out of order event was added since it was last built.
+        self._sorted_rows: Union[array, None] = array('I')
+        self._last_epoch = None
+        # Incremented whenever an existing event changes, so indexes over the catalog know to rebuild.
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._epochs)
+
+    def __iter__(self) -> Iterator[EventRow]:
+        """Iterate over the events in the order they were added."""
+        return (EventRow(self, row) for row in range(len(self._epochs)))
+
+    def __getitem__(self, row: int) -> EventRow:
+        if not -len(self._epochs) <= row < len(self._epochs):
+            raise IndexError(row)
+        return EventRow(self, row % len(self._epochs))
+
+    @property
+    def dir_paths(self) -> List[str]:
+        """The interned directories, indexed by directory id. Don't modify it.
+        Returns:
+            list of str: The directory paths.
+        """
+        return self._dir_paths
+
+    def columns(self, *names: str) -> Tuple[array, ...]:
+        """
+        Get columns for fast read only scans over every event, e.g. by indexes.
+        Args:
+            *names (str): Column names: epochs, dir_ids, camera_masks, durations_ms or integrity.
+        Returns:
+            tuple of array: The columns, indexed by row. Don't modify them.
+        """
+        return tuple(getattr(self, f'_{name}') for name in names)
+
+    def intern_dir(self, dir_path: str) -> int:
+        """
+        Get a directory's id, adding the directory if it is new.
+        Args:
+            dir_path (str): The directory path.
+        Returns:
+            int: The directory's id.
+        """
+        dir_id = self._dir_ids_by_path.get(dir_path)
+        if dir_id is None:
+            dir_id = len(self._dir_paths)
+            self._dir_paths.append(sys.intern(dir_path))
+            self._dir_ids_by_path[self._dir_paths[-1]] = dir_id
+        return dir_id
+
+    def add(self, dir_path: str, timestamp: str, file_names: Dict[str, str],
+            file_sizes: Dict[str, int] = None) -> EventRow:
+        """
+        Add an event, or replace the files of the event with the same directory and timestamp.
+        Args:
+            dir_path (str): The directory the event's video files are in.
+            timestamp (str): The event's timestamp.
+            file_names (dict): The video file names keyed by camera name.
+            file_sizes (dict, optional): The video file sizes in bytes keyed by camera name.
+        Returns:
+            EventRow: The event.
+        """
+        epoch = timestamp_to_epoch(timestamp)
+        dir_id = self.intern_dir(dir_path)
+        row = self._find_row(epoch, dir_id)
+        if row is None:
+            row = len(self._epochs)
+            self._epochs.append(epoch)
+            self._dir_ids.append(dir_id)
+            self._camera_masks.append(0)
+            for sizes in self._file_sizes:
+                sizes.append(0)
+            self._durations_ms.append(UNKNOWN_DURATION)
+            self._integrity.append(0)
+            self._insert_slot(row)
+            if self._sorted_rows is not None and (self._last_epoch is None or epoch >= self._last_epoch):
+                self._sorted_rows.append(row)
+                self._last_epoch = epoch
+            else:
+                self._sorted_rows = None
+            is_new = True
+        else:
+            is_new = False
+            self.generation += 1
+        camera_mask = 0
+        for bit, camera_name in enumerate(TESLAS_CAMERA_NAMES):
+            if not is_new:
+                self._odd_file_names.pop((row, bit), None)
+            file_name = file_names.get(camera_name)
+            if file_name is None:
+                if not is_new:
+                    self._file_sizes[bit][row] = 0
+                continue
+            camera_mask |= 1 << bit
+            # Tesla's names end in -{camera}.mp4 after the timestamp, anything else is stored in full.
+            if not (file_name.startswith(timestamp) and file_name.endswith('-' + camera_name + '.mp4')
+                    and len(file_name) == 24 + len(camera_name)):
+                self._odd_file_names[(row, bit)] = file_name
+            if file_sizes:
+                self._file_sizes[bit][row] = file_sizes.get(camera_name, 0)
+            elif not is_new:
+                self._file_sizes[bit][row] = 0
+        self._camera_masks[row] = camera_mask
+        return EventRow(self, row)
+
+    def add_event_data(self, event_data, file_sizes: Dict[str, int] = None) -> EventRow:
+        """
+        Add a scanned event, see add.
+        Args:
+            event_data (VideoEventData): The event.
+            file_sizes (dict, optional): The video file sizes in bytes keyed by camera name.
+        Returns:
+            EventRow: The event.
+        """
+        event_row = self.add(event_data.dir_path, event_data.timestamp, event_data.camera_file_names, file_sizes)
+        if event_data.duration_ms is not None:
+            self.set_duration_ms(event_row.row, event_data.duration_ms)
+        if event_data.integrity is not None:
+            self.set_integrity(event_row.row, event_data.integrity)
+        return event_row
+
+    def set_duration_ms(self, row: int, duration_ms: Union[int, None]) -> None:
+        """
+        Record an event's probed duration.
+        Args:
+            row (int): The event's row.
+            duration_ms (int|None): The duration in milliseconds, None if it isn't known.
+        """
+        self._durations_ms[row] = UNKNOWN_DURATION if duration_ms is None else duration_ms
+
+    def set_integrity(self, row: int, integrity: Union[str, None]) -> None:
+        """
+        Record whether an event's clips can be played.
+        Args:
+            row (int): The event's row.
+            integrity (str|None): One of INTEGRITY_STATES.
+        """
+        self._integrity[row] = INTEGRITY_STATES.index(integrity)
+
+    def find(self, timestamp: str, dir_path: str = None) -> Union[EventRow, None]:
+        """
+        Look an event up by timestamp in O(1).
+        Args:
+            timestamp (str): The event's timestamp.
+            dir_path (str, optional): The event's directory, needed when the same minute is in several
+                directories, e.g. RecentClips and a SavedClips folder. Defaults to the first event added.
+        Returns:
+            EventRow|None: The event, None if there is no such event.
+        """
+        try:
+            epoch = timestamp_to_epoch(timestamp)
+        except ValueError:
+            return None
+        if dir_path is None:
+            dir_id = None
+        else:
+            dir_id = self._dir_ids_by_path.get(dir_path)
+            if dir_id is None:
+                return None
+        row = self._find_row(epoch, dir_id)
+        return None if row is None else EventRow(self, row)
+
+    def find_all(self, timestamp: str) -> List[EventRow]:
+        """
+        Look up every event with a timestamp.
+        Args:
+            timestamp (str): The events' timestamp.
+        Returns:
+            list of EventRow: The events, in the order they were added.
+        """
+        try:
+            epoch = timestamp_to_epoch(timestamp)
+        except ValueError:
+            return []
+        return [EventRow(self, row) for row in sorted(self._iter_rows(epoch))]
+
+    def iter_sorted(self) -> Iterator[EventRow]:
+        """Iterate over the events in time order."""
+        if self._sorted_rows is None:
+            self._sorted_rows = array('I', sorted(range(len(self._epochs)), key=self._epochs.__getitem__))
+            self._last_epoch = self._epochs[self._sorted_rows[-1]] if self._sorted_rows else None
+        return (EventRow(self, row) for row in self._sorted_rows)
+
+    def memory_usage(self) -> int:
+        """
+        Estimate the bytes the catalog's columns, hash table and directory strings take.
+        Returns:
+            int: The size in bytes.
+        """
+        columns = [self._epochs, self._dir_ids, self._camera_masks, self._durations_ms, self._integrity, self._slots,
+                   *self._file_sizes]
+        if self._sorted_rows is not None:
+            columns.append(self._sorted_rows)
+        size = sum(column.buffer_info()[1] * column.itemsize for column in columns)
+        size += sum(sys.getsizeof(dir_path) for dir_path in self._dir_paths)
+        size += sys.getsizeof(self._dir_ids_by_path) + sys.getsizeof(self._odd_file_names)
+        return size
+
+    def _file_names(self, row: int) -> List[str]:
+        timestamp = None
+        file_names = []
+        camera_mask = self._camera_masks[row]
+        for bit, camera_name in enumerate(TESLAS_CAMERA_NAMES):
+            if not camera_mask & (1 << bit):
+                continue
+            file_name = self._odd_file_names.get((row, bit))
+            if file_name is None:
+                if timestamp is None:
+                    timestamp = epoch_to_timestamp(self._epochs[row])
+                file_name = f'{timestamp}-{camera_name}.mp4'
+            file_names.append(file_name)
+        return file_names
+
+    def _slot_index(self, epoch: int) -> int:
+        # Fibonacci hashing: the top bits of the product spread minutes, whose epochs are all multiples of
+        # 60, evenly over the table.
+        return (epoch * 11400714819323198485 & 0xFFFFFFFFFFFFFFFF) >> self._slot_shift
+
+    def _iter_rows(self, epoch: int) -> Iterator[int]:
+        slots = self._slots
+        index = self._slot_index(epoch)
+        while True:
+            row = slots[index]
+            if row == _EMPTY_SLOT:
+                return
+            if self._epochs[row] == epoch:
+                yield row
+            index = (index + 1) % len(slots)
+
+    def _find_row(self, epoch: int, dir_id: Union[int, None]) -> Union[int, None]:
+        for row in self._iter_rows(epoch):
+            if dir_id is None or self._dir_ids[row] == dir_id:
+                return row
+        return None
+
+    def _insert_slot(self, row: int) -> None:
+        if len(self._epochs) > len(self._slots) * _MAX_LOAD_FACTOR:
+            self._slots = array('q', [_EMPTY_SLOT]) * (len(self._slots) * 2)
+            self._slot_shift -= 1
+            for existing_row in range(len(self._epochs)):
+                self._place(existing_row)
+            return
+        self._place(row)
+
+    def _place(self, row: int) -> None:
+        slots = self._slots
+        index = self._slot_index(self._epochs[row])
+        while slots[index] != _EMPTY_SLOT:
+            index = (index + 1) % len(slots)
+        slots[index] = row
+
+
+def build_event_catalog(events) -> EventCatalog:
+    """
+    Build a catalog from scanned events.
+    Args:
+        events (iterable of VideoEventData): The events.
+    Returns:
+        EventCatalog: The catalog.
+    """
+    catalog = EventCatalog()
+    for event_data in events:
+        catalog.add_event_data(event_data)
+    return catalog
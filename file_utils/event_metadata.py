@@ -0,0 +1,175 @@
+"""The event.json files Tesla writes into SavedClips and SentryClips event folders, and an index over them."""
+import bisect
+import json
+import logging
+import os
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Set, Tuple, Union
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EVENT_JSON_FILE_NAME = 'event.json'
+# Tesla's files are a few hundred bytes, anything much larger isn't one.
+EVENT_JSON_MAX_BYTES = 64 * 1024
+
+
+class EventMetadata(NamedTuple):
+    """What the car recorded about a saved or Sentry event."""
+    timestamp: str
+    city: str
+    latitude: Union[float, None]
+    longitude: Union[float, None]
+    reason: str
+    camera: str
+
+
+def _parse_coordinate(value) -> Union[float, None]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_event_json(data: bytes) -> EventMetadata:
+    """
+    Parse an event.json file's contents.
+    Args:
+        data (bytes): The contents.
+    Returns:
+        EventMetadata: The event's metadata, fields the file doesn't have are empty or None.
+    Raises:
+        ValueError: If the contents aren't a JSON object.
+    """
+    event_info = json.loads(data)
+    if not isinstance(event_info, dict):
+        raise ValueError('event.json is not an object')
+    return EventMetadata(
+        timestamp=str(event_info.get('timestamp', '')),
+        city=str(event_info.get('city', '')),
+        # Tesla writes coordinates as strings.
+        latitude=_parse_coordinate(event_info.get('est_lat')),
+        longitude=_parse_coordinate(event_info.get('est_lon')),
+        reason=str(event_info.get('reason', '')),
+        camera=str(event_info.get('camera', '')))
+
+
+def read_event_json(fpath: Union[str, os.PathLike]) -> Union[EventMetadata, None]:
+    """
+    Read an event.json file, with a single bounded read.
+    Args:
+        fpath (str|PathLike): The file.
+    Returns:
+        EventMetadata|None: The event's metadata, None if the file can't be read or parsed.
+    """
+    try:
+        with open(fpath, 'rb') as f:
+            return parse_event_json(f.read(EVENT_JSON_MAX_BYTES))
+    except (OSError, ValueError) as e:
+        # json.JSONDecodeError and UnicodeDecodeError are ValueErrors.
+        logger.debug(f'Could not read {fpath}: {e}')
+        return None
+
+
+class EventMetadataIndex(object):
+    """Event folders' metadata keyed by the catalog's directory ids, indexed by reason, city and location.
+
+    Reasons and cities map to sets of directory ids. Locations are kept sorted by latitude once a bounding
+    box is queried, so a box is a bisect and a longitude check of the folders in its latitude band.
+    """
+    def __init__(self) -> None:
+        self._metadata: Dict[int, EventMetadata] = {}
+        self._dir_ids_by_reason: Dict[str, Set[int]] = defaultdict(set)
+        self._dir_ids_by_city: Dict[str, Set[int]] = defaultdict(set)
+        # Latitudes, directory ids and longitudes sorted by latitude, rebuilt when metadata was added.
+        self._by_latitude: Union[Tuple[array, array, array], None] = None
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    def add(self, dir_id: int, metadata: EventMetadata) -> None:
+        """
+        Index an event folder's metadata, replacing what was indexed for the folder before.
+        Args:
+            dir_id (int): The folder's catalog directory id.
+            metadata (EventMetadata): The folder's metadata.
+        """
+        previous = self._metadata.get(dir_id)
+        if previous == metadata:
+            return
+        if previous is not None:
+            self._dir_ids_by_reason[previous.reason].discard(dir_id)
+            self._dir_ids_by_city[previous.city].discard(dir_id)
+        self._metadata[dir_id] = metadata
+        self._dir_ids_by_reason[metadata.reason].add(dir_id)
+        self._dir_ids_by_city[metadata.city].add(dir_id)
+        self._by_latitude = None
+
+    def get(self, dir_id: int) -> Union[EventMetadata, None]:
+        """
+        Get an event folder's metadata.
+        Args:
+            dir_id (int): The folder's catalog directory id.
+        Returns:
+            EventMetadata|None: The metadata, None if the folder has no event.json.
+        """
+        return self._metadata.get(dir_id)
+
+    def reason_counts(self) -> Dict[str, int]:
+        """
+        Count the event folders per trigger reason.
+        Returns:
+            dict: The number of folders keyed by reason, most common first.
+        """
+        return self._counts(self._dir_ids_by_reason)
+
+    def city_counts(self) -> Dict[str, int]:
+        """
+        Count the event folders per city.
+        Returns:
+            dict: The number of folders keyed by city, most common first.
+        """
+        return self._counts(self._dir_ids_by_city)
+
+    def match(self, reasons: Union[Iterable[str], None] = None, cities: Union[Iterable[str], None] = None,
+              bounding_box: Union[Tuple[float, float, float, float], None] = None) -> Set[int]:
+        """
+        Find the event folders matching every given criterion.
+        Args:
+            reasons (iterable of str, optional): Only folders triggered for one of these reasons.
+            cities (iterable of str, optional): Only folders recorded in one of these cities.
+            bounding_box (tuple, optional): Only folders recorded within (min latitude, min longitude, max
+                latitude, max longitude).
+        Returns:
+            set of int: The folders' catalog directory ids.
+        """
+        matched = None
+        if reasons is not None:
+            matched = set().union(*(self._dir_ids_by_reason.get(reason, ()) for reason in reasons))
+        if cities is not None:
+            city_dir_ids = set().union(*(self._dir_ids_by_city.get(city, ()) for city in cities))
+            matched = city_dir_ids if matched is None else matched & city_dir_ids
+        if bounding_box is not None:
+            box_dir_ids = self._match_bounding_box(*bounding_box)
+            matched = box_dir_ids if matched is None else matched & box_dir_ids
+        return set(self._metadata) if matched is None else matched
+
+    def _match_bounding_box(self, min_latitude: float, min_longitude: float, max_latitude: float,
+                            max_longitude: float) -> Set[int]:
+        if self._by_latitude is None:
+            located = sorted((metadata.latitude, dir_id, metadata.longitude)
+                             for dir_id, metadata in self._metadata.items()
+                             if metadata.latitude is not None and metadata.longitude is not None)
+            self._by_latitude = (array('d', (latitude for latitude, _, _ in located)),
+                                 array('I', (dir_id for _, dir_id, _ in located)),
+                                 array('d', (longitude for _, _, longitude in located)))
+        latitudes, dir_ids, longitudes = self._by_latitude
+        first = bisect.bisect_left(latitudes, min_latitude)
+        last = bisect.bisect_right(latitudes, max_latitude)
+        return {dir_ids[i] for i in range(first, last) if min_longitude <= longitudes[i] <= max_longitude}
+
+    @staticmethod
+    def _counts(dir_ids_by_key: Dict[str, Set[int]]) -> Dict[str, int]:
+        counts = [(key, len(dir_ids)) for key, dir_ids in dir_ids_by_key.items() if dir_ids]
+        return dict(sorted(counts, key=lambda key_count: -key_count[1]))
@@ -0,0 +1,259 @@
+"""Time range and attribute queries over an EventCatalog, answered from sorted indexes."""
+import bisect
+import calendar
+import datetime
+import heapq
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple, Union
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.event_catalog import INTEGRITY_STATES, EventCatalog
+from file_utils.event_metadata import EventMetadata, EventMetadataIndex
+from file_utils.video_events import EVENT_CORRUPT
+
+# The folders Tesla sorts clips into, events in any other folder are from the 'Other' source.
+CLIP_SOURCES = ('RecentClips', 'SavedClips', 'SentryClips')
+OTHER_CLIP_SOURCE = 'Other'
+ALL_CAMERAS_MASK = (1 << len(TESLAS_CAMERA_NAMES)) - 1
+_CORRUPT_INTEGRITY = INTEGRITY_STATES.index(EVENT_CORRUPT)
+
+
+def clip_source(dir_path: str) -> str:
+    """
+    Get the Tesla folder a directory's clips come from, e.g. SentryClips for TeslaCam/SentryClips/<event>.
+    Args:
+        dir_path (str): The directory.
+    Returns:
+        str: One of CLIP_SOURCES, or OTHER_CLIP_SOURCE.
+    """
+    # The innermost matching folder wins, so a SavedClips copy of a whole TeslaCam folder is handled.
+    for part in reversed(dir_path.replace('\\', '/').split('/')):
+        if part in CLIP_SOURCES:
+            return part
+    return OTHER_CLIP_SOURCE
+
+
+def datetime_to_epoch(value: datetime.datetime) -> int:
+    """
+    Convert a naive datetime to seconds since the epoch the way the catalog stores clip timestamps.
+    Args:
+        value (datetime.datetime): The date and time, as shown by the car.
+    Returns:
+        int: The seconds since the epoch.
+    """
+    return calendar.timegm(value.timetuple())
+
+
+def epoch_to_datetime(epoch: int) -> datetime.datetime:
+    """
+    Convert seconds since the epoch back to a naive datetime, see datetime_to_epoch.
+    Args:
+        epoch (int): The seconds since the epoch.
+    Returns:
+        datetime.datetime: The date and time.
+    """
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).replace(tzinfo=None)
+
+
+class EventFilter(NamedTuple):
+    """The events to show, None fields don't filter. The event.json fields only match SavedClips and
+    SentryClips events whose folder has one."""
+    start: Union[datetime.datetime, None] = None
+    end: Union[datetime.datetime, None] = None
+    sources: Union[Tuple[str, ...], None] = None
+    all_cameras_only: bool = False
+    reasons: Union[Tuple[str, ...], None] = None
+    cities: Union[Tuple[str, ...], None] = None
+    # (min latitude, min longitude, max latitude, max longitude)
+    bounding_box: Union[Tuple[float, float, float, float], None] = None
+    # Hide events none of whose clips can be played.
+    hide_corrupt: bool = False
+
+    @property
+    def uses_event_metadata(self) -> bool:
+        """Whether the filter matches on event.json fields."""
+        return self.reasons is not None or self.cities is not None or self.bounding_box is not None
+
+
+class EventQueryIndex(object):
+    """Keeps an EventCatalog's rows sorted by time, split by clip source and camera completeness.
+
+    Each (source, has all cameras) bucket holds parallel sorted arrays of epochs and rows, so a range query
+    is two bisects per matching bucket and a merge of the slices. refresh() indexes the rows added to the
+    catalog since the previous refresh, rows added in time order are appended without sorting. Event folders'
+    event.json metadata is indexed separately by directory, see set_event_metadata.
+    """
+    def __init__(self, catalog: EventCatalog) -> None:
+        """
+        Args:
+            catalog (EventCatalog): The events.
+        """
+        self._catalog = catalog
+        self._buckets: Dict[Tuple[str, bool], Tuple[array, array]] = {}
+        self._sources_by_dir_id: List[str] = []
+        self._indexed_rows = 0
+        self._catalog_generation = catalog.generation
+        self.metadata_index = EventMetadataIndex()
+        self.refresh()
+
+    def set_event_metadata(self, dir_path: str, event_metadata: EventMetadata) -> None:
+        """
+        Index an event folder's event.json metadata, for all of the folder's events.
+        Args:
+            dir_path (str): The event folder.
+            event_metadata (EventMetadata): The folder's metadata.
+        """
+        self.metadata_index.add(self._catalog.intern_dir(dir_path), event_metadata)
+
+    def refresh(self) -> None:
+        """Index the rows added to the catalog, or rebuild if existing rows changed."""
+        catalog = self._catalog
+        if catalog.generation != self._catalog_generation:
+            # An event's cameras changed, which can move it to another bucket.
+            self._buckets = {}
+            self._indexed_rows = 0
+            self._catalog_generation = catalog.generation
+        epochs, dir_ids, camera_masks = catalog.columns('epochs', 'dir_ids', 'camera_masks')
+        dir_paths = catalog.dir_paths
+        while len(self._sources_by_dir_id) < len(dir_paths):
+            self._sources_by_dir_id.append(clip_source(dir_paths[len(self._sources_by_dir_id)]))
+        unsorted_buckets = set()
+        for row in range(self._indexed_rows, len(epochs)):
+            bucket_key = (self._sources_by_dir_id[dir_ids[row]], camera_masks[row] == ALL_CAMERAS_MASK)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = (array('q'), array('I'))
+            epoch = epochs[row]
+            if bucket[0] and epoch < bucket[0][-1]:
+                unsorted_buckets.add(bucket_key)
+            bucket[0].append(epoch)
+            bucket[1].append(row)
+        for bucket_key in unsorted_buckets:
+            bucket_epochs, bucket_rows = self._buckets[bucket_key]
+            pairs = sorted(zip(bucket_epochs, bucket_rows))
+            self._buckets[bucket_key] = (array('q', (epoch for epoch, _ in pairs)),
+                                         array('I', (row for _, row in pairs)))
+        self._indexed_rows = len(epochs)
+
+    def query(self, start_epoch: Union[int, None] = None, end_epoch: Union[int, None] = None,
+              sources: Union[Iterable[str], None] = None, all_cameras_only: bool = False) -> List[int]:
+        """
+        Find the events recorded in a time range.
+        Args:
+            start_epoch (int, optional): The range's start, inclusive. Defaults to the first event.
+            end_epoch (int, optional): The range's end, exclusive. Defaults to after the last event.
+            sources (iterable of str, optional): Only events from these CLIP_SOURCES or OTHER_CLIP_SOURCE.
+            all_cameras_only (bool): Only events which have every camera's clip.
+        Returns:
+            list of int: The events' catalog rows, in time order.
+        """
+        self.refresh()
+        sources = set(sources) if sources is not None else None
+        slices = []
+        for (source, has_all_cameras), (bucket_epochs, bucket_rows) in self._buckets.items():
+            if sources is not None and source not in sources:
+                continue
+            if all_cameras_only and not has_all_cameras:
+                continue
+            first = 0 if start_epoch is None else bisect.bisect_left(bucket_epochs, start_epoch)
+            last = len(bucket_epochs) if end_epoch is None else bisect.bisect_left(bucket_epochs, end_epoch)
+            if first < last:
+                slices.append((bucket_epochs[first:last], bucket_rows[first:last]))
+        if not slices:
+            return []
+        if len(slices) == 1:
+            return slices[0][1].tolist()
+        return [row for _, row in heapq.merge(*(zip(*bucket_slice) for bucket_slice in slices))]
+
+    def filter_rows(self, event_filter: EventFilter) -> List[int]:
+        """
+        Find the events an EventFilter matches.
+        Args:
+            event_filter (EventFilter): The filter.
+        Returns:
+            list of int: The events' catalog rows, in time order.
+        """
+        rows = self.query(
+            start_epoch=datetime_to_epoch(event_filter.start) if event_filter.start is not None else None,
+            end_epoch=datetime_to_epoch(event_filter.end) if event_filter.end is not None else None,
+            sources=event_filter.sources,
+            all_cameras_only=event_filter.all_cameras_only)
+        if event_filter.hide_corrupt:
+            integrity = self._catalog.columns('integrity')[0]
+            rows = [row for row in rows if integrity[row] != _CORRUPT_INTEGRITY]
+        if not event_filter.uses_event_metadata:
+            return rows
+        dir_ids = self._catalog.columns('dir_ids')[0]
+        matched_dir_ids = self._match_event_metadata(event_filter)
+        return [row for row in rows if dir_ids[row] in matched_dir_ids]
+
+    def matches(self, row: int, event_filter: EventFilter) -> bool:
+        """
+        Whether one event matches an EventFilter, without querying, e.g. for events added since filtering.
+        Args:
+            row (int): The event's catalog row.
+            event_filter (EventFilter): The filter.
+        Returns:
+            bool: True if the event matches.
+        """
+        epochs, dir_ids, camera_masks = self._catalog.columns('epochs', 'dir_ids', 'camera_masks')
+        epoch = epochs[row]
+        if event_filter.start is not None and epoch < datetime_to_epoch(event_filter.start):
+            return False
+        if event_filter.end is not None and epoch >= datetime_to_epoch(event_filter.end):
+            return False
+        if event_filter.all_cameras_only and camera_masks[row] != ALL_CAMERAS_MASK:
+            return False
+        if event_filter.hide_corrupt and self._catalog.columns('integrity')[0][row] == _CORRUPT_INTEGRITY:
+            return False
+        if event_filter.sources is not None:
+            if clip_source(self._catalog.dir_paths[dir_ids[row]]) not in event_filter.sources:
+                return False
+        if event_filter.uses_event_metadata:
+            return self._event_metadata_matches(self.metadata_index.get(dir_ids[row]), event_filter)
+        return True
+
+    @staticmethod
+    def _event_metadata_matches(event_metadata: Union[EventMetadata, None], event_filter: EventFilter) -> bool:
+        if event_metadata is None:
+            return False
+        if event_filter.reasons is not None and event_metadata.reason not in event_filter.reasons:
+            return False
+        if event_filter.cities is not None and event_metadata.city not in event_filter.cities:
+            return False
+        if event_filter.bounding_box is not None:
+            if event_metadata.latitude is None or event_metadata.longitude is None:
+                return False
+            min_latitude, min_longitude, max_latitude, max_longitude = event_filter.bounding_box
+            return (min_latitude <= event_metadata.latitude <= max_latitude and
+                    min_longitude <= event_metadata.longitude <= max_longitude)
+        return True
+
+    def _match_event_metadata(self, event_filter: EventFilter) -> Set[int]:
+        return self.metadata_index.match(reasons=event_filter.reasons, cities=event_filter.cities,
+                                         bounding_box=event_filter.bounding_box)
+
+    def time_range(self) -> Union[Tuple[datetime.datetime, datetime.datetime], None]:
+        """
+        Get the time of the first and last indexed events.
+        Returns:
+            tuple|None: The first and last event's naive datetimes, None if there are no events.
+        """
+        self.refresh()
+        bucket_epochs = [epochs for epochs, _ in self._buckets.values() if epochs]
+        if not bucket_epochs:
+            return None
+        return (epoch_to_datetime(min(epochs[0] for epochs in bucket_epochs)),
+                epoch_to_datetime(max(epochs[-1] for epochs in bucket_epochs)))
+
+    def source_counts(self) -> Dict[str, int]:
+        """
+        Count the indexed events per clip source.
+        Returns:
+            dict: The number of events keyed by source.
+        """
+        self.refresh()
+        counts = {}
+        for (source, _), (bucket_epochs, _) in self._buckets.items():
+            counts[source] = counts.get(source, 0) + len(bucket_epochs)
+        return counts
@@ -0,0 +1,410 @@
+"""A small MP4 (ISO base media file) box parser which only reads the moov box."""
+import bisect
+import functools
+import logging
+import mmap
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Tuple, Union
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Mp4ParseError(ValueError):
+    """Raised when a file isn't a readable MP4."""
+
+
+class VideoTrackTables(NamedTuple):
+    """The sample tables of an MP4's video track."""
+    timescale: int
+    duration: int
+    sample_times: List[int]
+    sync_samples: List[int]
+    # The samples' composition offsets (ctts), empty without a ctts box.
+    composition_offsets: List[int]
+    # The frames' presentation times in milliseconds, sorted, see frame_times_from_tables.
+    frame_times_ms: List[int]
+
+    @property
+    def keyframe_times_ms(self) -> List[int]:
+        """The presentation times of the keyframes (sync samples) in milliseconds, sorted and on the same
+        timeline as frame_times_ms."""
+        if not self.sync_samples:
+            # Without an stss box every sample is a sync sample.
+            return self.frame_times_ms
+        sample_count = len(self.sample_times)
+        return frame_times_from_tables(self.sample_times, self.composition_offsets, self.timescale,
+                                       [sample_number - 1 for sample_number in self.sync_samples
+                                        if 0 < sample_number <= sample_count])
+
+
+class Mp4Metadata(NamedTuple):
+    """An MP4's duration and video track properties."""
+    duration_ms: int
+    width: int
+    height: int
+    codec: str
+    frame_count: int
+
+
+def iter_boxes(buffer: Union[mmap.mmap, bytes], start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Iterate over the boxes laid out between start and end.
+    Args:
+        buffer (mmap|bytes): The file's contents.
+        start (int): The offset of the first box.
+        end (int): The offset the boxes end at.
+    Yields:
+        tuple: The box type, the offset of its payload and the offset it ends at.
+    """
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', buffer, offset)
+        header_size = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise Mp4ParseError(f'Truncated box header at {offset}')
+            size = struct.unpack_from('>Q', buffer, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise Mp4ParseError(f'Box {box_type!r} at {offset} has an invalid size {size}')
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def find_box(buffer: Union[mmap.mmap, bytes], start: int, end: int, box_type: bytes) -> Union[Tuple[int, int], None]:
+    """
+    Find the first box of a type between start and end.
+    Returns:
+        tuple|None: The offset of the box's payload and the offset it ends at, or None.
+    """
+    for found_type, payload_start, box_end in iter_boxes(buffer, start, end):
+        if found_type == box_type:
+            return payload_start, box_end
+    return None
+
+
+def _read_full_box_entries(buffer, payload_start: int, entry_format: str) -> Iterator[tuple]:
+    # Full boxes start with a version byte and 3 flag bytes, sample tables then have an entry count.
+    entry_count = struct.unpack_from('>I', buffer, payload_start + 4)[0]
+    return struct.iter_unpack(entry_format, buffer[payload_start + 8:payload_start + 8 +
+                                                   entry_count * struct.calcsize(entry_format)])
+
+
+def _parse_mdhd(buffer, payload_start: int) -> Tuple[int, int]:
+    version = buffer[payload_start]
+    if version == 1:
+        return struct.unpack_from('>IQ', buffer, payload_start + 20)
+    return struct.unpack_from('>II', buffer, payload_start + 12)
+
+
+def _sample_times_from_stts(stts_entries) -> List[int]:
+    sample_times = []
+    current_time = 0
+    for sample_count, sample_delta in stts_entries:
+        for _ in range(sample_count):
+            sample_times.append(current_time)
+            current_time += sample_delta
+    return sample_times
+
+
+def frame_times_from_tables(sample_times: List[int], composition_offsets: List[int], timescale: int,
+                            sample_indexes: Union[List[int], None] = None) -> List[int]:
+    """
+    Work out the frames' presentation times from their decode times (stts) and composition offsets (ctts).
+    Args:
+        sample_times (list of int): The samples' decode times in timescale units.
+        composition_offsets (list of int): The samples' composition offsets, empty without a ctts box.
+        timescale (int): The track's units per second.
+        sample_indexes (list of int, optional): Only return the times of these samples, e.g. the keyframes.
+            Defaults to every sample.
+    Returns:
+        list of int: The presentation times in milliseconds, sorted. Every sample's times are shifted so the
+            first frame is at 0. Times are rounded up, so seeking to one shows that frame rather than the one
+            before it.
+    """
+    if composition_offsets:
+        presentation_times = [sample_time + offset for sample_time, offset in zip(sample_times, composition_offsets)]
+    else:
+        presentation_times = sample_times
+    if not presentation_times:
+        return []
+    # The edit list usually shifts the first frame to 0, reordered streams start at a positive offset.
+    first_time = min(presentation_times)
+    if sample_indexes is not None:
+        presentation_times = [presentation_times[index] for index in sample_indexes]
+    return sorted(-(-(presentation_time - first_time) * 1000 // timescale) for presentation_time in presentation_times)
+
+
+def find_moov(buffer: Union[mmap.mmap, bytes]) -> Tuple[int, int]:
+    """
+    Find the top level moov box, only box headers are read so mdat's contents are never touched.
+    Returns:
+        tuple: The offset of the moov box's payload and the offset it ends at.
+    """
+    moov = find_box(buffer, 0, len(buffer), b'moov')
+    if moov is None:
+        raise Mp4ParseError('No moov box')
+    return moov
+
+
+def find_video_track(buffer: Union[mmap.mmap, bytes]) -> Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]:
+    """
+    Find the first video track of an MP4.
+    Args:
+        buffer (mmap|bytes): The file's contents, or just its moov box.
+    Returns:
+        tuple: The (payload offset, end offset) of the track's trak, mdia and stbl boxes.
+    """
+    moov_start, moov_end = find_moov(buffer)
+    for box_type, trak_start, trak_end in iter_boxes(buffer, moov_start, moov_end):
+        if box_type != b'trak':
+            continue
+        mdia = find_box(buffer, trak_start, trak_end, b'mdia')
+        if mdia is None:
+            continue
+        hdlr = find_box(buffer, mdia[0], mdia[1], b'hdlr')
+        if hdlr is None or buffer[hdlr[0] + 8:hdlr[0] + 12] != b'vide':
+            continue
+        minf = find_box(buffer, mdia[0], mdia[1], b'minf')
+        stbl = find_box(buffer, minf[0], minf[1], b'stbl') if minf else None
+        if stbl is None:
+            raise Mp4ParseError('Video track without stbl')
+        return (trak_start, trak_end), mdia, stbl
+    raise Mp4ParseError('No video track')
+
+
+def parse_video_track_tables(buffer: Union[mmap.mmap, bytes]) -> VideoTrackTables:
+    """
+    Parse the sample tables of the first video track of an MP4.
+    Args:
+        buffer (mmap|bytes): The file's contents, or just its moov box.
+    Returns:
+        VideoTrackTables: The video track's sample tables.
+    """
+    _, mdia, stbl = find_video_track(buffer)
+    mdhd = find_box(buffer, mdia[0], mdia[1], b'mdhd')
+    if mdhd is None:
+        raise Mp4ParseError('Video track without mdhd')
+    timescale, duration = _parse_mdhd(buffer, mdhd[0])
+    stts = find_box(buffer, stbl[0], stbl[1], b'stts')
+    stss = find_box(buffer, stbl[0], stbl[1], b'stss')
+    ctts = find_box(buffer, stbl[0], stbl[1], b'ctts')
+    sample_times = _sample_times_from_stts(_read_full_box_entries(buffer, stts[0], '>II')) if stts else []
+    sync_samples = [entry[0] for entry in _read_full_box_entries(buffer, stss[0], '>I')] if stss else []
+    composition_offsets = []
+    if ctts is not None:
+        # Version 1 offsets are signed, version 0 offsets fit a signed int in practice.
+        for sample_count, sample_offset in _read_full_box_entries(buffer, ctts[0], '>Ii'):
+            composition_offsets.extend([sample_offset] * sample_count)
+    timescale = timescale or 1
+    return VideoTrackTables(timescale, duration, sample_times, sync_samples, composition_offsets,
+                            frame_times_from_tables(sample_times, composition_offsets, timescale))
+
+
+def parse_mp4_metadata(buffer: Union[mmap.mmap, bytes]) -> Mp4Metadata:
+    """
+    Parse an MP4's duration from mvhd, and its video track's size from tkhd, codec from stsd and frame
+    count from stts.
+    Args:
+        buffer (mmap|bytes): The file's contents, or just its moov box.
+    Returns:
+        Mp4Metadata: The metadata.
+    """
+    moov_start, moov_end = find_moov(buffer)
+    mvhd = find_box(buffer, moov_start, moov_end, b'mvhd')
+    if mvhd is None:
+        raise Mp4ParseError('No mvhd box')
+    # mvhd and mdhd share the layout of their timescale and duration fields.
+    timescale, duration = _parse_mdhd(buffer, mvhd[0])
+    trak, _, stbl = find_video_track(buffer)
+    width = height = 0
+    tkhd = find_box(buffer, trak[0], trak[1], b'tkhd')
+    if tkhd is not None:
+        # Width and height are the last two fields, 16.16 fixed point numbers.
+        width, height = (value >> 16 for value in struct.unpack_from('>II', buffer, tkhd[1] - 8))
+    codec = ''
+    stsd = find_box(buffer, stbl[0], stbl[1], b'stsd')
+    if stsd is not None and stsd[1] - stsd[0] >= 16:
+        codec = bytes(buffer[stsd[0] + 12:stsd[0] + 16]).decode('ascii', 'replace')
+    frame_count = 0
+    stts = find_box(buffer, stbl[0], stbl[1], b'stts')
+    if stts is not None:
+        frame_count = sum(sample_count for sample_count, _ in _read_full_box_entries(buffer, stts[0], '>II'))
+    return Mp4Metadata(duration * 1000 // (timescale or 1), width, height, codec, frame_count)
+
+
+def _read_at(fd: int, size: int, offset: int) -> bytes:
+    # os.pread is Unix only. The seek is safe elsewhere as every reader opens its own file descriptor.
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    chunks = []
+    while size > 0:
+        chunk = os.read(fd, size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _iter_top_level_boxes(fd: int, file_size: int) -> Iterator[Tuple[bytes, int, int]]:
+    # Only each box's header is read, with a small positioned read, so a 30 MB mdat costs one read.
+    offset = 0
+    while offset + 8 <= file_size:
+        header = _read_at(fd, 16, offset)
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                raise Mp4ParseError(f'Truncated box header at {offset}')
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size or offset + size > file_size:
+            raise Mp4ParseError(f'Box {box_type!r} at {offset} has an invalid size {size}')
+        yield box_type, offset, size
+        offset += size
+
+
+def read_moov_box(fpath: Union[Path, str]) -> bytes:
+    """
+    Read just the moov box of an MP4 with small positioned reads, skipping over every other top level box.
+    Args:
+        fpath (Path|str): The MP4 file.
+    Returns:
+        bytes: The moov box, header included, so it can be parsed like a whole file.
+    """
+    fd = os.open(fpath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        for box_type, offset, size in _iter_top_level_boxes(fd, os.fstat(fd).st_size):
+            if box_type == b'moov':
+                return _read_at(fd, size, offset)
+    finally:
+        os.close(fd)
+    raise Mp4ParseError('No moov box')
+
+
+def check_mp4_structure(fpath: Union[Path, str]) -> Union[str, None]:
+    """
+    Check that an MP4 was completely written, reading only its top level box headers: an ftyp box first, a
+    moov box, and a non empty mdat box, all within the file. The car leaves empty files, or files whose mdat
+    runs past the end and which have no moov, when its power is cut while recording.
+    Args:
+        fpath (Path|str): The MP4 file.
+    Returns:
+        str|None: What is wrong with the file, None if its structure is sound.
+    """
+    try:
+        fd = os.open(fpath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError as e:
+        return f'Unreadable: {e.strerror}'
+    try:
+        file_size = os.fstat(fd).st_size
+        if file_size == 0:
+            return 'Empty file'
+        box_types = []
+        for box_type, _, size in _iter_top_level_boxes(fd, file_size):
+            if not box_types and box_type != b'ftyp':
+                return 'No ftyp box'
+            if box_type == b'mdat' and size <= 16:
+                return 'Empty mdat box'
+            box_types.append(box_type)
+    except (OSError, Mp4ParseError) as e:
+        return str(e)
+    finally:
+        os.close(fd)
+    for box_type in (b'ftyp', b'moov', b'mdat'):
+        if box_type not in box_types:
+            return f'No {box_type.decode()} box'
+    return None
+
+
+def probe_mp4_files(fpaths: List[Union[Path, str]], max_workers: int = 8) -> Dict[str, Union[Mp4Metadata, None]]:
+    """
+    Read the metadata of many MP4s in parallel. Only each file's box headers and moov box are read, and
+    the reads release the GIL so slow drives are read by several threads at once.
+    Args:
+        fpaths (list of Path|str): The MP4 files.
+        max_workers (int): The number of files read at once.
+    Returns:
+        dict: The metadata keyed by file path, None for files which couldn't be read.
+    """
+    def probe(fpath: str) -> Union[Mp4Metadata, None]:
+        try:
+            return parse_mp4_metadata(read_moov_box(fpath))
+        except (OSError, Mp4ParseError, struct.error) as e:
+            logger.debug(f'Could not read the metadata of {fpath}: {e}')
+            return None
+
+    fpaths = [os.fspath(fpath) for fpath in fpaths]
+    if len(fpaths) < 2 or max_workers < 2:
+        return {fpath: probe(fpath) for fpath in fpaths}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(fpaths, executor.map(probe, fpaths)))
+
+
+@functools.lru_cache(maxsize=256)
+def _read_video_track_tables(fpath: str, size: int, mtime_ns: int) -> VideoTrackTables:
+    # size and mtime_ns are part of the cache key so a changed file is parsed again.
+    with open(fpath, 'rb') as f:
+        if size == 0:
+            raise Mp4ParseError('Empty file')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            try:
+                return parse_video_track_tables(buffer)
+            except struct.error as e:
+                raise Mp4ParseError(f'Truncated box: {e}') from e
+
+
+def read_video_track_tables(fpath: Union[Path, str]) -> VideoTrackTables:
+    """
+    Read the sample tables of an MP4's video track, cached per file.
+    Args:
+        fpath (Path|str): The MP4 file.
+    Returns:
+        VideoTrackTables: The video track's sample tables.
+    """
+    fpath = os.fspath(fpath)
+    stat = os.stat(fpath)
+    return _read_video_track_tables(fpath, stat.st_size, stat.st_mtime_ns)
+
+
+def nearest_keyframe_time(keyframe_times_ms: List[int], position: int) -> int:
+    """
+    Snap a position to the nearest keyframe.
+    Args:
+        keyframe_times_ms (list of int): Sorted keyframe times in milliseconds.
+        position (int): The position in milliseconds.
+    Returns:
+        int: The nearest keyframe time, or position if there are no keyframes.
+    """
+    if not keyframe_times_ms:
+        return position
+    index = bisect.bisect_left(keyframe_times_ms, position)
+    candidates = keyframe_times_ms[max(index - 1, 0):index + 1]
+    return min(candidates, key=lambda keyframe_time: abs(keyframe_time - position))
+
+
+def step_frame_time(frame_times_ms: List[int], position: int, steps: int) -> int:
+    """
+    Find the time of the frame a number of frames before or after the one shown at a position.
+    Args:
+        frame_times_ms (list of int): Sorted frame presentation times in milliseconds.
+        position (int): The position in milliseconds.
+        steps (int): The number of frames to step, negative to step back.
+    Returns:
+        int: The frame's time, clamped to the first and last frames, or position if there are no frames.
+    """
+    if not frame_times_ms:
+        return position
+    # The frame shown at a position is the last one which starts at or before it.
+    index = max(bisect.bisect_right(frame_times_ms, position) - 1, 0)
+    return frame_times_ms[min(max(index + steps, 0), len(frame_times_ms) - 1)]
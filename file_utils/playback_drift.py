@@ -0,0 +1,42 @@
+"""How a follower camera's drift from the master clock is corrected, kept free of Qt so it can be tested alone."""
+from typing import NamedTuple
+
+# What a drift sample calls for.
+WITHIN_TOLERANCE = 'within_tolerance'
+RATE_CORRECTION = 'rate_correction'
+RESYNC = 'resync'
+
+
+class DriftCorrection(NamedTuple):
+    """The correction for a follower's drift."""
+    # One of WITHIN_TOLERANCE, RATE_CORRECTION or RESYNC. A resync seeks the follower to the master's position.
+    kind: str
+    # The rate the follower should play at.
+    rate: float
+
+
+def correct_drift(drift_ms: int, master_rate: float, tolerance_ms: int, resync_threshold_ms: int,
+                  max_rate_adjustment: float, correction_ms: int) -> DriftCorrection:
+    """
+    Decide how to correct a follower's drift from the master.
+
+    Positions are media time, so at rates above 1x the tolerance and resync threshold are scaled with the rate:
+    at 4x a follower lagging by a frame's wall time is four frames behind.
+    Args:
+        drift_ms (int): The follower's position minus the master's, positive when the follower is ahead.
+        master_rate (float): The master's playback rate.
+        tolerance_ms (int): Drift which is left alone.
+        resync_threshold_ms (int): Drift which is corrected with a seek.
+        max_rate_adjustment (float): The largest change to the follower's rate, as a fraction of the master's.
+        correction_ms (int): The rate is adjusted to make up the drift over this long, up to max_rate_adjustment.
+    Returns:
+        DriftCorrection: The correction.
+    """
+    rate_scale = max(master_rate, 1.0)
+    abs_drift_ms = abs(drift_ms)
+    if abs_drift_ms <= tolerance_ms * rate_scale:
+        return DriftCorrection(WITHIN_TOLERANCE, master_rate)
+    if abs_drift_ms >= resync_threshold_ms * rate_scale:
+        return DriftCorrection(RESYNC, master_rate)
+    adjustment = max(-max_rate_adjustment, min(max_rate_adjustment, drift_ms / (correction_ms * rate_scale)))
+    return DriftCorrection(RATE_CORRECTION, master_rate * (1 - adjustment))
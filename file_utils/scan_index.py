@@ -0,0 +1,224 @@
+"""An on-disk index of scanned directories so unchanged TeslaCam drives don't have to be walked again."""
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from constants import SCAN_INDEX_FILE_NAME
+from file_utils.app_paths import get_app_data_dir
+from file_utils.event_metadata import EVENT_JSON_FILE_NAME
+from file_utils.mp4_boxes import check_mp4_structure
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# FAT32/exFAT, which Tesla USB drives use, store modification times with a 2 second resolution. A directory
+# modified within this many seconds of being indexed may have changed again without its mtime changing.
+MTIME_RESOLUTION_NS = 2 * 1_000_000_000
+# Bumped when what list_directory returns changes, indexes of an older version are emptied.
+SCAN_INDEX_VERSION = 1
+
+
+def list_directory(dir_path: str) -> Tuple[List[str], List[str]]:
+    """
+    List a directory's subdirectories and mp4 file names in a single pass.
+    Args:
+        dir_path (str): The directory to list.
+    Returns:
+        tuple: The subdirectory names and the mp4 file names, plus event.json if the directory has one.
+    """
+    sub_dir_names = []
+    video_file_names = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    sub_dir_names.append(entry.name)
+                    continue
+            except OSError:
+                continue
+            if entry.name.endswith('.mp4') or entry.name == EVENT_JSON_FILE_NAME:
+                video_file_names.append(entry.name)
+    return sub_dir_names, video_file_names
+
+
+class ScanIndex(object):
+    """A SQLite backed cache of directory listings keyed by directory path and modification time.
+
+    A directory's mtime changes whenever an entry directly inside it is added, removed or renamed, so a
+    directory whose mtime matches the indexed one can be listed from the index instead of the disk. Only
+    the directories which changed since the previous scan are read with scandir.
+
+    The outcome of checking each clip's box structure is kept too, keyed by the clip's size and mtime, so an
+    unchanged clip costs a stat rather than opening it and reading its box headers again.
+    """
+    def __init__(self, db_path: Union[Path, str, None] = None) -> None:
+        """
+        Args:
+            db_path (Path|str, optional): The SQLite file, defaults to a file in the app's data directory.
+        """
+        if db_path is None:
+            db_path = get_app_data_dir() / SCAN_INDEX_FILE_NAME
+        self._db_path = db_path
+        self._connection = sqlite3.connect(os.fspath(db_path))
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS directories ('
+            'path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, indexed_at_ns INTEGER NOT NULL, '
+            'sub_dirs TEXT NOT NULL, video_files TEXT NOT NULL)')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS clip_checks ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, problem TEXT)')
+        if self._connection.execute('PRAGMA user_version').fetchone()[0] < SCAN_INDEX_VERSION:
+            # Older listings lack event.json files.
+            self._connection.execute('DELETE FROM directories')
+            self._connection.execute(f'PRAGMA user_version = {SCAN_INDEX_VERSION}')
+        self._connection.commit()
+        self._cache = {}
+        self._visited = set()
+        self._pending_writes = []
+        # (size, mtime_ns, problem) keyed by clip path. check_clip runs on worker threads, which only read
+        # this dict and append to the pending list.
+        self._clip_checks = {}
+        self._checked_clips = set()
+        self._unchanged_dirs = set()
+        self._pending_clip_checks = []
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def db_path(self) -> Union[Path, str]:
+        """The path of the SQLite file backing the index.
+        Returns:
+            Path|str: The file path.
+        """
+        return self._db_path
+
+    def load(self, root_path: Union[Path, str]) -> None:
+        """
+        Load every indexed directory under root_path into memory with a single query.
+        Args:
+            root_path (Path|str): The root directory about to be scanned.
+        """
+        root_path = os.fspath(root_path)
+        low, high = self._subtree_bounds(root_path)
+        rows = self._connection.execute(
+            'SELECT path, mtime_ns, indexed_at_ns, sub_dirs, video_files FROM directories '
+            'WHERE path = ? OR (path >= ? AND path < ?)', (root_path, low, high))
+        for path, mtime_ns, indexed_at_ns, sub_dirs, video_files in rows:
+            self._cache[path] = (mtime_ns, indexed_at_ns, sub_dirs, video_files)
+        rows = self._connection.execute(
+            'SELECT path, size, mtime_ns, problem FROM clip_checks WHERE path >= ? AND path < ?', (low, high))
+        for path, size, mtime_ns, problem in rows:
+            self._clip_checks[path] = (size, mtime_ns, problem)
+        self._visited.clear()
+        self._checked_clips.clear()
+        self._unchanged_dirs.clear()
+
+    def list_directory(self, dir_path: str) -> Tuple[List[str], List[str]]:
+        """
+        List a directory's subdirectories and mp4 file names, from the index when the directory is unchanged.
+        Args:
+            dir_path (str): The directory to list.
+        Returns:
+            tuple: The subdirectory names and the mp4 file names.
+        """
+        self._visited.add(dir_path)
+        mtime_ns = os.stat(dir_path).st_mtime_ns
+        cached = self._cache.get(dir_path)
+        if cached is not None:
+            cached_mtime_ns, indexed_at_ns, sub_dirs, video_files = cached
+            if cached_mtime_ns == mtime_ns and indexed_at_ns - mtime_ns > MTIME_RESOLUTION_NS:
+                self.hits += 1
+                self._unchanged_dirs.add(dir_path)
+                return self._split(sub_dirs), self._split(video_files)
+        self.misses += 1
+        sub_dir_names, video_file_names = list_directory(dir_path)
+        row = (mtime_ns, time.time_ns(), '\n'.join(sub_dir_names), '\n'.join(video_file_names))
+        self._cache[dir_path] = row
+        self._pending_writes.append((dir_path,) + row)
+        return sub_dir_names, video_file_names
+
+    def check_clip(self, fpath: str) -> Union[str, None]:
+        """
+        Check a clip's box structure, see check_mp4_structure, reusing the previous outcome when the clip's
+        size and mtime are unchanged. A sound clip in a directory listed from the index isn't even stat'ed:
+        the car never rewrites a finished clip, and a new file would have changed the directory's mtime. Safe
+        to call from several worker threads at once.
+        Args:
+            fpath (str): The clip.
+        Returns:
+            str|None: What is wrong with the clip, None if its structure is sound.
+        """
+        self._checked_clips.add(fpath)
+        cached = self._clip_checks.get(fpath)
+        if cached is not None and cached[2] is None and os.path.dirname(fpath) in self._unchanged_dirs:
+            return None
+        try:
+            stat_result = os.stat(fpath)
+        except OSError:
+            return check_mp4_structure(fpath)
+        key = (stat_result.st_size, stat_result.st_mtime_ns)
+        if cached is not None and cached[:2] == key:
+            return cached[2]
+        problem = check_mp4_structure(fpath)
+        # A clip still being written changes size, so its next check reads it again.
+        self._clip_checks[fpath] = key + (problem,)
+        self._pending_clip_checks.append((fpath,) + key + (problem,))
+        return problem
+
+    def commit(self, root_path: Union[Path, str, None] = None) -> None:
+        """
+        Write the directories listed from disk to the index.
+        Args:
+            root_path (Path|str, optional): When given, indexed directories under root_path which were not
+                visited since load() are deleted. Only pass it after a scan which walked the whole tree.
+        """
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO directories (path, mtime_ns, indexed_at_ns, sub_dirs, video_files) '
+                'VALUES (?, ?, ?, ?, ?)', self._pending_writes)
+            if root_path is not None:
+                root_path = os.fspath(root_path)
+                prefix = self._subtree_prefix(root_path)
+                stale_paths = [(path,) for path in self._cache if path not in self._visited and
+                               (path == root_path or path.startswith(prefix))]
+                self._connection.executemany('DELETE FROM directories WHERE path = ?', stale_paths)
+                for (path,) in stale_paths:
+                    del self._cache[path]
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO clip_checks (path, size, mtime_ns, problem) VALUES (?, ?, ?, ?)',
+                self._pending_clip_checks)
+            if root_path is not None and self._checked_clips:
+                # RecentClips drops old clips every hour, forget the ones which are gone.
+                stale_clips = [(path,) for path in self._clip_checks if path not in self._checked_clips and
+                               path.startswith(self._subtree_prefix(root_path))]
+                self._connection.executemany('DELETE FROM clip_checks WHERE path = ?', stale_clips)
+                for (path,) in stale_clips:
+                    del self._clip_checks[path]
+        logger.info(f'Scan index: {self.hits} directories unchanged, {self.misses} read from disk.')
+        self._pending_writes = []
+        self._pending_clip_checks = []
+
+    def close(self) -> None:
+        """Close the index's database connection."""
+        self._connection.close()
+
+    @staticmethod
+    def _split(names: str) -> List[str]:
+        return names.split('\n') if names else []
+
+    @staticmethod
+    def _subtree_prefix(root_path: str) -> str:
+        # How the walk spells root_path's children, whether or not it ends with a separator, e.g. a drive root
+        # like E:/ or /. The root isn't normalized as the walk joins onto it as given.
+        return os.path.join(root_path, '')
+
+    @classmethod
+    def _subtree_bounds(cls, root_path: str) -> Tuple[str, str]:
+        # Every path below root_path sorts between these two strings.
+        prefix = cls._subtree_prefix(root_path)
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
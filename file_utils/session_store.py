@@ -0,0 +1,134 @@
+"""An on-disk copy of the event list, with its likes and folder tags, so the app reopens where it was left."""
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Tuple, Union
+
+from constants import SESSION_STORE_FILE_NAME
+from file_utils.app_paths import get_app_data_dir
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StoredEvent(NamedTuple):
+    """A listed event as it was stored."""
+    dir_path: str
+    timestamp: str
+    video_file_names: List[str]
+    is_liked: bool
+    folder_tag: str
+
+
+class SessionStore(object):
+    """A SQLite backed record of the scanned roots and the listed events, in the order they were listed.
+
+    Every change is written as it happens, events a batch at a time, so nothing is lost if the app is
+    killed. Events are stored by directory and file names, restoring them reads the database only and never
+    the drives the clips are on.
+    """
+    def __init__(self, db_path: Union[Path, str, None] = None) -> None:
+        """
+        Args:
+            db_path (Path|str, optional): The SQLite file, defaults to a file in the app's data directory.
+        """
+        if db_path is None:
+            db_path = get_app_data_dir() / SESSION_STORE_FILE_NAME
+        self._db_path = db_path
+        self._connection = sqlite3.connect(os.fspath(db_path))
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, added_at_ns INTEGER NOT NULL)')
+            # The rowid keeps the listing order, upserts keep an event's rowid.
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'dir_path TEXT NOT NULL, timestamp TEXT NOT NULL, video_files TEXT NOT NULL, '
+                "is_liked INTEGER NOT NULL DEFAULT 0, folder_tag TEXT NOT NULL DEFAULT '', "
+                'UNIQUE (dir_path, timestamp))')
+
+    @property
+    def db_path(self) -> Union[Path, str]:
+        """The path of the SQLite file backing the store.
+        Returns:
+            Path|str: The file path.
+        """
+        return self._db_path
+
+    def add_root(self, root_path: str) -> None:
+        """
+        Record a scanned directory.
+        Args:
+            root_path (str): The directory.
+        """
+        with self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO roots (path, added_at_ns) VALUES (?, ?)',
+                                     (root_path, time.time_ns()))
+
+    def roots(self) -> List[str]:
+        """
+        Get the scanned directories.
+        Returns:
+            list of str: The directories, oldest scan first.
+        """
+        return [path for path, in self._connection.execute('SELECT path FROM roots ORDER BY added_at_ns')]
+
+    def add_events(self, events: Iterable[Tuple[str, str, List[str]]]) -> None:
+        """
+        Record listed events in one transaction, events which are already stored get the new video files and
+        keep their place, like and folder tag.
+        Args:
+            events (iterable of tuple): (directory, timestamp, video file names) per event.
+        """
+        with self._connection:
+            self._connection.executemany(
+                'INSERT INTO events (dir_path, timestamp, video_files) VALUES (?, ?, ?) '
+                'ON CONFLICT (dir_path, timestamp) DO UPDATE SET video_files = excluded.video_files',
+                ((dir_path, timestamp, '\n'.join(file_names)) for dir_path, timestamp, file_names in events))
+
+    def set_liked(self, event_key: Tuple[str, str], is_liked: bool) -> None:
+        """
+        Record an event being liked or unliked.
+        Args:
+            event_key (tuple): The event's (directory, timestamp).
+            is_liked (bool): Whether it is liked.
+        """
+        with self._connection:
+            self._connection.execute('UPDATE events SET is_liked = ? WHERE dir_path = ? AND timestamp = ?',
+                                     (int(is_liked), *event_key))
+
+    def set_folder_tag(self, event_key: Tuple[str, str], folder_tag: str) -> None:
+        """
+        Record an event's folder tag.
+        Args:
+            event_key (tuple): The event's (directory, timestamp).
+            folder_tag (str): The tag, empty for none.
+        """
+        with self._connection:
+            self._connection.execute('UPDATE events SET folder_tag = ? WHERE dir_path = ? AND timestamp = ?',
+                                     (folder_tag, *event_key))
+
+    def load_events(self) -> List[StoredEvent]:
+        """
+        Read every stored event with a single query.
+        Returns:
+            list of StoredEvent: The events, in the order they were listed.
+        """
+        rows = self._connection.execute(
+            'SELECT dir_path, timestamp, video_files, is_liked, folder_tag FROM events ORDER BY rowid')
+        return [StoredEvent(dir_path, timestamp, video_files.split('\n') if video_files else [],
+                            bool(is_liked), folder_tag)
+                for dir_path, timestamp, video_files, is_liked, folder_tag in rows]
+
+    def clear(self) -> None:
+        """Forget every root and event."""
+        with self._connection:
+            self._connection.execute('DELETE FROM roots')
+            self._connection.execute('DELETE FROM events')
+
+    def close(self) -> None:
+        """Close the store's database connection."""
+        self._connection.close()
@@ -0,0 +1,227 @@
+"""Drive sessions: runs of consecutive one minute clips played back as a single timeline."""
+import bisect
+import datetime
+import logging
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple, Union
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.mp4_boxes import Mp4ParseError, read_video_track_tables
+from file_utils.video_events import VideoEventData
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d_%H-%M-%S'
+# Tesla starts a new clip every minute, this is used when a clip's duration can't be read.
+NOMINAL_CLIP_DURATION_MS = 60 * 1000
+
+
+class SessionClip(NamedTuple):
+    """A clip of a drive session."""
+    timestamp: str
+    start_ms: int
+    duration_ms: int
+    video_files: List[str]
+
+
+def parse_timestamp(timestamp: str) -> datetime.datetime:
+    """
+    Parse a Tesla clip timestamp, e.g. 2024-01-01_10-00-00.
+    Args:
+        timestamp (str): The timestamp.
+    Returns:
+        datetime.datetime: The timestamp as a datetime.
+    """
+    return datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+
+
+def ordered_video_files(event_data: VideoEventData) -> List[str]:
+    """
+    Get an event's video files in camera name order, with an empty string for a missing camera.
+    Args:
+        event_data (VideoEventData): The event.
+    Returns:
+        list of str: The video files.
+    """
+    camera_files_dict = event_data.camera_files_dict
+    return [camera_files_dict[camera_name].as_posix() if camera_name in camera_files_dict else ''
+            for camera_name in TESLAS_CAMERA_NAMES]
+
+
+def read_clip_duration_ms(video_files: List[str]) -> Union[int, None]:
+    """
+    Read a clip's duration from the front camera's file, or another camera if it is missing.
+    Args:
+        video_files (list of str): The clip's video files in camera name order.
+    Returns:
+        int|None: The duration in milliseconds, or None if it couldn't be read.
+    """
+    front_index = TESLAS_CAMERA_NAMES.index('front')
+    for fpath in [video_files[front_index]] + video_files:
+        if not fpath:
+            continue
+        try:
+            tables = read_video_track_tables(fpath)
+        except (OSError, Mp4ParseError):
+            continue
+        return tables.duration * 1000 // tables.timescale
+    return None
+
+
+class DriveSession(object):
+    """A run of consecutive clips, with a global timeline running across all of them."""
+    def __init__(self, clips: List[SessionClip]) -> None:
+        """
+        Args:
+            clips (list of SessionClip): The clips, ordered by time with consecutive start_ms.
+        """
+        self._clips = clips
+        self._starts = [clip.start_ms for clip in clips]
+
+    @property
+    def clips(self) -> List[SessionClip]:
+        """The session's clips, in time order.
+        Returns:
+            list of SessionClip: The clips.
+        """
+        return self._clips
+
+    @property
+    def duration_ms(self) -> int:
+        """The session's total duration.
+        Returns:
+            int: The duration in milliseconds.
+        """
+        if not self._clips:
+            return 0
+        last_clip = self._clips[-1]
+        return last_clip.start_ms + last_clip.duration_ms
+
+    def clip_index_for_timestamp(self, timestamp: str) -> int:
+        """
+        Find the clip recorded at a timestamp.
+        Args:
+            timestamp (str): The clip's timestamp.
+        Returns:
+            int: The clip's index, -1 if the session has no such clip.
+        """
+        for index, clip in enumerate(self._clips):
+            if clip.timestamp == timestamp:
+                return index
+        return -1
+
+    def locate(self, position_ms: int) -> Tuple[int, int]:
+        """
+        Map a position on the session's timeline to a clip and an offset into it.
+        Args:
+            position_ms (int): The position in milliseconds, clamped to the session.
+        Returns:
+            tuple: The clip's index and the offset in milliseconds.
+        """
+        position_ms = max(0, min(position_ms, self.duration_ms))
+        index = max(bisect.bisect_right(self._starts, position_ms) - 1, 0)
+        clip = self._clips[index]
+        return index, min(position_ms - clip.start_ms, clip.duration_ms)
+
+    def global_position(self, clip_index: int, offset_ms: int) -> int:
+        """
+        Map a clip and an offset into it to a position on the session's timeline.
+        Args:
+            clip_index (int): The clip's index.
+            offset_ms (int): The offset in milliseconds.
+        Returns:
+            int: The position in milliseconds.
+        """
+        return self._clips[clip_index].start_ms + offset_ms
+
+
+def make_drive_sessions(events: Iterable[VideoEventData], max_gap_seconds: int = 5,
+                        read_duration_ms: Union[Callable[[List[str]], Union[int, None]], None] = read_clip_duration_ms
+                        ) -> List[DriveSession]:
+    """
+    Merge events whose clips follow each other into drive sessions.
+
+    A clip continues the previous one when it starts at most max_gap_seconds after the previous clip
+    ended. Events with the same timestamp, e.g. a SavedClips copy of a RecentClips minute, are only
+    used once.
+    Args:
+        events (iterable of VideoEventData|EventRow): The events, in any order.
+        max_gap_seconds (int): The largest gap between two clips of the same session.
+        read_duration_ms (Callable|None): Reads the duration of a clip which wasn't probed from its video files.
+            None uses NOMINAL_CLIP_DURATION_MS instead of reading the files.
+    Returns:
+        list of DriveSession: The sessions, in time order.
+    """
+    timed_events = {}
+    for event_data in events:
+        try:
+            timed_events.setdefault(event_data.timestamp, (parse_timestamp(event_data.timestamp), event_data))
+        except (TypeError, ValueError):
+            continue
+    sessions = []
+    clips = []
+    previous_end = None
+    for timestamp, (start_time, event_data) in sorted(timed_events.items()):
+        video_files = ordered_video_files(event_data)
+        # Events probed during the scan already know their duration.
+        duration_ms = (event_data.duration_ms or (read_duration_ms is not None and read_duration_ms(video_files))
+                       or NOMINAL_CLIP_DURATION_MS)
+        if previous_end is not None and (start_time - previous_end).total_seconds() > max_gap_seconds:
+            sessions.append(DriveSession(clips))
+            clips = []
+        start_ms = clips[-1].start_ms + clips[-1].duration_ms if clips else 0
+        clips.append(SessionClip(timestamp, start_ms, duration_ms, video_files))
+        previous_end = start_time + datetime.timedelta(milliseconds=duration_ms)
+    if clips:
+        sessions.append(DriveSession(clips))
+    return sessions
+
+
+class DriveSessionIndex(object):
+    """The drive sessions of every directory, kept as events are added and probed.
+
+    Sessions never span directories, so an event only makes its own directory's sessions stale, and they are
+    merged again the next time an event of the directory is looked up. Clips use their probed durations, or
+    NOMINAL_CLIP_DURATION_MS until they are probed, so a lookup never reads a video file.
+    """
+    def __init__(self, max_gap_seconds: int = 5) -> None:
+        """
+        Args:
+            max_gap_seconds (int): The largest gap between two clips of the same session.
+        """
+        self._max_gap_seconds = max_gap_seconds
+        # Events by directory and timestamp.
+        self._events: Dict[str, Dict[str, VideoEventData]] = {}
+        # (session, clip index) by directory and timestamp, for the directories whose sessions are up to date.
+        self._clip_sessions: Dict[str, Dict[str, Tuple[DriveSession, int]]] = {}
+
+    def add(self, event_data: VideoEventData) -> None:
+        """
+        Add an event, or replace it once its files changed or it was probed.
+        Args:
+            event_data (VideoEventData|EventRow): The event.
+        """
+        dir_path = event_data.dir_path
+        self._events.setdefault(dir_path, {})[event_data.timestamp] = event_data
+        self._clip_sessions.pop(dir_path, None)
+
+    def find(self, event_key: Tuple[str, str]) -> Tuple[Union[DriveSession, None], int]:
+        """
+        Find the drive session an event belongs to.
+        Args:
+            event_key (tuple): The event's (directory, timestamp).
+        Returns:
+            tuple: The session and the event's clip index in it, (None, -1) if the event wasn't added.
+        """
+        dir_path, timestamp = event_key
+        clip_sessions = self._clip_sessions.get(dir_path)
+        if clip_sessions is None:
+            events = self._events.get(dir_path)
+            if not events:
+                return None, -1
+            clip_sessions = {}
+            for session in make_drive_sessions(events.values(), self._max_gap_seconds, read_duration_ms=None):
+                for clip_index, clip in enumerate(session.clips):
+                    clip_sessions[clip.timestamp] = (session, clip_index)
+            self._clip_sessions[dir_path] = clip_sessions
+        return clip_sessions.get(timestamp, (None, -1))
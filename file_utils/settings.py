@@ -4,47 +4,60 @@ import os
 import logging
 import platform
 
-from typing import Any
+from typing import Any, Dict, Union
 
 from constants import (SETTINGS_KEY_DATETIME_OF_LAST_CHECK_FOR_UPDATE,
-                       APP_WINDOWS_SETTINGS_FILE_NAME,
-                       APP_SETTINGS_DATA_FOLDER)
-from PySide6.QtCore import QSettings
+                       APP_WINDOWS_SETTINGS_FILE_NAME)
+from file_utils.app_paths import get_app_data_dir
+from PySide6.QtCore import QSettings, QTimer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Changed settings are written to disk once no setting changed for this long.
+SETTINGS_FLUSH_DELAY_MS = 2000
+# Marks a key the settings file doesn't hold, None is a valid setting value.
+_MISSING = object()
+
+
 class AppSettings(QSettings):
-    """ A class related to the app's settings."""
-    def __init__(self, organization="atomfx.com", app_name="tesla_dashcam_viewer"):
-        if platform.system() == "Windows":
+    """ A class related to the app's settings.
+
+    Values are read from the settings file once and then served from memory. Changed values are kept in
+    memory too and written to disk together, SETTINGS_FLUSH_DELAY_MS after the last change, or by flush().
+    Changing settings schedules the write with a timer, so do it from the GUI thread.
+    """
+    def __init__(self, organization="atomfx.com", app_name="tesla_dashcam_viewer",
+                 file_path: Union[str, None] = None, flush_delay_ms: int = SETTINGS_FLUSH_DELAY_MS):
+        """
+        Args:
+            organization (str): The organization name, for the platform's native settings location.
+            app_name (str): The app name, for the platform's native settings location.
+            file_path (str, optional): Use this INI file instead, e.g. for benchmarks. Defaults to None.
+            flush_delay_ms (int): How long after the last change settings are written to disk.
+        """
+        if file_path is not None:
+            super().__init__(file_path, QSettings.IniFormat)
+        elif platform.system() == "Windows":
             # Use INI format and store in the Roaming AppData directory
-            app_data_dir = os.path.join(os.environ["APPDATA"], APP_SETTINGS_DATA_FOLDER)
-            os.makedirs(app_data_dir, exist_ok=True)  # Ensure directory exists
+            app_data_dir = get_app_data_dir()  # Ensures directory exists
             settings_path = os.path.join(app_data_dir, APP_WINDOWS_SETTINGS_FILE_NAME)
             super().__init__(settings_path, QSettings.IniFormat)
-        elif platform.system() == 'Darwin':
+        else:
             super().__init__(organization, app_name)
-
-        self.create_initial_settings_file()
-        if os.path.exists(self.fileName()):
-            logger.info(f'Settings file path:{self.fileName()}')
+        # Values read so far, and changes not written yet, in the order they were made.
+        self._cache: Dict[str, Any] = {}
+        self._pending: Dict[str, Any] = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_delay_ms)
+        self._flush_timer.timeout.connect(self.flush)
+        logger.debug(f'Settings file path:{self.fileName()}')
         self.ensure_required_defaults_exist()
 
-    def create_initial_settings_file(self) -> None:
-        """ Create an initial settings file.
-
-        Returns:None
-
-        """
-        if not os.path.exists(self.fileName()):
-            now = datetime.datetime.now().isoformat()
-            logger.info(f'Creating initial settings file:{self.fileName()}')
-            self.setValue(SETTINGS_KEY_DATETIME_OF_LAST_CHECK_FOR_UPDATE, now)
-            self.sync()
-
     def ensure_required_defaults_exist(self) -> None:
-        """ Ensure the required default settings exist in the setting file.
+        """ Ensure the required default settings exist in the setting file, which also creates the file on
+        the first run. The defaults are written with the next flush rather than on the startup path.
 
         Returns: None
 
@@ -54,10 +67,9 @@ class AppSettings(QSettings):
             now = datetime.datetime.now().isoformat()
             logger.info(f'Setting default for setting key: {SETTINGS_KEY_DATETIME_OF_LAST_CHECK_FOR_UPDATE}={now})')
             self.setValue(SETTINGS_KEY_DATETIME_OF_LAST_CHECK_FOR_UPDATE, now)
-            self.sync()
 
     def setValue(self, key: str, value) -> None:
-        """ Override setValue to add custom behavior if needed.
+        """ Change a setting in memory and schedule writing it to disk.
         Args:
             key (str): Setting name.
             value ():  Setting's value, can be anything QVariant can handle.
@@ -65,11 +77,13 @@ class AppSettings(QSettings):
         Returns: None
 
         """
-        logger.info(f"Saving setting: {key} = {value}")
-        super().setValue(key, value)
+        logger.debug('Saving setting: %s = %s', key, value)
+        self._cache[key] = value
+        self._pending[key] = value
+        self._flush_timer.start()
 
     def value(self, key: str, default_value=None) -> Any:
-        """ Override value to ensure default values are handled correctly.
+        """ Get a setting, reading the settings file only the first time the key is asked for.
         Args:
             key (str): Setting name.
             default_value (None): A value returned if the setting key can't be found.
@@ -77,12 +91,70 @@ class AppSettings(QSettings):
         Returns: Any
 
         """
-        result = super().value(key, default_value)
-        logger.info(f"Retrieving setting: {key} -> {result}")
-        return result
+        result = self._cache.get(key, _MISSING)
+        if result is _MISSING and key not in self._cache:
+            result = super().value(key) if super().contains(key) else _MISSING
+            self._cache[key] = result
+        logger.debug('Retrieving setting: %s -> %s', key, result)
+        return default_value if result is _MISSING else result
+
+    def bool_value(self, key: str, default_value: bool = False) -> bool:
+        """ Get a boolean setting. INI files store booleans as the strings 'true' and 'false'.
+        Args:
+            key (str): Setting name.
+            default_value (bool): A value returned if the setting key can't be found.
+
+        Returns: bool
+
+        """
+        result = self.value(key, default_value)
+        if isinstance(result, str):
+            return result.lower() in ('true', '1', 'yes')
+        return bool(result)
+
+    def int_value(self, key: str, default_value: int = 0) -> int:
+        """ Get an integer setting.
+        Args:
+            key (str): Setting name.
+            default_value (int): A value returned if the setting key can't be found or isn't an integer.
+
+        Returns: int
+
+        """
+        try:
+            return int(self.value(key, default_value))
+        except (TypeError, ValueError):
+            return default_value
+
+    def float_value(self, key: str, default_value: float = 0.0) -> float:
+        """ Get a float setting.
+        Args:
+            key (str): Setting name.
+            default_value (float): A value returned if the setting key can't be found or isn't a number.
+
+        Returns: float
+
+        """
+        try:
+            return float(self.value(key, default_value))
+        except (TypeError, ValueError):
+            return default_value
+
+    def str_value(self, key: str, default_value: str = '') -> str:
+        """ Get a string setting.
+        Args:
+            key (str): Setting name.
+            default_value (str): A value returned if the setting key can't be found.
+
+        Returns: str
+
+        """
+        result = self.value(key)
+        return default_value if result is None else str(result)
 
     def remove(self, key: str) -> None:
-        """ Override remove to log actions.
+        """ Remove a setting, or a group of settings and everything under it. Removals are rare, so they go
+        straight to QSettings.
 
         Args:
             key (str): Setting name.
@@ -90,7 +162,12 @@ class AppSettings(QSettings):
         Returns: None
 
         """
-        logger.info(f"Removing setting: {key}")
+        logger.debug('Removing setting: %s', key)
+        prefix = f'{key}/'
+        for mapping in (self._cache, self._pending):
+            for cached_key in [cached_key for cached_key in mapping
+                               if cached_key == key or cached_key.startswith(prefix)]:
+                del mapping[cached_key]
         super().remove(key)
 
     def clear(self) -> None:
@@ -101,15 +178,33 @@ class AppSettings(QSettings):
 
         """
         logger.info("Clearing all settings")
+        self._cache.clear()
+        self._pending.clear()
+        self._flush_timer.stop()
         super().clear()
 
-    def sync(self) -> None:
+    def flush(self) -> None:
         """
-        Override sync, write the settings to disk on demand. Typically there is no need to call this
-        as QSettings will save periodically automatically and when the instance is destroyed.
+        Write the changed settings to disk now, e.g. when the app closes.
 
         Returns: None
 
         """
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        logger.debug('Writing %d changed settings', len(self._pending))
+        for key, value in self._pending.items():
+            super().setValue(key, value)
+        self._pending.clear()
         super().sync()
 
+    def sync(self) -> None:
+        """
+        Override sync, write the changed settings to disk on demand. Typically there is no need to call this
+        as changes are written shortly after they are made.
+
+        Returns: None
+
+        """
+        self.flush()
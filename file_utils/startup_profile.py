@@ -0,0 +1,53 @@
+"""Timing of the app's startup phases, reported with --profile-startup."""
+import logging
+import time
+from typing import List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler(object):
+    """Records the time spent in each startup phase, a phase ends when it is marked."""
+    def __init__(self, start: float = None) -> None:
+        """
+        Args:
+            start (float, optional): The time.perf_counter() startup began at. Defaults to now.
+        """
+        self._start = time.perf_counter() if start is None else start
+        self._last = self._start
+        self._phases: List[Tuple[str, float]] = []
+
+    @property
+    def phases(self) -> List[Tuple[str, float]]:
+        """The phases marked so far.
+        Returns:
+            list of tuple: (phase name, seconds) in the order they were marked.
+        """
+        return list(self._phases)
+
+    def mark(self, phase_name: str) -> None:
+        """
+        End a phase, it spans the time since the previous mark.
+        Args:
+            phase_name (str): The phase's name.
+        """
+        now = time.perf_counter()
+        self._phases.append((phase_name, now - self._last))
+        self._last = now
+
+    def format_report(self) -> str:
+        """
+        Format the phases as a table, with the total time since startup began.
+        Returns:
+            str: The report.
+        """
+        lines = ['Startup profile:']
+        for phase_name, seconds in self._phases:
+            lines.append(f'  {phase_name:<40} {seconds * 1000:8.1f} ms')
+        lines.append(f'  {"total":<40} {(self._last - self._start) * 1000:8.1f} ms')
+        return '\n'.join(lines)
+
+    def log_report(self) -> None:
+        """Log the report."""
+        logger.info(self.format_report())
@@ -0,0 +1,175 @@
+"""Event thumbnails: a 2x2 mosaic of the cameras' frames, made with ffmpeg and kept in a size capped disk cache."""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import List, Union
+
+from constants import THUMBNAIL_CACHE_FOLDER_NAME, THUMBNAIL_CACHE_MAX_BYTES
+from file_utils.app_paths import get_app_data_dir
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CAMERA_WIDTH = 48
+THUMBNAIL_CAMERA_HEIGHT = 27
+# Seconds into a clip the representative frame is taken from, early frames are often still dark.
+THUMBNAIL_FRAME_OFFSET = 1.0
+FFMPEG_TIMEOUT_SECONDS = 30
+
+
+def find_ffmpeg() -> Union[str, None]:
+    """ Find the ffmpeg executable, which is an optional dependency used to extract frames.
+
+    Returns: Union[str, None]
+
+    """
+    return shutil.which('ffmpeg')
+
+
+def make_thumbnail_key(video_files: List[str]) -> str:
+    """
+    Make a cache key from the video files' paths, sizes and modification times.
+    Args:
+        video_files (list of str): The event's video files.
+    Returns:
+        str: The cache key.
+    """
+    digest = hashlib.sha1()
+    for fpath in video_files:
+        stat = os.stat(fpath)
+        digest.update(f'{fpath}\0{stat.st_size}\0{stat.st_mtime_ns}\0'.encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+def make_mosaic_command(ffmpeg_fpath: str, video_files: List[str], out_fpath: str) -> List[str]:
+    """
+    Make the ffmpeg command which writes one frame of each video file, tiled 2x2, to out_fpath.
+    Args:
+        ffmpeg_fpath (str): The ffmpeg executable.
+        video_files (list of str): Up to four video files.
+        out_fpath (str): The jpeg file to write.
+    Returns:
+        list of str: The command.
+    """
+    command = [ffmpeg_fpath, '-nostdin', '-loglevel', 'error', '-y']
+    for fpath in video_files:
+        command += ['-ss', str(THUMBNAIL_FRAME_OFFSET), '-i', fpath]
+    scale = f'scale={THUMBNAIL_CAMERA_WIDTH}:{THUMBNAIL_CAMERA_HEIGHT}'
+    if len(video_files) == 1:
+        filter_graph = f'[0:v]{scale}[out]'
+    else:
+        filters = [f'[{i}:v]{scale}[v{i}]' for i in range(len(video_files))]
+        inputs = ''.join(f'[v{i}]' for i in range(len(video_files)))
+        layout = '|'.join(['0_0', 'w0_0', '0_h0', 'w0_h0'][:len(video_files)])
+        filters.append(f'{inputs}xstack=inputs={len(video_files)}:layout={layout}:fill=black[out]')
+        filter_graph = ';'.join(filters)
+    command += ['-filter_complex', filter_graph, '-map', '[out]', '-frames:v', '1', '-q:v', '5', out_fpath]
+    return command
+
+
+class ThumbnailCache(object):
+    """A directory of thumbnail files capped at max_bytes, evicting the least recently used files first.
+
+    Reading a thumbnail updates its modification time, which is what the eviction order is based on.
+    """
+    def __init__(self, cache_dir: Union[Path, str, None] = None, max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES) -> None:
+        """
+        Args:
+            cache_dir (Path|str, optional): Defaults to a folder in the app's data directory.
+            max_bytes (int): The maximum total size of the cached thumbnails.
+        """
+        if cache_dir is None:
+            cache_dir = get_app_data_dir() / THUMBNAIL_CACHE_FOLDER_NAME
+        self._cache_dir = Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self._cache_dir) if entry.is_file())
+
+    def path_for(self, key: str) -> Path:
+        """
+        Get where the thumbnail of a key is stored.
+        Args:
+            key (str): The cache key.
+        Returns:
+            Path: The thumbnail's file path.
+        """
+        return self._cache_dir / f'{key}.jpg'
+
+    def get(self, key: str) -> Union[Path, None]:
+        """
+        Get a cached thumbnail.
+        Args:
+            key (str): The cache key.
+        Returns:
+            Path|None: The thumbnail's file path, or None if it isn't cached.
+        """
+        fpath = self.path_for(key)
+        try:
+            os.utime(fpath)
+        except OSError:
+            return None
+        return fpath
+
+    def add(self, key: str, size: int) -> None:
+        """
+        Account for a thumbnail written to path_for(key) and evict old thumbnails if the cache is too big.
+        Args:
+            key (str): The cache key.
+            size (int): The thumbnail's size in bytes.
+        """
+        with self._lock:
+            self._total_bytes += size
+            if self._total_bytes <= self._max_bytes:
+                return
+            entries = sorted((entry for entry in os.scandir(self._cache_dir) if entry.is_file()),
+                             key=lambda entry: entry.stat().st_mtime_ns)
+            # Evict down to 90% so every new thumbnail doesn't trigger another directory scan.
+            for entry in entries:
+                if self._total_bytes <= self._max_bytes * 0.9:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                self._total_bytes -= size
+
+
+def make_event_thumbnail(video_files: List[str], cache: ThumbnailCache, ffmpeg_fpath: str) -> Union[Path, None]:
+    """
+    Get an event's mosaic thumbnail from the cache, making it with ffmpeg if it isn't cached.
+    Args:
+        video_files (list of str): The event's video files.
+        cache (ThumbnailCache): The thumbnail cache.
+        ffmpeg_fpath (str): The ffmpeg executable.
+    Returns:
+        Path|None: The thumbnail's file path, or None if it couldn't be made.
+    """
+    try:
+        key = make_thumbnail_key(video_files)
+    except OSError:
+        return None
+    cached_fpath = cache.get(key)
+    if cached_fpath is not None:
+        return cached_fpath
+    out_fpath = cache.path_for(key)
+    tmp_fpath = out_fpath.with_name(f'{out_fpath.stem}.{threading.get_ident()}.tmp.jpg')
+    command = make_mosaic_command(ffmpeg_fpath, video_files, os.fspath(tmp_fpath))
+    try:
+        subprocess.run(command, check=True, timeout=FFMPEG_TIMEOUT_SECONDS,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        os.replace(tmp_fpath, out_fpath)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f'Could not make a thumbnail for {video_files[0]}: {e}')
+        try:
+            os.remove(tmp_fpath)
+        except OSError:
+            pass
+        return None
+    cache.add(key, out_fpath.stat().st_size)
+    return out_fpath
@@ -1,7 +1,5 @@
 import datetime
-import requests
 import logging
-from packaging import version
 from typing import Union
 
 from constants import (SETTINGS_KEY_DATETIME_OF_LAST_CHECK_FOR_UPDATE,
@@ -39,19 +37,27 @@ def should_check_for_update(settings: AppSettings, frequency: int =4) -> bool:
         settings.setValue(SETTINGS_KEY_DATETIME_OF_LAST_CHECK_FOR_UPDATE, now.isoformat())
     return should_check
 
-def check_for_new_version(current_version: str=None) -> Union[str, bool]:
-    """ Check to see if there is a newer version.
+def check_for_new_version(current_version: str=None, api_url: str=API_URL,
+                          timeout: float=REQUESTS_TIMEOUT_LIMIT) -> Union[str, bool]:
+    """ Check to see if there is a newer version. This blocks on the network, call it off the GUI thread.
 
     Args:
         current_version (str): The current version number.
+        api_url (str): The update server's API, e.g. a local server when testing offline.
+        timeout (float): Seconds to wait for the server.
 
     Returns: Union[str, bool]
 
     """
+    # requests and packaging are slow to import and only needed here, so importing them is left until the
+    # check runs rather than slowing down startup.
+    import requests
+    from packaging import version
+
     if not current_version:
         current_version = APP_VERSION
     try:
-        response = requests.get(f'{API_URL}/version', timeout= REQUESTS_TIMEOUT_LIMIT)
+        response = requests.get(f'{api_url}/version', timeout=timeout)
         response.raise_for_status() # Raise exception if there was an issue.
         data = response.json()
         latest_version = data.get('latest_version', '')
@@ -1,21 +1,46 @@
 """Module related to handling video events on disk."""
+import os
 import re
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union, List
+from typing import Callable, Dict, Iterator, Tuple, Union, List
 from constants import TESLAS_CAMERA_NAMES
+from file_utils.event_metadata import EVENT_JSON_FILE_NAME, EventMetadata, read_event_json
+from file_utils.mp4_boxes import Mp4Metadata, check_mp4_structure, probe_mp4_files
+from file_utils.scan_index import ScanIndex, list_directory
+
+# Regular expression to extract the timestamp at the start of the filename
+TIMESTAMP_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})')
+# Cameras whose clips are shorter than the longest camera's clip by more than this are considered truncated.
+TRUNCATED_CLIP_TOLERANCE_MS = 2000
+# event.json files and clip headers are read this many at once while the directory walk goes on.
+SCAN_READ_WORKERS = 8
+# Events whose clips are checked by one worker task, a task per event would cost more than most checks.
+INTEGRITY_CHECK_CHUNK_SIZE = 16
+# An event's integrity, once its clips were checked, see VideoEventData.integrity.
+EVENT_COMPLETE = 'complete'
+EVENT_PARTIAL = 'partial'
+EVENT_CORRUPT = 'corrupt'
 
 
 class VideoEventData(object):
     """A class which describes a video event."""
+    __slots__ = ('_timestamp', '_camera_files_dict', '_unresolved_camera_files', '_camera_metadata',
+                 '_event_metadata', '_clip_problems')
+
     def __init__(self):
-        self._back_fpath = None
-        self._front_fpath = None
-        self._left_repeater_fpath = None
-        self._right_repeater_fpath = None
         self._timestamp = None
-        self._event_name = None
         self._camera_files_dict = defaultdict(Path)
+        # (directory path, file names) whose Path objects are only built when camera_files_dict is first used.
+        self._unresolved_camera_files = None
+        # Mp4Metadata, or None for unreadable files, keyed by camera name. Empty until the event is probed.
+        self._camera_metadata = {}
+        # The event folder's event.json, SavedClips and SentryClips events only.
+        self._event_metadata = None
+        # What is wrong with each broken clip keyed by camera name, None until the clips are checked.
+        self._clip_problems = None
 
     @property
     def camera_files_dict(self) -> dict:
@@ -24,8 +49,154 @@ class VideoEventData(object):
         Returns:
             dict: A dictionary mapping camera names to their video file paths.
         """
+        unresolved_camera_files = self._unresolved_camera_files
+        if unresolved_camera_files is not None:
+            # Events may be resolved by a worker thread and the GUI thread at once, so the dict is only
+            # published once it is complete.
+            dir_path, file_names = unresolved_camera_files
+            camera_files_dict = defaultdict(Path)
+            for cam_name in TESLAS_CAMERA_NAMES:
+                for file_name in file_names:
+                    if cam_name in file_name:
+                        camera_files_dict[cam_name] = Path(dir_path, file_name)
+            self._camera_files_dict = camera_files_dict
+            self._unresolved_camera_files = None
         return self._camera_files_dict
 
+    @property
+    def camera_file_names(self) -> Dict[str, str]:
+        """
+        Get the video file names keyed by camera name, without building Path objects for unresolved events.
+        Returns:
+            dict: The file names keyed by camera name.
+        """
+        unresolved_camera_files = self._unresolved_camera_files
+        if unresolved_camera_files is None:
+            return {cam_name: video_fpath.name for cam_name, video_fpath in self._camera_files_dict.items()}
+        camera_file_names = {}
+        for cam_name in TESLAS_CAMERA_NAMES:
+            for file_name in unresolved_camera_files[1]:
+                if cam_name in file_name:
+                    camera_file_names[cam_name] = file_name
+        return camera_file_names
+
+    @property
+    def video_files(self) -> List[str]:
+        """
+        Get the video file paths with forward slashes, in camera order, without building Path objects.
+        Returns:
+            list of str: The video file paths.
+        """
+        unresolved_camera_files = self._unresolved_camera_files
+        if unresolved_camera_files is None:
+            return [video_fpath.as_posix() for video_fpath in self._camera_files_dict.values()]
+        # Path objects are most of the cost of listing an event, the strings are what the event list keeps.
+        dir_path = unresolved_camera_files[0].replace(os.sep, '/').rstrip('/')
+        return [f'{dir_path}/{file_name}' for file_name in self.camera_file_names.values()]
+
+    @property
+    def camera_metadata(self) -> Dict[str, Union[Mp4Metadata, None]]:
+        """
+        Get the probed metadata of each camera's video file, see probe_video_events.
+        Returns:
+            dict: Mp4Metadata, or None if the file couldn't be read, keyed by camera name.
+        """
+        return self._camera_metadata
+
+    @property
+    def duration_ms(self) -> Union[int, None]:
+        """
+        Get the event's duration, the longest of its cameras' clips.
+        Returns:
+            int|None: The duration in milliseconds, None if the event wasn't probed or no file could be read.
+        """
+        durations = [metadata.duration_ms for metadata in self._camera_metadata.values() if metadata]
+        return max(durations) if durations else None
+
+    @property
+    def is_truncated(self) -> bool:
+        """
+        Whether a camera's clip is unreadable or noticeably shorter than the others, e.g. after power was cut.
+        Returns:
+            bool: True if the event was probed and a clip is truncated.
+        """
+        duration_ms = self.duration_ms
+        if duration_ms is None:
+            return bool(self._camera_metadata)
+        return any(metadata is None or duration_ms - metadata.duration_ms > TRUNCATED_CLIP_TOLERANCE_MS
+                   for metadata in self._camera_metadata.values())
+
+    @property
+    def event_metadata(self) -> Union[EventMetadata, None]:
+        """
+        Get what the car recorded about the event in its folder's event.json: city, location and trigger reason.
+        Returns:
+            EventMetadata|None: The metadata, None if the event's folder has no readable event.json.
+        """
+        return self._event_metadata
+
+    @property
+    def clip_problems(self) -> Union[Dict[str, str], None]:
+        """
+        Get what is wrong with the event's broken clips, see check_video_events.
+        Returns:
+            dict|None: The problem keyed by camera name, for broken clips only. None if the clips weren't checked.
+        """
+        return self._clip_problems
+
+    @property
+    def video_file_problems(self) -> Dict[str, str]:
+        """
+        Get what is wrong with the event's broken clips keyed by video file path, as in video_files.
+        Returns:
+            dict: The problem keyed by video file path, empty if no clip is broken or the clips weren't checked.
+        """
+        if not self._clip_problems:
+            return {}
+        return {video_fpath: self._clip_problems[camera_name]
+                for camera_name, video_fpath in zip(self.camera_file_names, self.video_files)
+                if camera_name in self._clip_problems}
+
+    @property
+    def integrity(self) -> Union[str, None]:
+        """
+        Get whether the event's clips can be played.
+        Returns:
+            str|None: EVENT_COMPLETE, EVENT_PARTIAL if some clips are broken, EVENT_CORRUPT if every clip is.
+                None if the clips weren't checked.
+        """
+        if self._clip_problems is None:
+            return None
+        if not self._clip_problems:
+            return EVENT_COMPLETE
+        if len(self._clip_problems) < len(self.camera_file_names):
+            return EVENT_PARTIAL
+        return EVENT_CORRUPT
+
+    @property
+    def dir_path(self) -> str:
+        """
+        Get the directory the event's video files are in.
+        Returns:
+            str: The directory path, an empty string if the event has no video files.
+        """
+        unresolved_camera_files = self._unresolved_camera_files
+        if unresolved_camera_files is not None:
+            return unresolved_camera_files[0]
+        for video_fpath in self._camera_files_dict.values():
+            return os.fspath(video_fpath.parent)
+        return ''
+
+    @property
+    def event_key(self) -> tuple:
+        """
+        Get the key identifying the event across scans, its directory and timestamp. The same minute can be
+        in RecentClips and in a SavedClips folder, those are separate events.
+        Returns:
+            tuple: The directory path and the timestamp.
+        """
+        return self.dir_path, self._timestamp
+
     @property
     def timestamp(self) -> str:
         """
@@ -41,11 +212,60 @@ class VideoEventData(object):
         Args:
             video_file_paths (dict): A dictionary mapping camera names to their video file paths.
         """
+        video_file_paths = [(video_fpath, video_fpath.name) for video_fpath in video_file_paths]
         for cam_name in TESLAS_CAMERA_NAMES:
-            for video_fpath in video_file_paths:
-                if cam_name in video_fpath.name:
+            for video_fpath, file_name in video_file_paths:
+                if cam_name in file_name:
                     self._camera_files_dict[cam_name] = video_fpath
 
+def probe_video_events(events: List[VideoEventData], max_workers: int = 8) -> None:
+    """
+    Read the duration, resolution, codec and frame count of every event's video files in parallel, and
+    attach them to the events as camera_metadata.
+    Args:
+        events (list of VideoEventData): The events to probe.
+        max_workers (int): The number of files read at once.
+    """
+    camera_fpaths = [(event_data, camera_name, video_fpath) for event_data in events
+                     for camera_name, video_fpath in event_data.camera_files_dict.items()]
+    metadata = probe_mp4_files([video_fpath for _, _, video_fpath in camera_fpaths], max_workers=max_workers)
+    camera_metadata_by_event = defaultdict(dict)
+    for event_data, camera_name, video_fpath in camera_fpaths:
+        camera_metadata_by_event[event_data][camera_name] = metadata[os.fspath(video_fpath)]
+    # Each event's metadata is published whole, as the GUI thread may read it while a worker probes.
+    for event_data, camera_metadata in camera_metadata_by_event.items():
+        event_data._camera_metadata = camera_metadata
+
+def check_event_clips(event_data: VideoEventData,
+                      check_clip: Callable[[str], Union[str, None]] = check_mp4_structure) -> Dict[str, str]:
+    """
+    Check the box structure of an event's clips, see check_mp4_structure.
+    Args:
+        event_data (VideoEventData): The event.
+        check_clip (Callable, optional): Checks one clip, e.g. ScanIndex.check_clip to skip unchanged clips.
+    Returns:
+        dict: What is wrong keyed by camera name, for broken clips only.
+    """
+    dir_path = event_data.dir_path
+    clip_problems = {}
+    for camera_name, file_name in event_data.camera_file_names.items():
+        problem = check_clip(os.path.join(dir_path, file_name))
+        if problem is not None:
+            clip_problems[camera_name] = problem
+    return clip_problems
+
+def check_video_events(events: List[VideoEventData], max_workers: int = SCAN_READ_WORKERS) -> None:
+    """
+    Check every event's clips in parallel, with a few small reads per clip, and attach what is wrong with
+    them to the events as clip_problems.
+    Args:
+        events (list of VideoEventData): The events to check.
+        max_workers (int): The number of events checked at once.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for event_data, clip_problems in zip(events, executor.map(check_event_clips, events)):
+            event_data._clip_problems = clip_problems
+
 def get_all_videos_in_dir(dir_path: Union[Path, str]) -> List[str]:
     """
     Given a directory return all the mp4 files in the directory & subdirectories.
@@ -69,12 +289,10 @@ def group_videos_by_timestamp(fpath_list: List[str]) -> dict:
     Returns:
         dict: A dictionary where the keys are timestamps and values are lists of files.
     """
-    # Regular expression to extract the timestamp at the start of the filename
-    timestamp_pattern = re.compile(r'^(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})')
     grouped_files = defaultdict(list)
     for f_path in fpath_list:
         file_name = f_path.name
-        match = timestamp_pattern.match(file_name)
+        match = TIMESTAMP_PATTERN.match(file_name)
         if match:
             timestamp = match.group(1)
             grouped_files[timestamp].append(f_path)
@@ -94,8 +312,190 @@ def make_event_data_objects_for_a_dir_path(dir_path: Union[Path, str]) -> List[V
     grouped_videos = group_videos_by_timestamp(video_files)
     event_data_objs = []
     for timestamp, video_file_paths in grouped_videos.items():
+        event_data_objs.append(make_event_data_object(timestamp, video_file_paths))
+    return event_data_objs
+
+def make_event_data_object(timestamp: str, video_file_paths: List[Path]) -> VideoEventData:
+    """
+    Make a single event data object from a timestamp and the video files recorded at that time.
+    Args:
+        timestamp (str): The timestamp shared by the video files.
+        video_file_paths (list of Path): The video files recorded at that timestamp.
+    Returns:
+        VideoEventData: The event data object.
+    """
+    event_data = VideoEventData()
+    event_data._timestamp = timestamp
+    event_data.update_camera_files_dict(video_file_paths)
+    return event_data
+
+def make_directory_events(dir_path: str, video_file_names: List[str]) -> List[VideoEventData]:
+    """
+    Group the video files directly inside a directory into events, without building their Path objects.
+    Args:
+        dir_path (str): The directory.
+        video_file_names (list of str): The names of the mp4 files in the directory.
+    Returns:
+        list of VideoEventData: The events, in timestamp order.
+    """
+    grouped_files = defaultdict(list)
+    for file_name in video_file_names:
+        match = TIMESTAMP_PATTERN.match(file_name)
+        if match:
+            grouped_files[match.group(1)].append(file_name)
+    events = []
+    for timestamp in sorted(grouped_files):
         event_data = VideoEventData()
         event_data._timestamp = timestamp
-        event_data.update_camera_files_dict(video_file_paths)
-        event_data_objs.append(event_data)
-    return event_data_objs
+        event_data._unresolved_camera_files = (dir_path, grouped_files[timestamp])
+        events.append(event_data)
+    return events
+
+def read_directories_events(dir_listings: List[Tuple[str, List[str]]], read_event_metadata: bool = True,
+                           check_integrity: bool = True,
+                           check_clip: Callable[[str], Union[str, None]] = check_mp4_structure,
+                           max_workers: int = SCAN_READ_WORKERS) -> List[VideoEventData]:
+    """
+    Group the video files of a few listed directories into events, reading their event.json files and checking
+    their clips the way iter_video_event_batches does, e.g. for directories which changed after the scan.
+    Args:
+        dir_listings (list of tuple): (directory, names of its mp4 files and event.json) per directory.
+        read_event_metadata (bool): Attach the event folders' event.json files to the events as event_metadata.
+        check_integrity (bool): Attach what is wrong with the events' clips to them as clip_problems.
+        check_clip (Callable, optional): Checks one clip, e.g. ScanIndex.check_clip to skip unchanged clips.
+        max_workers (int): The number of reads at once.
+    Returns:
+        list of VideoEventData: The events, in directory then timestamp order.
+    """
+    events = []
+    pending_metadata = []
+    pending_checks = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for dir_path, video_file_names in dir_listings:
+            dir_events = make_directory_events(dir_path, video_file_names)
+            if read_event_metadata:
+                _submit_event_json_read(executor, dir_path, video_file_names, dir_events, pending_metadata)
+            if check_integrity:
+                for chunk_start in range(0, len(dir_events), INTEGRITY_CHECK_CHUNK_SIZE):
+                    chunk = dir_events[chunk_start:chunk_start + INTEGRITY_CHECK_CHUNK_SIZE]
+                    pending_checks.append((executor.submit(_check_events_clips, chunk, check_clip), chunk))
+            events.extend(dir_events)
+        _attach_pending_reads(pending_metadata, pending_checks)
+    return events
+
+def _submit_event_json_read(executor: ThreadPoolExecutor, dir_path: str, video_file_names: List[str],
+                            dir_events: List[VideoEventData], pending_metadata: list) -> None:
+    # Every event of an event folder shares its event.json.
+    if dir_events and EVENT_JSON_FILE_NAME in video_file_names:
+        pending_metadata.append((executor.submit(
+            read_event_json, os.path.join(dir_path, EVENT_JSON_FILE_NAME)), dir_events))
+
+def _check_events_clips(events: List[VideoEventData],
+                        check_clip: Callable[[str], Union[str, None]]) -> List[Dict[str, str]]:
+    return [check_event_clips(event_data, check_clip) for event_data in events]
+
+def _attach_pending_reads(pending_metadata: list, pending_checks: list) -> None:
+    # Most reads finished while the rest of the batch was walked.
+    for future, dir_events in pending_metadata:
+        event_metadata = future.result()
+        for event_data in dir_events:
+            event_data._event_metadata = event_metadata
+    pending_metadata.clear()
+    for future, events in pending_checks:
+        for event_data, clip_problems in zip(events, future.result()):
+            event_data._clip_problems = clip_problems
+    pending_checks.clear()
+
+def iter_video_event_batches(dir_path: Union[Path, str], batch_size: int = 50, max_batch_interval: float = 0.1,
+                             is_cancelled: Callable[[], bool] = None,
+                             scan_index: ScanIndex = None,
+                             visited_dirs: List[str] = None,
+                             read_event_metadata: bool = True,
+                             check_integrity: bool = True) -> Iterator[List[VideoEventData]]:
+    """
+    Walk a directory tree and yield VideoEventData objects in batches as soon as they are discovered.
+
+    Unlike make_event_data_objects_for_a_dir_path this does not wait for the whole tree to be walked,
+    so the first events of a large TeslaCam drive are available almost immediately. Video files are
+    grouped by timestamp per directory, which matches how Tesla lays out RecentClips, SavedClips and
+    SentryClips.
+    Args:
+        dir_path (Path|str): A parent directory path to start searching from.
+        batch_size (int): Yield a batch once it holds this many events.
+        max_batch_interval (float): Yield a non-empty batch once this many seconds passed since the last one.
+        is_cancelled (Callable, optional): Polled between directories, the walk stops once it returns True.
+        scan_index (ScanIndex, optional): List unchanged directories from this index instead of the disk, and
+            reuse its outcome of checking unchanged clips. The index is committed when the walk ends.
+        visited_dirs (list, optional): Every directory walked is appended to this list, e.g. to watch them.
+        read_event_metadata (bool): Read the event folders' event.json files, on worker threads while the walk
+            goes on, and attach them to the events as event_metadata before their batch is yielded.
+        check_integrity (bool): Check the clips' box structure, on worker threads while the walk goes on, and
+            attach what is wrong with them to the events as clip_problems before their batch is yielded.
+    Yields:
+        list of VideoEventData: The events found since the previous batch.
+    """
+    root_path = os.fspath(dir_path)
+    lister = list_directory
+    check_clip = check_mp4_structure
+    if scan_index is not None:
+        scan_index.load(root_path)
+        lister = scan_index.list_directory
+        check_clip = scan_index.check_clip
+    batch = []
+    last_yield_time = time.monotonic()
+    pending_dirs = [root_path]
+    was_cancelled = False
+    executor = ThreadPoolExecutor(max_workers=SCAN_READ_WORKERS) if read_event_metadata or check_integrity else None
+    # (event.json read, the folder's events) and (clip checks, the events) for the batch being filled.
+    pending_metadata = []
+    pending_checks = []
+    unchecked_events = []
+    try:
+        while pending_dirs:
+            if is_cancelled is not None and is_cancelled():
+                was_cancelled = True
+                return
+            current_dir = pending_dirs.pop()
+            try:
+                sub_dir_names, video_file_names = lister(current_dir)
+            except OSError:
+                # Unreadable directories (e.g. System Volume Information) are skipped.
+                continue
+            # Reverse sorted so directories are popped, and therefore walked, in name order.
+            pending_dirs.extend(os.path.join(current_dir, name) for name in sorted(sub_dir_names, reverse=True))
+            dir_events = make_directory_events(current_dir, video_file_names)
+            if read_event_metadata:
+                _submit_event_json_read(executor, current_dir, video_file_names, dir_events, pending_metadata)
+            if check_integrity:
+                unchecked_events.extend(dir_events)
+                if len(unchecked_events) >= INTEGRITY_CHECK_CHUNK_SIZE:
+                    pending_checks.append(
+                        (executor.submit(_check_events_clips, unchecked_events, check_clip), unchecked_events))
+                    unchecked_events = []
+            batch.extend(dir_events)
+            if visited_dirs is not None:
+                visited_dirs.append(current_dir)
+            now = time.monotonic()
+            if batch and (len(batch) >= batch_size or now - last_yield_time >= max_batch_interval):
+                if unchecked_events:
+                    pending_checks.append(
+                        (executor.submit(_check_events_clips, unchecked_events, check_clip), unchecked_events))
+                    unchecked_events = []
+                _attach_pending_reads(pending_metadata, pending_checks)
+                yield batch
+                batch = []
+                last_yield_time = now
+        if batch:
+            if unchecked_events:
+                pending_checks.append(
+                    (executor.submit(_check_events_clips, unchecked_events, check_clip), unchecked_events))
+            _attach_pending_reads(pending_metadata, pending_checks)
+            yield batch
+    finally:
+        if executor is not None:
+            # Queued reads are dropped, the few running ones are waited for so the scan index isn't committed
+            # while they write to it.
+            executor.shutdown(wait=True, cancel_futures=True)
+        if scan_index is not None:
+            # Stale directories can only be pruned when the whole tree was walked.
+            scan_index.commit(root_path if not (was_cancelled or pending_dirs) else None)
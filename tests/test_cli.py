@@ -0,0 +1,85 @@
+import io
+import json
+
+import pytest
+
+from file_utils import cli
+from synthetic_tree import make_teslacam_tree
+
+RECENT_MINUTES = 5
+SAVED_EVENTS = 2
+SENTRY_EVENTS = 3
+CLIPS_PER_EVENT = 2
+
+
+@pytest.fixture
+def drive(tmp_path, monkeypatch):
+    # The scan index and fingerprint cache go to the app's data directory.
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'data'))
+    root = tmp_path / 'drive'
+    make_teslacam_tree(root, recent_minutes=RECENT_MINUTES, saved_events=SAVED_EVENTS, sentry_events=SENTRY_EVENTS,
+                       clips_per_event=CLIPS_PER_EVENT, mode='tiny', missing_camera_rate=0)
+    return root
+
+
+def run(*argv) -> tuple:
+    out = io.StringIO()
+    exit_code = cli.main([str(arg) for arg in argv], out)
+    return exit_code, out.getvalue()
+
+
+def test_scan_writes_every_event(drive):
+    exit_code, output = run('scan', drive)
+    assert exit_code == 0
+    events = [json.loads(line) for line in output.splitlines()]
+    assert len(events) == RECENT_MINUTES + (SAVED_EVENTS + SENTRY_EVENTS) * CLIPS_PER_EVENT
+    assert {event['source'] for event in events} == {'RecentClips', 'SavedClips', 'SentryClips'}
+    assert all(event['integrity'] == 'complete' and len(event['cameras']) == 4 for event in events)
+    assert all(('event' in event) == (event['source'] != 'RecentClips') for event in events)
+    # The second scan lists the unchanged directories from the index.
+    assert sorted(run('scan', drive)[1].splitlines()) == sorted(output.splitlines())
+
+
+def test_stats_summarizes_the_drive(drive):
+    exit_code, output = run('stats', drive, '--no-index', '--probe')
+    assert exit_code == 0
+    stats = json.loads(output)
+    assert stats['events'] == RECENT_MINUTES + (SAVED_EVENTS + SENTRY_EVENTS) * CLIPS_PER_EVENT
+    assert stats['events_by_source'] == {'RecentClips': RECENT_MINUTES, 'SavedClips': SAVED_EVENTS * CLIPS_PER_EVENT,
+                                         'SentryClips': SENTRY_EVENTS * CLIPS_PER_EVENT}
+    assert stats['events_with_all_cameras'] == stats['events']
+    assert stats['events_by_integrity'] == {'complete': stats['events']}
+    assert stats['first_event'] == '2024-01-01T08:00:00'
+    assert stats['event_folders_by_reason'] == {'sentry_aware_object_detection': SENTRY_EVENTS,
+                                                'user_interaction_honk': SAVED_EVENTS}
+    assert stats['event_folders_by_city'] == {'Springfield': SAVED_EVENTS + SENTRY_EVENTS}
+    assert stats['truncated_events'] == 0
+
+
+def test_export_copies_the_selected_events_once(drive, tmp_path):
+    dest = tmp_path / 'export'
+    exit_code, output = run('export', drive, '--no-index', '--dest', dest, '--source', 'SentryClips')
+    assert exit_code == 0
+    report = json.loads(output)
+    assert report['events'] == SENTRY_EVENTS * CLIPS_PER_EVENT
+    assert report['copied'] == SENTRY_EVENTS * CLIPS_PER_EVENT * 4
+    assert report['errors'] == []
+    assert len(list(dest.rglob('*.mp4'))) == report['copied']
+
+    _, output = run('export', drive, '--no-index', '--dest', dest, '--source', 'SentryClips')
+    report = json.loads(output)
+    assert report['copied'] == 0
+    assert report['skipped'] == SENTRY_EVENTS * CLIPS_PER_EVENT * 4
+
+
+def test_export_reads_scan_output(drive, tmp_path):
+    _, output = run('scan', drive, '--no-index')
+    events_fpath = tmp_path / 'events.jsonl'
+    events_fpath.write_text(''.join(line + '\n' for line in output.splitlines()
+                                    if json.loads(line)['source'] == 'SavedClips'))
+    dest = tmp_path / 'export'
+    exit_code, output = run('export', '--events', events_fpath, '--dest', dest)
+    assert exit_code == 0
+    report = json.loads(output)
+    assert report['events'] == SAVED_EVENTS * CLIPS_PER_EVENT
+    assert report['copied'] == SAVED_EVENTS * CLIPS_PER_EVENT * 4
@@ -0,0 +1,137 @@
+import json
+import os
+
+from file_utils.copy_engine import (COPY_MANIFEST_FILE_NAME, PARTIAL_FILE_SUFFIX, PARTIAL_SOURCE_SUFFIX, CopyEngine,
+                                    CopyJob, make_liked_event_copy_jobs)
+
+CLIP_SIZE = 256 * 1024
+
+
+def write_clip(fpath, size: int = CLIP_SIZE, seed: int = 1) -> bytes:
+    data = bytes((seed * 31 + index * 7) % 251 for index in range(size))
+    os.makedirs(os.path.dirname(fpath), exist_ok=True)
+    with open(fpath, 'wb') as clip_file:
+        clip_file.write(data)
+    return data
+
+
+def write_part(job: CopyJob, data: bytes, source: dict = None) -> None:
+    os.makedirs(os.path.dirname(job.dst_fpath), exist_ok=True)
+    with open(job.dst_fpath + PARTIAL_FILE_SUFFIX, 'wb') as part_file:
+        part_file.write(data)
+    if source is not None:
+        with open(job.dst_fpath + PARTIAL_SOURCE_SUFFIX, 'w', encoding='utf-8') as source_file:
+            json.dump(source, source_file)
+
+
+def read(fpath) -> bytes:
+    with open(fpath, 'rb') as read_file:
+        return read_file.read()
+
+
+def source_of(fpath) -> dict:
+    src_stat = os.stat(fpath)
+    return {'src': str(fpath), 'size': src_stat.st_size, 'mtime_ns': src_stat.st_mtime_ns}
+
+
+def test_liked_events_are_copied_into_tagged_folders():
+    jobs = make_liked_event_copy_jobs([('2024-01-01_10-00-00', ['/clips/a-front.mp4'], 'near miss')], 'export')
+    assert jobs == [CopyJob('/clips/a-front.mp4', os.path.join('export', '2024-01-01_10-00-00_near-miss',
+                                                               'a-front.mp4'))]
+
+
+def test_copy_then_skip_identical_copies(tmp_path):
+    jobs = []
+    for seed in range(3):
+        src_fpath = tmp_path / 'src' / f'{seed}-front.mp4'
+        write_clip(src_fpath, seed=seed)
+        jobs.append(CopyJob(str(src_fpath), str(tmp_path / 'dst' / f'{seed}-front.mp4')))
+    report = CopyEngine().copy(jobs, str(tmp_path / 'dst'))
+    assert (report.copied, report.skipped, report.errors) == (3, 0, [])
+    assert all(read(job.dst_fpath) == read(job.src_fpath) for job in jobs)
+    report = CopyEngine().copy(jobs, str(tmp_path / 'dst'))
+    assert (report.copied, report.skipped, report.bytes_copied) == (0, 3, 0)
+
+
+def test_manifest_is_removed_once_complete(tmp_path):
+    src_fpath = tmp_path / 'src' / 'front.mp4'
+    write_clip(src_fpath)
+    jobs = [CopyJob(str(src_fpath), str(tmp_path / 'dst' / 'front.mp4')),
+            CopyJob(str(tmp_path / 'src' / 'missing.mp4'), str(tmp_path / 'dst' / 'missing.mp4'))]
+    report = CopyEngine().copy(jobs, str(tmp_path / 'dst'))
+    assert len(report.errors) == 1
+    assert (tmp_path / 'dst' / COPY_MANIFEST_FILE_NAME).exists()
+    report = CopyEngine().copy(jobs[:1], str(tmp_path / 'dst'))
+    assert report.errors == []
+    assert not (tmp_path / 'dst' / COPY_MANIFEST_FILE_NAME).exists()
+
+
+def test_copy_resumes_from_a_part_file_of_the_same_source(tmp_path):
+    src_fpath = tmp_path / 'src' / 'front.mp4'
+    data = write_clip(src_fpath)
+    job = CopyJob(str(src_fpath), str(tmp_path / 'dst' / 'front.mp4'))
+    write_part(job, data[:CLIP_SIZE // 4], source_of(src_fpath))
+    report = CopyEngine().copy([job])
+    assert report.bytes_copied == CLIP_SIZE - CLIP_SIZE // 4
+    assert read(job.dst_fpath) == data
+    assert not os.path.exists(job.dst_fpath + PARTIAL_FILE_SUFFIX)
+    assert not os.path.exists(job.dst_fpath + PARTIAL_SOURCE_SUFFIX)
+
+
+def test_copy_restarts_when_the_source_changed(tmp_path):
+    src_fpath = tmp_path / 'src' / 'front.mp4'
+    write_clip(src_fpath, seed=1)
+    job = CopyJob(str(src_fpath), str(tmp_path / 'dst' / 'front.mp4'))
+    old_source = source_of(src_fpath)
+    write_part(job, read(src_fpath)[:CLIP_SIZE // 2], old_source)
+    data = write_clip(src_fpath, seed=2)
+    os.utime(src_fpath, ns=(old_source['mtime_ns'] + 10 ** 9, old_source['mtime_ns'] + 10 ** 9))
+    report = CopyEngine().copy([job])
+    assert report.bytes_copied == CLIP_SIZE
+    assert read(job.dst_fpath) == data
+
+
+def test_copy_restarts_a_part_file_without_its_source(tmp_path):
+    src_fpath = tmp_path / 'src' / 'front.mp4'
+    data = write_clip(src_fpath)
+    job = CopyJob(str(src_fpath), str(tmp_path / 'dst' / 'front.mp4'))
+    write_part(job, b'\0' * (CLIP_SIZE // 2))
+    report = CopyEngine().copy([job])
+    assert report.bytes_copied == CLIP_SIZE
+    assert read(job.dst_fpath) == data
+
+
+def test_cancelled_copy_keeps_its_manifest(tmp_path):
+    src_fpath = tmp_path / 'src' / 'front.mp4'
+    write_clip(src_fpath)
+    job = CopyJob(str(src_fpath), str(tmp_path / 'dst' / 'front.mp4'))
+    report = CopyEngine(is_cancelled=lambda: True).copy([job], str(tmp_path / 'dst'))
+    assert report.was_cancelled
+    assert report.copied == 0
+    assert not os.path.exists(job.dst_fpath)
+    assert (tmp_path / 'dst' / COPY_MANIFEST_FILE_NAME).exists()
+
+
+def test_copy_and_resume_without_kernel_copies(tmp_path, monkeypatch):
+    # Off Linux only the read and write loop is left.
+    for name in ('pread', 'copy_file_range', 'sendfile'):
+        monkeypatch.delattr(os, name, raising=False)
+    monkeypatch.setattr('file_utils.copy_engine._try_reflink', lambda src_fd, dst_fd: False)
+    src_fpath = tmp_path / 'src' / 'front.mp4'
+    data = write_clip(src_fpath)
+    jobs = [CopyJob(str(src_fpath), str(tmp_path / 'dst' / 'front.mp4'))]
+    write_part(jobs[0], data[:1000], source_of(src_fpath))
+    report = CopyEngine().copy(jobs, str(tmp_path / 'dst'))
+    assert (report.copied, report.errors, report.bytes_copied) == (1, [], CLIP_SIZE - 1000)
+    assert read(jobs[0].dst_fpath) == data
+
+
+def test_unwritable_manifest_is_reported(tmp_path):
+    src_fpath = tmp_path / 'src' / 'front.mp4'
+    write_clip(src_fpath)
+    # A directory where the manifest goes can't be opened for appending, even as root.
+    (tmp_path / 'dst' / COPY_MANIFEST_FILE_NAME).mkdir(parents=True)
+    jobs = [CopyJob(str(src_fpath), str(tmp_path / 'dst' / 'front.mp4'))]
+    report = CopyEngine().copy(jobs, str(tmp_path / 'dst'))
+    assert report.copied == 1
+    assert len(report.errors) == 1 and 'manifest' in report.errors[0]
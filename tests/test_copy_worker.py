@@ -0,0 +1,19 @@
+from file_utils.copy_engine import CopyEngine, CopyJob
+from ui.copy_worker import CopyThread
+
+
+def test_copy_finished_is_emitted_when_the_copy_fails(qapp, tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'data'))
+
+    def failing_copy(self, jobs, manifest_dir=None):
+        raise PermissionError(13, 'Permission denied', manifest_dir)
+    monkeypatch.setattr(CopyEngine, 'copy', failing_copy)
+    copy_thread = CopyThread([CopyJob(str(tmp_path / 'front.mp4'), str(tmp_path / 'dst' / 'front.mp4'))],
+                             str(tmp_path / 'dst'))
+    reports = []
+    copy_thread.copy_finished.connect(reports.append)
+    # Run on this thread so the signal is delivered directly.
+    copy_thread.run()
+    assert len(reports) == 1
+    assert reports[0].copied == 0
+    assert 'Permission denied' in reports[0].errors[0]
@@ -0,0 +1,101 @@
+import os
+
+from file_utils.copy_engine import CopyJob
+from file_utils.dedup import SAMPLE_BLOCK_SIZE, FingerprintCache, drop_duplicate_copy_jobs, find_duplicates
+
+CLIP_SIZE = 8 * SAMPLE_BLOCK_SIZE
+# Between the first and second sampled blocks, so only a full hash sees a change here.
+UNSAMPLED_OFFSET = SAMPLE_BLOCK_SIZE + 1000
+
+
+def write_clip(fpath, size: int = CLIP_SIZE, changed_offset: int = None) -> str:
+    data = bytearray(index % 251 for index in range(size))
+    if changed_offset is not None:
+        data[changed_offset] ^= 0xFF
+    os.makedirs(os.path.dirname(fpath), exist_ok=True)
+    with open(fpath, 'wb') as clip_file:
+        clip_file.write(data)
+    return str(fpath)
+
+
+def test_files_of_different_sizes_are_not_read(tmp_path):
+    fpaths = [write_clip(tmp_path / 'a.mp4'), write_clip(tmp_path / 'b.mp4', size=CLIP_SIZE - 1)]
+    report = find_duplicates(fpaths)
+    assert report.groups == []
+    assert report.files_hashed == 0
+
+
+def test_sample_hash_tells_apart_files_of_equal_size(tmp_path):
+    fpaths = [write_clip(tmp_path / 'a.mp4'), write_clip(tmp_path / 'b.mp4', changed_offset=0)]
+    report = find_duplicates(fpaths)
+    assert report.groups == []
+    # Sample hashes only.
+    assert report.files_hashed == 2
+    assert report.bytes_hashed < 2 * CLIP_SIZE
+
+
+def test_full_hash_tells_apart_files_with_equal_samples(tmp_path):
+    fpaths = [write_clip(tmp_path / 'a.mp4'), write_clip(tmp_path / 'b.mp4', changed_offset=UNSAMPLED_OFFSET)]
+    report = find_duplicates(fpaths)
+    assert report.groups == []
+    assert report.files_hashed == 4
+
+
+def test_identical_files_keep_the_saved_copy(tmp_path):
+    recent_fpath = write_clip(tmp_path / 'TeslaCam' / 'RecentClips' / 'front.mp4')
+    saved_fpath = write_clip(tmp_path / 'TeslaCam' / 'SavedClips' / 'event' / 'front.mp4')
+    report = find_duplicates([recent_fpath, saved_fpath])
+    assert [group.fpaths for group in report.groups] == [[saved_fpath, recent_fpath]]
+    assert report.reclaimable_bytes == CLIP_SIZE
+    assert report.kept_fpaths() == {recent_fpath: saved_fpath}
+
+
+def test_hard_links_are_not_duplicates(tmp_path):
+    fpath = write_clip(tmp_path / 'a.mp4')
+    os.link(fpath, tmp_path / 'b.mp4')
+    assert find_duplicates([fpath, str(tmp_path / 'b.mp4')]).groups == []
+
+
+def test_cached_hashes_are_not_read_again(tmp_path):
+    fpaths = [write_clip(tmp_path / 'a.mp4'), write_clip(tmp_path / 'b.mp4')]
+    cache = FingerprintCache(tmp_path / 'fingerprints.sqlite3')
+    assert len(find_duplicates(fpaths, cache).groups) == 1
+    report = find_duplicates(fpaths, cache)
+    assert len(report.groups) == 1
+    assert report.files_hashed == 0
+    cache.close()
+
+
+def test_identical_copy_jobs_to_one_file_are_dropped(tmp_path):
+    recent_fpath = write_clip(tmp_path / 'RecentClips' / 'front.mp4')
+    saved_fpath = write_clip(tmp_path / 'SavedClips' / 'event' / 'front.mp4')
+    other_fpath = write_clip(tmp_path / 'RecentClips' / 'back.mp4', size=100)
+    dst_fpath = str(tmp_path / 'export' / 'front.mp4')
+    jobs = [CopyJob(recent_fpath, dst_fpath), CopyJob(saved_fpath, dst_fpath),
+            CopyJob(other_fpath, str(tmp_path / 'export' / 'back.mp4'))]
+    kept_jobs, dropped = drop_duplicate_copy_jobs(jobs)
+    assert dropped == 1
+    assert kept_jobs == [jobs[0], jobs[2]]
+
+
+def test_hard_linked_copy_jobs_to_one_file_are_dropped(tmp_path):
+    fpath = write_clip(tmp_path / 'RecentClips' / 'front.mp4')
+    link_fpath = str(tmp_path / 'SavedClips' / 'front.mp4')
+    os.makedirs(os.path.dirname(link_fpath))
+    os.link(fpath, link_fpath)
+    dst_fpath = str(tmp_path / 'export' / 'front.mp4')
+    kept_jobs, dropped = drop_duplicate_copy_jobs([CopyJob(fpath, dst_fpath), CopyJob(link_fpath, dst_fpath)])
+    assert (kept_jobs, dropped) == ([CopyJob(fpath, dst_fpath)], 1)
+
+
+def test_different_copy_jobs_to_one_file_get_their_own_names(tmp_path):
+    recent_fpath = write_clip(tmp_path / 'RecentClips' / 'front.mp4')
+    saved_fpath = write_clip(tmp_path / 'SavedClips' / 'event' / 'front.mp4', changed_offset=UNSAMPLED_OFFSET)
+    sentry_fpath = write_clip(tmp_path / 'SentryClips' / 'event' / 'front.mp4', changed_offset=0)
+    dst_fpath = str(tmp_path / 'export' / 'front.mp4')
+    jobs = [CopyJob(recent_fpath, dst_fpath), CopyJob(saved_fpath, dst_fpath), CopyJob(sentry_fpath, dst_fpath)]
+    kept_jobs, dropped = drop_duplicate_copy_jobs(jobs)
+    assert dropped == 0
+    assert kept_jobs == [CopyJob(recent_fpath, dst_fpath),
+                         CopyJob(saved_fpath, str(tmp_path / 'export' / 'front_2.mp4')),
+                         CopyJob(sentry_fpath, str(tmp_path / 'export' / 'front_3.mp4'))]
@@ -0,0 +1,74 @@
+import datetime
+import os
+
+from file_utils.event_catalog import EventCatalog
+from file_utils.video_events import make_directory_events
+
+RECENT_DIR = '/TeslaCam/RecentClips'
+SAVED_DIR = '/TeslaCam/SavedClips/2024-01-01_10-02-30'
+
+
+def tesla_file_names(timestamp: str, camera_names=('front', 'back')) -> dict:
+    return {camera_name: f'{timestamp}-{camera_name}.mp4' for camera_name in camera_names}
+
+
+def test_adding_the_same_event_replaces_its_files():
+    catalog = EventCatalog()
+    catalog.add(RECENT_DIR, '2024-01-01_10-00-00', tesla_file_names('2024-01-01_10-00-00'), {'front': 10, 'back': 20})
+    generation = catalog.generation
+    event_row = catalog.add(RECENT_DIR, '2024-01-01_10-00-00', {'left_repeater': 'odd-name.mp4'})
+    assert len(catalog) == 1
+    assert event_row.row == 0
+    assert event_row.camera_names == ['left_repeater']
+    assert event_row.video_files == [f'{RECENT_DIR}/odd-name.mp4']
+    assert event_row.total_size == 0
+    assert catalog.generation > generation
+
+
+def test_same_minute_in_two_directories_is_two_events():
+    catalog = EventCatalog()
+    catalog.add(RECENT_DIR, '2024-01-01_10-00-00', tesla_file_names('2024-01-01_10-00-00'))
+    catalog.add(SAVED_DIR, '2024-01-01_10-00-00', tesla_file_names('2024-01-01_10-00-00'))
+    assert len(catalog) == 2
+    assert catalog.find('2024-01-01_10-00-00', SAVED_DIR).dir_path == SAVED_DIR
+    assert catalog.find('2024-01-01_10-00-00', RECENT_DIR).row == 0
+    assert [event_row.dir_path for event_row in catalog.find_all('2024-01-01_10-00-00')] == [RECENT_DIR, SAVED_DIR]
+    assert catalog.find('2024-01-01_10-00-00', '/TeslaCam/SentryClips') is None
+
+
+def test_every_event_is_found_after_the_hash_table_grows():
+    catalog = EventCatalog()
+    start_time = datetime.datetime(2024, 1, 1)
+    timestamps = [(start_time + datetime.timedelta(minutes=minute)).strftime('%Y-%m-%d_%H-%M-%S')
+                  for minute in range(1000)]
+    for timestamp in timestamps:
+        catalog.add(RECENT_DIR, timestamp, tesla_file_names(timestamp))
+    assert len(catalog) == 1000
+    assert [catalog.find(timestamp).row for timestamp in timestamps] == list(range(1000))
+    assert catalog.find('2023-12-31_23-59-00') is None
+
+
+def test_iter_sorted_after_out_of_order_adds():
+    catalog = EventCatalog()
+    for timestamp in ('2024-01-01_10-02-00', '2024-01-01_10-00-00', '2024-01-01_10-01-00'):
+        catalog.add(RECENT_DIR, timestamp, tesla_file_names(timestamp))
+    assert [event_row.timestamp for event_row in catalog.iter_sorted()] == [
+        '2024-01-01_10-00-00', '2024-01-01_10-01-00', '2024-01-01_10-02-00']
+
+
+def test_duration_is_unknown_until_set():
+    catalog = EventCatalog()
+    event_row = catalog.add(RECENT_DIR, '2024-01-01_10-00-00', tesla_file_names('2024-01-01_10-00-00'))
+    assert event_row.duration_ms is None
+    catalog.set_duration_ms(event_row.row, 59_000)
+    assert catalog.find('2024-01-01_10-00-00').duration_ms == 59_000
+
+
+def test_video_files_are_spelled_like_the_scanned_events(monkeypatch):
+    # Windows paths as the walk builds them, joined with backslashes onto a drive root given with a slash.
+    monkeypatch.setattr(os, 'sep', '\\')
+    for dir_path in ('E:/TeslaCam\\RecentClips', 'E:\\'):
+        event_data = make_directory_events(dir_path, list(tesla_file_names('2024-01-01_10-00-00').values()))[0]
+        catalog = EventCatalog()
+        assert catalog.add_event_data(event_data).video_files == event_data.video_files
+    assert event_data.video_files == ['E:/2024-01-01_10-00-00-back.mp4', 'E:/2024-01-01_10-00-00-front.mp4']
@@ -0,0 +1,76 @@
+import pytest
+
+from ui.event_list_view import IsLikedRole, VideoEventListView, VideoFilesRole
+
+
+@pytest.fixture
+def view(qapp):
+    view = VideoEventListView()
+    view.event_model.add_events([(f'2024-01-01_08-{row:02d}-00', [f'/clips/{row}-front.mp4']) for row in range(10)])
+    return view
+
+
+def shown_names(view) -> list:
+    model = view.model()
+    return [model.index(row).data() for row in range(model.rowCount())]
+
+
+def test_every_row_is_shown_without_a_filter(view):
+    assert view.model().rowCount() == 10
+
+
+def test_filtered_rows_are_shown_in_model_order(view):
+    view.set_row_filter([7, 2, 5])
+    assert shown_names(view) == ['2024-01-01_08-02-00', '2024-01-01_08-05-00', '2024-01-01_08-07-00']
+    view.set_row_filter(None)
+    assert view.model().rowCount() == 10
+
+
+def test_rows_added_while_filtered_are_shown_once_they_match(view):
+    view.set_row_filter([1])
+    view.event_model.add_events([('2024-01-01_09-00-00', []), ('2024-01-01_09-01-00', [])])
+    assert view.model().rowCount() == 1
+    view.set_row_filter([11], first_row=10)
+    assert shown_names(view) == ['2024-01-01_08-01-00', '2024-01-01_09-01-00']
+
+
+def test_rows_added_without_a_filter_are_shown(view):
+    view.event_model.add_events([('2024-01-01_09-00-00', [])])
+    assert view.model().rowCount() == 11
+
+
+def test_edits_and_clicks_reach_the_event_model_row(view):
+    view.set_row_filter([3, 8])
+    view.model().setData(view.model().index(1), True, IsLikedRole)
+    assert view.event_model.data(view.event_model.index(8), IsLikedRole)
+    clicked_rows = []
+    view.play_clicked.connect(clicked_rows.append)
+    view._delegate.play_clicked.emit(1)
+    assert clicked_rows == [8]
+
+
+def test_changes_to_shown_rows_are_forwarded(view):
+    view.set_row_filter([3, 8])
+    changed_rows = []
+    view.model().dataChanged.connect(lambda top_left, bottom_right, roles: changed_rows.append(top_left.row()))
+    view.event_model.update_event(8, ['/clips/new-front.mp4'])
+    view.event_model.update_event(4, ['/clips/new-front.mp4'])
+    assert changed_rows == [1]
+    assert view.model().index(1).data(VideoFilesRole) == ['/clips/new-front.mp4']
+
+
+def test_visible_rows_are_reported_as_event_model_rows(view):
+    view.resize(800, 2000)
+    view.set_row_filter([4, 6])
+    reported = []
+    view.visible_rows_changed.connect(reported.append)
+    view.emit_visible_rows()
+    assert sorted(reported[-1]) == [4, 6]
+
+
+def test_visible_rows_are_reported_with_their_video_files(view):
+    view.resize(800, 2000)
+    reported = []
+    view.visible_rows_changed.connect(reported.append)
+    view.emit_visible_rows()
+    assert reported[-1][0] == ['/clips/0-front.mp4']
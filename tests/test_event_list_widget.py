@@ -0,0 +1,42 @@
+import pytest
+from PySide6.QtWidgets import QLabel
+
+from ui.event_list_widget import ScrollableWidget
+
+
+@pytest.fixture
+def event_list(qapp):
+    event_list = ScrollableWidget()
+    event_list.add_widgets([QLabel(str(row)) for row in range(10)])
+    event_list.show()
+    yield event_list
+    event_list.deleteLater()
+
+
+def shown_rows(event_list) -> list:
+    layout = event_list.container_layout
+    return [row for row in range(layout.count()) if not layout.itemAt(row).widget().isHidden()]
+
+
+def test_added_widgets_are_shown(event_list):
+    assert shown_rows(event_list) == list(range(10))
+
+
+def test_filter_shows_only_the_given_rows(event_list):
+    event_list.set_row_filter([7, 2, 5])
+    assert shown_rows(event_list) == [2, 5, 7]
+    event_list.set_row_filter(None)
+    assert shown_rows(event_list) == list(range(10))
+
+
+def test_filter_from_a_row_leaves_earlier_rows(event_list):
+    event_list.set_row_filter([1])
+    event_list.add_widgets([QLabel('10'), QLabel('11')])
+    event_list.set_row_filter([11], first_row=10)
+    assert shown_rows(event_list) == [1, 11]
+
+
+def test_layout_is_enabled_after_filtering(event_list):
+    event_list.set_row_filter([3])
+    assert event_list.container_layout.isEnabled()
+    assert event_list.container.updatesEnabled()
@@ -0,0 +1,75 @@
+import datetime
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.event_catalog import EventCatalog
+from file_utils.event_metadata import EventMetadata
+from file_utils.event_query import EventFilter, EventQueryIndex, datetime_to_epoch
+
+RECENT_DIR = '/TeslaCam/RecentClips'
+SENTRY_DIR = '/TeslaCam/SentryClips/2024-01-01_10-02-30'
+
+
+def tesla_file_names(timestamp: str, camera_names=TESLAS_CAMERA_NAMES) -> dict:
+    return {camera_name: f'{timestamp}-{camera_name}.mp4' for camera_name in camera_names}
+
+
+def minute_timestamp(minute: int) -> str:
+    return (datetime.datetime(2024, 1, 1, 10) + datetime.timedelta(minutes=minute)).strftime('%Y-%m-%d_%H-%M-%S')
+
+
+def minute_epoch(minute: int) -> int:
+    return datetime_to_epoch(datetime.datetime(2024, 1, 1, 10) + datetime.timedelta(minutes=minute))
+
+
+def test_range_end_is_exclusive():
+    catalog = EventCatalog()
+    for minute in range(5):
+        catalog.add(RECENT_DIR, minute_timestamp(minute), tesla_file_names(minute_timestamp(minute)))
+    query_index = EventQueryIndex(catalog)
+    assert query_index.query(minute_epoch(1), minute_epoch(3)) == [1, 2]
+    assert query_index.query(minute_epoch(1), minute_epoch(1)) == []
+    assert query_index.query(end_epoch=minute_epoch(0)) == []
+    assert query_index.query(start_epoch=minute_epoch(4)) == [4]
+    event_filter = EventFilter(start=datetime.datetime(2024, 1, 1, 10, 1), end=datetime.datetime(2024, 1, 1, 10, 3))
+    assert query_index.filter_rows(event_filter) == [1, 2]
+    assert [query_index.matches(row, event_filter) for row in range(5)] == [False, True, True, False, False]
+
+
+def test_unsorted_appends_are_queried_in_time_order():
+    catalog = EventCatalog()
+    query_index = EventQueryIndex(catalog)
+    for minute in (0, 5, 10):
+        catalog.add(RECENT_DIR, minute_timestamp(minute), tesla_file_names(minute_timestamp(minute)))
+    assert query_index.query() == [0, 1, 2]
+    # Rows 3 and 4 are older than row 2, e.g. a second folder scanned after the first.
+    for minute in (7, 2):
+        catalog.add(RECENT_DIR, minute_timestamp(minute), tesla_file_names(minute_timestamp(minute)))
+    assert query_index.query() == [0, 4, 1, 3, 2]
+    assert query_index.query(minute_epoch(2), minute_epoch(8)) == [4, 1, 3]
+    assert query_index.time_range() == (datetime.datetime(2024, 1, 1, 10), datetime.datetime(2024, 1, 1, 10, 10))
+
+
+def test_buckets_are_merged_in_time_order():
+    catalog = EventCatalog()
+    catalog.add(RECENT_DIR, minute_timestamp(0), tesla_file_names(minute_timestamp(0)))
+    catalog.add(SENTRY_DIR, minute_timestamp(1), tesla_file_names(minute_timestamp(1), ('front',)))
+    catalog.add(RECENT_DIR, minute_timestamp(2), tesla_file_names(minute_timestamp(2)))
+    query_index = EventQueryIndex(catalog)
+    assert query_index.query() == [0, 1, 2]
+    assert query_index.query(sources=['SentryClips']) == [1]
+    assert query_index.query(all_cameras_only=True) == [0, 2]
+    assert query_index.source_counts() == {'RecentClips': 2, 'SentryClips': 1}
+
+
+def test_event_metadata_filters_match_the_folder():
+    catalog = EventCatalog()
+    catalog.add(RECENT_DIR, minute_timestamp(0), tesla_file_names(minute_timestamp(0)))
+    catalog.add(SENTRY_DIR, minute_timestamp(1), tesla_file_names(minute_timestamp(1)))
+    query_index = EventQueryIndex(catalog)
+    query_index.set_event_metadata(SENTRY_DIR, EventMetadata(
+        timestamp='', city='Oslo', latitude=59.9, longitude=10.7, reason='sentry_aware_object_detection',
+        camera='0'))
+    assert query_index.filter_rows(EventFilter(cities=('Oslo',))) == [1]
+    assert query_index.filter_rows(EventFilter(bounding_box=(59.0, 10.0, 60.0, 11.0))) == [1]
+    assert query_index.filter_rows(EventFilter(reasons=('user_interaction_honk',))) == []
+    assert not query_index.matches(0, EventFilter(cities=('Oslo',)))
@@ -0,0 +1,39 @@
+import json
+
+from file_utils.event_metadata import EVENT_JSON_FILE_NAME
+from file_utils.video_events import EVENT_COMPLETE, EVENT_PARTIAL, iter_video_event_batches
+from synthetic_mp4 import write_mp4
+from ui.folder_watcher import FolderWatcher
+
+
+def write_event(event_dir, timestamp, broken_camera=None) -> None:
+    event_dir.mkdir(parents=True, exist_ok=True)
+    for camera_name in ('front', 'back'):
+        fpath = event_dir / f'{timestamp}-{camera_name}.mp4'
+        if camera_name == broken_camera:
+            fpath.write_bytes(b'\0' * 64)
+        else:
+            write_mp4(fpath, mdat_size=1024)
+
+
+def test_changed_directories_get_the_scans_metadata_and_checks(qapp, tmp_path):
+    saved_clips = tmp_path / 'SavedClips'
+    saved_clips.mkdir()
+    watcher = FolderWatcher(debounce_ms=0)
+    watcher.watch([str(saved_clips)])
+    received = []
+    watcher.events_changed.connect(received.extend)
+
+    event_dir = saved_clips / '2024-01-01_08-00-00'
+    write_event(event_dir, '2024-01-01_08-00-00')
+    write_event(event_dir, '2024-01-01_08-01-00', broken_camera='back')
+    (event_dir / EVENT_JSON_FILE_NAME).write_text(json.dumps({'city': 'Oslo', 'reason': 'user_interaction_honk'}))
+    watcher._on_directory_changed(str(saved_clips))
+    watcher._read_changed_dirs()
+
+    scanned = [event_data for batch in iter_video_event_batches(saved_clips) for event_data in batch]
+    assert [event_data.event_key for event_data in received] == [event_data.event_key for event_data in scanned]
+    assert [event_data.integrity for event_data in received] == [EVENT_COMPLETE, EVENT_PARTIAL]
+    assert [event_data.clip_problems for event_data in received] == [event_data.clip_problems for event_data in scanned]
+    assert {event_data.event_metadata.city for event_data in received} == {'Oslo'}
+    assert str(event_dir) in watcher._watcher.directories()
@@ -0,0 +1,115 @@
+import struct
+
+import pytest
+from synthetic_mp4 import box, full_box, write_mp4
+
+from file_utils.mp4_boxes import (Mp4ParseError, check_mp4_structure, nearest_keyframe_time, parse_mp4_metadata,
+                                  parse_video_track_tables, probe_mp4_files, step_frame_time)
+
+TIMESCALE = 1000
+SAMPLE_DELTA = 100
+# Open GOPs: every B frame is decoded after, and shown before, the frame decoded ahead of it.
+# Decode times 0..500, presentation times 200, 100, 400, 300, 600, 500.
+REORDERED_OFFSETS = [(1, 200), (1, 0), (1, 200), (1, 0), (1, 200), (1, 0)]
+
+
+def make_moov(sample_count: int, sync_samples=None, composition_offsets=None) -> bytes:
+    mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, TIMESCALE, sample_count * SAMPLE_DELTA) + b'\0' * 80)
+    mdhd = full_box(b'mdhd', struct.pack('>IIIIHH', 0, 0, TIMESCALE, sample_count * SAMPLE_DELTA, 0, 0))
+    hdlr = full_box(b'hdlr', struct.pack('>I4s', 0, b'vide') + b'\0' * 12 + b'VideoHandler\0')
+    stbl = full_box(b'stts', struct.pack('>III', 1, sample_count, SAMPLE_DELTA))
+    if sync_samples is not None:
+        stbl += full_box(b'stss', struct.pack('>I', len(sync_samples)) +
+                         b''.join(struct.pack('>I', sample) for sample in sync_samples))
+    if composition_offsets is not None:
+        stbl += full_box(b'ctts', struct.pack('>I', len(composition_offsets)) +
+                         b''.join(struct.pack('>Ii', *entry) for entry in composition_offsets))
+    mdia = box(b'mdia', mdhd + hdlr + box(b'minf', box(b'stbl', stbl)))
+    return box(b'moov', mvhd + box(b'trak', mdia))
+
+
+def test_frame_times_without_ctts_are_the_decode_times():
+    tables = parse_video_track_tables(make_moov(4, sync_samples=[1, 3]))
+    assert tables.frame_times_ms == [0, 100, 200, 300]
+    assert tables.keyframe_times_ms == [0, 200]
+
+
+def test_frame_times_with_ctts_start_at_the_first_presented_frame():
+    tables = parse_video_track_tables(make_moov(6, sync_samples=[1, 5], composition_offsets=REORDERED_OFFSETS))
+    assert tables.frame_times_ms == [0, 100, 200, 300, 400, 500]
+
+
+def test_keyframe_times_with_ctts_are_on_the_frame_timeline():
+    tables = parse_video_track_tables(make_moov(6, sync_samples=[1, 5], composition_offsets=REORDERED_OFFSETS))
+    # The keyframes are presented at 200 and 600, the first frame at 100.
+    assert tables.keyframe_times_ms == [100, 500]
+    assert set(tables.keyframe_times_ms) <= set(tables.frame_times_ms)
+
+
+def test_every_sample_is_a_keyframe_without_stss():
+    tables = parse_video_track_tables(make_moov(6, composition_offsets=REORDERED_OFFSETS))
+    assert tables.sync_samples == []
+    assert tables.keyframe_times_ms == tables.frame_times_ms
+
+
+def test_sync_samples_past_the_last_sample_are_ignored():
+    tables = parse_video_track_tables(make_moov(4, sync_samples=[1, 3, 9]))
+    assert tables.keyframe_times_ms == [0, 200]
+
+
+def test_moov_without_a_video_track_is_an_error():
+    with pytest.raises(Mp4ParseError):
+        parse_video_track_tables(box(b'moov', full_box(b'mvhd', b'\0' * 96)))
+
+
+def test_metadata_reads_the_duration_and_frame_count():
+    metadata = parse_mp4_metadata(make_moov(6))
+    assert (metadata.duration_ms, metadata.frame_count) == (600, 6)
+
+
+def test_nearest_keyframe_time():
+    assert nearest_keyframe_time([0, 1000, 2000], 1400) == 1000
+    assert nearest_keyframe_time([0, 1000, 2000], 1600) == 2000
+    assert nearest_keyframe_time([0, 1000, 2000], 5000) == 2000
+    assert nearest_keyframe_time([], 1234) == 1234
+
+
+def test_step_frame_time_is_clamped_to_the_clip():
+    frame_times_ms = [0, 28, 56, 84]
+    assert step_frame_time(frame_times_ms, 30, 1) == 56
+    assert step_frame_time(frame_times_ms, 30, -1) == 0
+    assert step_frame_time(frame_times_ms, 30, 10) == 84
+    assert step_frame_time(frame_times_ms, 0, -10) == 0
+
+
+def test_structure_check(tmp_path):
+    sound_fpath = tmp_path / 'sound.mp4'
+    write_mp4(sound_fpath, mdat_size=1024)
+    assert check_mp4_structure(sound_fpath) is None
+    empty_fpath = tmp_path / 'empty.mp4'
+    empty_fpath.write_bytes(b'')
+    assert check_mp4_structure(empty_fpath) == 'Empty file'
+    # Cut while recording: the mdat runs past the end of the file and the moov was never written.
+    cut_fpath = tmp_path / 'cut.mp4'
+    cut_fpath.write_bytes(sound_fpath.read_bytes()[:600])
+    assert check_mp4_structure(cut_fpath) is not None
+
+
+def test_probe_without_pread(tmp_path, monkeypatch):
+    # Windows has no os.pread.
+    monkeypatch.delattr('os.pread', raising=False)
+    fpaths = [tmp_path / f'{i}.mp4' for i in range(2)]
+    for fpath in fpaths:
+        write_mp4(fpath, mdat_size=1024, moov=make_moov(6))
+    metadata = probe_mp4_files(fpaths)
+    assert [(metadata[str(fpath)].duration_ms, metadata[str(fpath)].frame_count) for fpath in fpaths] == [(600, 6)] * 2
+
+
+def test_structure_check_without_pread(tmp_path, monkeypatch):
+    monkeypatch.delattr('os.pread', raising=False)
+    sound_fpath = tmp_path / 'sound.mp4'
+    write_mp4(sound_fpath, mdat_size=1024)
+    assert check_mp4_structure(sound_fpath) is None
+    cut_fpath = tmp_path / 'cut.mp4'
+    cut_fpath.write_bytes(sound_fpath.read_bytes()[:600])
+    assert check_mp4_structure(cut_fpath) is not None
@@ -0,0 +1,49 @@
+import pytest
+
+from file_utils.playback_drift import RATE_CORRECTION, RESYNC, WITHIN_TOLERANCE, correct_drift
+
+
+def correct(drift_ms: int, master_rate: float = 1.0):
+    return correct_drift(drift_ms, master_rate, tolerance_ms=25, resync_threshold_ms=300, max_rate_adjustment=0.05,
+                         correction_ms=1000)
+
+
+@pytest.mark.parametrize('drift_ms', [0, 25, -25])
+def test_drift_within_tolerance_plays_at_the_master_rate(drift_ms):
+    assert correct(drift_ms) == (WITHIN_TOLERANCE, 1.0)
+
+
+def test_follower_ahead_is_slowed_in_proportion_to_its_drift():
+    kind, rate = correct(40)
+    assert kind == RATE_CORRECTION
+    assert rate == pytest.approx(0.96)
+
+
+def test_follower_behind_is_sped_up():
+    kind, rate = correct(-40)
+    assert kind == RATE_CORRECTION
+    assert rate == pytest.approx(1.04)
+
+
+def test_rate_adjustment_is_capped():
+    assert correct(250).rate == pytest.approx(0.95)
+    assert correct(-250).rate == pytest.approx(1.05)
+
+
+@pytest.mark.parametrize('drift_ms', [300, -300, 5000])
+def test_large_drift_is_resynced_at_the_master_rate(drift_ms):
+    assert correct(drift_ms) == (RESYNC, 1.0)
+
+
+def test_thresholds_scale_with_fast_playback():
+    # 100 ms of media time is a 25 ms lag in wall time at 4x.
+    assert correct(100, master_rate=4.0) == (WITHIN_TOLERANCE, 4.0)
+    assert correct(1000, master_rate=4.0).kind == RATE_CORRECTION
+    assert correct(1200, master_rate=4.0) == (RESYNC, 4.0)
+    kind, rate = correct(200, master_rate=4.0)
+    assert rate == pytest.approx(4.0 * (1 - 200 / 4000))
+
+
+def test_thresholds_are_not_shrunk_by_slow_playback():
+    assert correct(25, master_rate=0.5) == (WITHIN_TOLERANCE, 0.5)
+    assert correct(299, master_rate=0.5).kind == RATE_CORRECTION
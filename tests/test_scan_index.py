@@ -0,0 +1,127 @@
+import os
+import time
+
+import pytest
+
+import file_utils.scan_index
+from file_utils.scan_index import ScanIndex
+from file_utils.video_events import iter_video_event_batches
+from synthetic_mp4 import write_mp4
+
+
+def age(*paths) -> None:
+    """Move mtimes out of the FAT resolution window, which the index doesn't trust."""
+    old = time.time() - 60
+    for path in paths:
+        os.utime(path, (old, old))
+
+
+@pytest.fixture
+def drive(tmp_path):
+    event_dir = tmp_path / 'drive' / 'SavedClips' / '2024-01-01_08-00-00'
+    event_dir.mkdir(parents=True)
+    write_mp4(event_dir / '2024-01-01_08-00-00-front.mp4', mdat_size=1024)
+    (event_dir / '2024-01-01_08-00-00-back.mp4').touch()
+    age(event_dir, event_dir.parent, event_dir.parent.parent)
+    return event_dir
+
+
+def count_checks(monkeypatch) -> list:
+    checked = []
+    check_mp4_structure = file_utils.scan_index.check_mp4_structure
+
+    def counting_check(fpath):
+        checked.append(os.path.basename(fpath))
+        return check_mp4_structure(fpath)
+    monkeypatch.setattr(file_utils.scan_index, 'check_mp4_structure', counting_check)
+    return checked
+
+
+def scan(db_path, drive, fpaths) -> dict:
+    scan_index = ScanIndex(db_path)
+    scan_index.load(drive)
+    scan_index.list_directory(os.fspath(drive))
+    problems = {os.path.basename(fpath): scan_index.check_clip(os.fspath(fpath)) for fpath in fpaths}
+    scan_index.commit(drive)
+    scan_index.close()
+    return problems
+
+
+def test_unchanged_directories_are_listed_from_the_index(tmp_path, drive):
+    db_path = tmp_path / 'index.sqlite3'
+    for expected_hits in (0, 1):
+        scan_index = ScanIndex(db_path)
+        scan_index.load(drive)
+        assert scan_index.list_directory(os.fspath(drive))[1] == sorted(os.listdir(drive))
+        assert scan_index.hits == expected_hits
+        scan_index.commit(drive)
+        scan_index.close()
+
+
+def test_a_changed_directory_is_read_again(tmp_path, drive):
+    db_path = tmp_path / 'index.sqlite3'
+    scan(db_path, drive, [])
+    (drive / '2024-01-01_08-00-00-left_repeater.mp4').touch()
+    age(drive)
+    scan_index = ScanIndex(db_path)
+    scan_index.load(drive)
+    assert '2024-01-01_08-00-00-left_repeater.mp4' in scan_index.list_directory(os.fspath(drive))[1]
+    assert scan_index.misses == 1
+    scan_index.close()
+
+
+def test_unchanged_clips_are_not_checked_again(tmp_path, drive, monkeypatch):
+    checked = count_checks(monkeypatch)
+    db_path = tmp_path / 'index.sqlite3'
+    fpaths = sorted(drive.iterdir())
+    first_problems = scan(db_path, drive, fpaths)
+    assert first_problems == {'2024-01-01_08-00-00-back.mp4': 'Empty file', '2024-01-01_08-00-00-front.mp4': None}
+    checked.clear()
+    assert scan(db_path, drive, fpaths) == first_problems
+    assert checked == []
+
+
+def test_a_clip_which_grew_is_checked_again(tmp_path, drive, monkeypatch):
+    checked = count_checks(monkeypatch)
+    db_path = tmp_path / 'index.sqlite3'
+    back_fpath = drive / '2024-01-01_08-00-00-back.mp4'
+    scan(db_path, drive, [back_fpath])
+    # The car finished writing the clip, which doesn't change the directory's mtime.
+    write_mp4(back_fpath, mdat_size=1024)
+    age(drive)
+    checked.clear()
+    assert scan(db_path, drive, [back_fpath]) == {'2024-01-01_08-00-00-back.mp4': None}
+    assert checked == ['2024-01-01_08-00-00-back.mp4']
+
+
+def test_deleted_clips_are_forgotten(tmp_path, drive):
+    db_path = tmp_path / 'index.sqlite3'
+    fpaths = sorted(drive.iterdir())
+    scan(db_path, drive, fpaths)
+    scan(db_path, drive, fpaths[:1])
+    scan_index = ScanIndex(db_path)
+    scan_index.load(drive)
+    assert set(scan_index._clip_checks) == {os.fspath(fpaths[0])}
+    scan_index.close()
+
+
+def test_a_root_ending_with_a_separator_is_served_and_pruned(tmp_path, drive):
+    # e.g. a drive root like E:/ or /, picked to open a TeslaCam drive directly.
+    db_path = tmp_path / 'index.sqlite3'
+    root_path = os.path.join(os.fspath(drive.parent.parent), '')
+    for expected_hits in (0, 3):
+        scan_index = ScanIndex(db_path)
+        events = [event_data for batch in iter_video_event_batches(root_path, scan_index=scan_index)
+                  for event_data in batch]
+        assert len(events) == 1
+        assert scan_index.hits == expected_hits
+        scan_index.close()
+    for fpath in drive.iterdir():
+        fpath.unlink()
+    drive.rmdir()
+    age(drive.parent)
+    scan_index = ScanIndex(db_path)
+    list(iter_video_event_batches(root_path, scan_index=scan_index))
+    scan_index.load(root_path)
+    assert os.fspath(drive) not in scan_index._cache
+    scan_index.close()
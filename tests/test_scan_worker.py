@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+
+import ui.scan_worker
+from file_utils.scan_index import ScanIndex
+from synthetic_tree import make_teslacam_tree
+from ui.scan_worker import DirectoryScanThread
+
+
+class FailingExecutor(object):
+    """Fails on the first batch, like an error partway through a scan."""
+    def __init__(self, max_workers: int) -> None:
+        pass
+
+    def submit(self, fn, *args):
+        raise RuntimeError('probe failed')
+
+    def shutdown(self, wait: bool, cancel_futures: bool) -> None:
+        pass
+
+
+def test_scan_index_is_committed_before_it_is_closed_when_the_scan_fails(tmp_path, monkeypatch):
+    make_teslacam_tree(tmp_path / 'drive', recent_minutes=20, saved_events=1, sentry_events=1)
+    db_path = tmp_path / 'scan_index.sqlite3'
+    monkeypatch.setattr(ui.scan_worker, 'ScanIndex', lambda: ScanIndex(db_path))
+    monkeypatch.setattr(ui.scan_worker, 'ThreadPoolExecutor', FailingExecutor)
+    scan_thread = DirectoryScanThread(tmp_path / 'drive')
+    with pytest.raises(RuntimeError, match='probe failed'):
+        scan_thread.run()
+    connection = sqlite3.connect(db_path)
+    assert connection.execute('SELECT COUNT(*) FROM directories').fetchone()[0] > 0
+    connection.close()
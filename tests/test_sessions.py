@@ -0,0 +1,79 @@
+from file_utils.event_catalog import EventCatalog
+from file_utils.sessions import NOMINAL_CLIP_DURATION_MS, DriveSessionIndex, make_drive_sessions
+
+RECENT_DIR = '/TeslaCam/RecentClips'
+SAVED_DIR = '/TeslaCam/SavedClips/2024-01-01_10-02-30'
+
+
+def add_clip(catalog: EventCatalog, dir_path: str, timestamp: str, duration_ms: int = None):
+    event_row = catalog.add(dir_path, timestamp, {'front': f'{timestamp}-front.mp4'})
+    catalog.set_duration_ms(event_row.row, duration_ms)
+    return event_row
+
+
+def never_read(video_files):
+    raise AssertionError(f'{video_files} should not be read')
+
+
+def test_consecutive_clips_make_one_session():
+    catalog = EventCatalog()
+    events = [add_clip(catalog, RECENT_DIR, timestamp, 59_000)
+              for timestamp in ('2024-01-01_10-01-00', '2024-01-01_10-00-00', '2024-01-01_10-02-00')]
+    sessions = make_drive_sessions(events, read_duration_ms=never_read)
+    assert len(sessions) == 1
+    assert [clip.start_ms for clip in sessions[0].clips] == [0, 59_000, 118_000]
+    assert sessions[0].locate(60_000) == (1, 1_000)
+
+
+def test_a_gap_starts_a_new_session():
+    catalog = EventCatalog()
+    events = [add_clip(catalog, RECENT_DIR, timestamp, 60_000)
+              for timestamp in ('2024-01-01_10-00-00', '2024-01-01_10-01-00', '2024-01-01_10-05-00')]
+    assert [len(session.clips) for session in make_drive_sessions(events)] == [2, 1]
+
+
+def test_unprobed_clips_use_the_nominal_duration_without_reading_files():
+    catalog = EventCatalog()
+    index = DriveSessionIndex()
+    index.add(add_clip(catalog, RECENT_DIR, '2024-01-01_10-00-00'))
+    index.add(add_clip(catalog, RECENT_DIR, '2024-01-01_10-01-00'))
+    session, clip_index = index.find((RECENT_DIR, '2024-01-01_10-01-00'))
+    assert clip_index == 1
+    assert session.duration_ms == 2 * NOMINAL_CLIP_DURATION_MS
+
+
+def test_index_is_keyed_by_directory():
+    catalog = EventCatalog()
+    index = DriveSessionIndex()
+    for timestamp in ('2024-01-01_10-00-00', '2024-01-01_10-01-00', '2024-01-01_10-02-00'):
+        index.add(add_clip(catalog, RECENT_DIR, timestamp))
+    index.add(add_clip(catalog, SAVED_DIR, '2024-01-01_10-02-00'))
+    recent_session, recent_clip_index = index.find((RECENT_DIR, '2024-01-01_10-02-00'))
+    saved_session, saved_clip_index = index.find((SAVED_DIR, '2024-01-01_10-02-00'))
+    assert (len(recent_session.clips), recent_clip_index) == (3, 2)
+    assert (len(saved_session.clips), saved_clip_index) == (1, 0)
+    assert index.find((SAVED_DIR, '2024-01-01_10-00-00')) == (None, -1)
+    assert index.find(('/TeslaCam/SentryClips', '2024-01-01_10-00-00')) == (None, -1)
+
+
+def test_probed_durations_update_the_session():
+    catalog = EventCatalog()
+    index = DriveSessionIndex()
+    first_event = add_clip(catalog, RECENT_DIR, '2024-01-01_10-00-00')
+    index.add(first_event)
+    index.add(add_clip(catalog, RECENT_DIR, '2024-01-01_10-01-00'))
+    session, _ = index.find((RECENT_DIR, '2024-01-01_10-01-00'))
+    assert session.clips[1].start_ms == NOMINAL_CLIP_DURATION_MS
+    catalog.set_duration_ms(first_event.row, 59_500)
+    index.add(first_event)
+    session, _ = index.find((RECENT_DIR, '2024-01-01_10-01-00'))
+    assert session.clips[1].start_ms == 59_500
+
+
+def test_added_clips_extend_their_directory_session():
+    catalog = EventCatalog()
+    index = DriveSessionIndex()
+    index.add(add_clip(catalog, RECENT_DIR, '2024-01-01_10-00-00'))
+    assert len(index.find((RECENT_DIR, '2024-01-01_10-00-00'))[0].clips) == 1
+    index.add(add_clip(catalog, RECENT_DIR, '2024-01-01_10-01-00'))
+    assert len(index.find((RECENT_DIR, '2024-01-01_10-00-00'))[0].clips) == 2
@@ -0,0 +1,54 @@
+from PySide6.QtCore import QSettings
+
+from file_utils.settings import AppSettings
+
+
+def read_file(fpath) -> QSettings:
+    return QSettings(str(fpath), QSettings.IniFormat)
+
+
+def test_changes_are_written_together_on_flush(qapp, tmp_path):
+    fpath = tmp_path / 'settings.ini'
+    settings = AppSettings(file_path=str(fpath))
+    settings.setValue('window/width', 800)
+    settings.setValue('window/height', 600)
+    assert settings.value('window/width') == 800
+    assert not read_file(fpath).contains('window/width')
+    settings.flush()
+    assert int(read_file(fpath).value('window/width')) == 800
+    assert int(read_file(fpath).value('window/height')) == 600
+
+
+def test_values_are_read_from_the_file_once(qapp, tmp_path):
+    fpath = tmp_path / 'settings.ini'
+    other = read_file(fpath)
+    other.setValue('playback/rate', '1.5')
+    other.sync()
+    settings = AppSettings(file_path=str(fpath))
+    assert settings.float_value('playback/rate') == 1.5
+    other.setValue('playback/rate', '2.0')
+    other.sync()
+    assert settings.float_value('playback/rate') == 1.5
+
+
+def test_typed_values_parse_ini_strings(qapp, tmp_path):
+    fpath = tmp_path / 'settings.ini'
+    settings = AppSettings(file_path=str(fpath))
+    settings.setValue('list/virtualized', True)
+    settings.setValue('sync/tolerance_ms', 80)
+    settings.flush()
+    reopened = AppSettings(file_path=str(fpath))
+    assert reopened.bool_value('list/virtualized') is True
+    assert reopened.int_value('sync/tolerance_ms') == 80
+    assert reopened.int_value('missing', 5) == 5
+    assert reopened.str_value('missing', 'default') == 'default'
+
+
+def test_removing_a_group_drops_its_cached_keys(qapp, tmp_path):
+    settings = AppSettings(file_path=str(tmp_path / 'settings.ini'))
+    settings.setValue('likes/a', True)
+    settings.setValue('likes/b', True)
+    settings.setValue('other', 1)
+    settings.remove('likes')
+    assert settings.value('likes/a') is None
+    assert settings.value('other') == 1
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from file_utils.updates import check_for_new_version
+from ui.update_worker import UpdateCheckThread
+
+
+class StubUpdateServer(object):
+    """Serves /version on localhost, answering with a status and body, after a delay."""
+    def __init__(self, status: int = 200, body: dict = None, delay: float = 0.0) -> None:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                time.sleep(stub.delay)
+                payload = json.dumps(stub.body).encode()
+                try:
+                    self.send_response(stub.status if self.path == '/version' else 404)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client timed out and closed the connection.
+                    pass
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.status = status
+        self.body = body if body is not None else {}
+        self.delay = delay
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.api_url = f'http://127.0.0.1:{self._server.server_port}'
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server():
+    stub = StubUpdateServer()
+    yield stub
+    stub.close()
+
+
+def test_newer_version_is_returned(server):
+    server.body = {'latest_version': '2.0.0'}
+    assert check_for_new_version('1.5.0', api_url=server.api_url, timeout=5) == '2.0.0'
+
+
+def test_same_or_older_version_is_not_an_update(server):
+    server.body = {'latest_version': '1.5.0'}
+    assert check_for_new_version('1.5.0', api_url=server.api_url, timeout=5) is False
+    server.body = {'latest_version': '1.4.9'}
+    assert check_for_new_version('1.5.0', api_url=server.api_url, timeout=5) is False
+
+
+def test_server_error_is_not_an_update(server):
+    server.status = 500
+    server.body = {'latest_version': '2.0.0'}
+    assert check_for_new_version('1.5.0', api_url=server.api_url, timeout=5) is False
+
+
+def test_slow_server_times_out(server):
+    server.body = {'latest_version': '2.0.0'}
+    server.delay = 1.0
+    start = time.perf_counter()
+    assert check_for_new_version('1.5.0', api_url=server.api_url, timeout=0.2) is False
+    assert time.perf_counter() - start < 0.9
+
+
+def test_update_check_thread_reports_the_newer_version(qapp, server):
+    server.body = {'latest_version': '99.0.0'}
+    update_check = UpdateCheckThread(api_url=server.api_url, timeout=5)
+    latest_versions = []
+    update_check.update_available.connect(latest_versions.append)
+    update_check.start()
+    assert update_check.wait(5)
+    qapp.processEvents()
+    assert latest_versions == ['99.0.0']
+
+
+def test_discarded_update_check_does_not_block_or_report(qapp, server):
+    server.body = {'latest_version': '99.0.0'}
+    server.delay = 1.0
+    update_check = UpdateCheckThread(api_url=server.api_url, timeout=5)
+    reported = []
+    update_check.update_available.connect(reported.append)
+    update_check.finished.connect(lambda: reported.append('finished'))
+    update_check.start()
+    start = time.perf_counter()
+    update_check.discard()
+    assert time.perf_counter() - start < 0.5
+    assert update_check.wait(5)
+    qapp.processEvents()
+    assert reported == []
+
+
+def test_update_check_discarded_after_it_ended_does_not_report(qapp, server):
+    server.body = {'latest_version': '99.0.0'}
+    update_check = UpdateCheckThread(api_url=server.api_url, timeout=5)
+    reported = []
+    update_check.update_available.connect(reported.append)
+    update_check.finished.connect(lambda: reported.append('finished'))
+    update_check.start()
+    assert update_check.wait(5)
+    # The window closed after the check ended but before its result reached the GUI thread.
+    update_check.discard()
+    qapp.processEvents()
+    assert reported == []
@@ -0,0 +1,56 @@
+"""A background thread which copies files with the copy engine without blocking the UI."""
+import logging
+from typing import List
+
+from PySide6.QtCore import QThread, Signal, QObject
+
+from file_utils.copy_engine import CopyEngine, CopyJob, CopyProgress, CopyReport
+from file_utils.dedup import FingerprintCache, drop_duplicate_copy_jobs
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CopyThread(QThread):
+    """Run a CopyEngine on a worker thread and report its progress to the UI."""
+    progress = Signal(object)
+    copy_finished = Signal(object)
+
+    def __init__(self, jobs: List[CopyJob], manifest_dir: str, parent: QObject=None) -> None:
+        """
+        Args:
+            jobs (List[CopyJob]): The files to copy.
+            manifest_dir (str): The directory the resume manifest is kept in, usually the export directory.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._jobs = jobs
+        self._manifest_dir = manifest_dir
+        self._is_cancelled = False
+
+    def cancel(self) -> None:
+        """Ask the copy to stop. Partially copied files are resumed by the next copy to the same directory."""
+        self._is_cancelled = True
+
+    def run(self) -> None:
+        """Copy the files, emitting progress with CopyProgress snapshots and copy_finished with a CopyReport."""
+        # The same clip liked in RecentClips and SavedClips would be copied to the same file twice. The cache's
+        # SQLite connection belongs to this thread.
+        try:
+            fingerprint_cache = FingerprintCache()
+            try:
+                jobs, _ = drop_duplicate_copy_jobs(self._jobs, fingerprint_cache)
+            finally:
+                fingerprint_cache.close()
+            engine = CopyEngine(progress_callback=self._emit_progress, is_cancelled=lambda: self._is_cancelled)
+            report = engine.copy(jobs, self._manifest_dir)
+        except Exception as e:
+            # copy_finished is always emitted, the window only leaves its copying state on it.
+            logger.exception(f'Copying to {self._manifest_dir} failed')
+            report = CopyReport(0, 0, [f'There was an error copying to {self._manifest_dir}: {e}'], 0, 0.0,
+                                self._is_cancelled)
+        self.copy_finished.emit(report)
+
+    def _emit_progress(self, progress: CopyProgress) -> None:
+        # Called from the engine's worker threads, the signal is queued to the GUI thread.
+        self.progress.emit(progress)
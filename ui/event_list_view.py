@@ -0,0 +1,553 @@
+"""A model/view event list which only paints the visible rows, for scans with tens of thousands of events."""
+import os
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple, Union
+
+from PySide6.QtWidgets import (
+    QWidget, QListView, QStyledItemDelegate, QStyleOptionViewItem, QLineEdit, QAbstractItemView, QSizePolicy)
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, Signal, QObject, QTimer)
+from PySide6.QtGui import QPainter, QColor, QFont, QMouseEvent, QPixmap, QPixmapCache
+
+from file_utils.thumbnails import THUMBNAIL_CAMERA_WIDTH, THUMBNAIL_CAMERA_HEIGHT
+
+EventNameRole = Qt.ItemDataRole.DisplayRole
+VideoFilesRole = Qt.ItemDataRole.UserRole + 1
+IsLikedRole = Qt.ItemDataRole.UserRole + 2
+FolderTagRole = Qt.ItemDataRole.UserRole + 3
+IsPlayingRole = Qt.ItemDataRole.UserRole + 4
+ThumbnailRole = Qt.ItemDataRole.UserRole + 5
+ClipProblemsRole = Qt.ItemDataRole.UserRole + 6
+# The event name badge of events with some broken clips, and with only broken clips.
+PARTIAL_EVENT_COLOR = '#d08000'
+CORRUPT_EVENT_COLOR = '#c02020'
+
+
+class VideoEventListModel(QAbstractListModel):
+    """Holds the scanned events along with their like and folder tag state in plain python lists."""
+    def __init__(self, parent: QObject=None) -> None:
+        """
+        Args:
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._event_names = []
+        self._video_files = []
+        self._is_liked = []
+        self._folder_tags = []
+        self._thumbnail_fpaths = {}
+        # What is wrong with each broken clip keyed by video file, for the few events which have any.
+        self._clip_problems = {}
+        self._playing_row = -1
+
+    @property
+    def playing_row(self) -> int:
+        """The row of the event which is playing.
+        Returns:
+            int: The row, -1 if no event is playing.
+        """
+        return self._playing_row
+
+    @playing_row.setter
+    def playing_row(self, row: int) -> None:
+        """Set the row of the event which is playing.
+        Args:
+            row (int): The row, -1 if no event is playing.
+        """
+        previous_row = self._playing_row
+        self._playing_row = row
+        for changed_row in (previous_row, row):
+            if 0 <= changed_row < len(self._event_names):
+                index = self.index(changed_row)
+                self.dataChanged.emit(index, index, [IsPlayingRole])
+
+    def rowCount(self, parent: QModelIndex=QModelIndex()) -> int:
+        """The number of events.
+        Args:
+            parent (QModelIndex, optional): Unused, list models have no children.
+        Returns:
+            int: The number of events.
+        """
+        if parent.isValid():
+            return 0
+        return len(self._event_names)
+
+    def data(self, index: QModelIndex, role: int=EventNameRole):
+        """Get an event's data.
+        Args:
+            index (QModelIndex): The event's index.
+            role (int, optional): One of the roles defined in this module. Defaults to EventNameRole.
+        Returns:
+            The data for the role or None.
+        """
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == EventNameRole:
+            return self._event_names[row]
+        if role == VideoFilesRole:
+            return self._video_files[row]
+        if role == IsLikedRole:
+            return self._is_liked[row]
+        if role in (FolderTagRole, Qt.ItemDataRole.EditRole):
+            return self._folder_tags[row]
+        if role == IsPlayingRole:
+            return row == self._playing_row
+        if role == ThumbnailRole:
+            return self._thumbnail_fpaths.get(row)
+        if role == ClipProblemsRole:
+            return self._clip_problems.get(row, {})
+        if role == Qt.ItemDataRole.ToolTipRole:
+            clip_problems = self._clip_problems.get(row)
+            if clip_problems:
+                return '\n'.join(f'{os.path.basename(video_fpath)}: {problem}'
+                                 for video_fpath, problem in clip_problems.items())
+        return None
+
+    def setData(self, index: QModelIndex, value, role: int=Qt.ItemDataRole.EditRole) -> bool:
+        """Set an event's like state or folder tag.
+        Args:
+            index (QModelIndex): The event's index.
+            value: The new value.
+            role (int, optional): IsLikedRole, FolderTagRole or EditRole. Defaults to EditRole.
+        Returns:
+            bool: True if the data was changed.
+        """
+        if not index.isValid():
+            return False
+        row = index.row()
+        if role == IsLikedRole:
+            self._is_liked[row] = bool(value)
+        elif role in (FolderTagRole, Qt.ItemDataRole.EditRole):
+            self._folder_tags[row] = str(value)
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        """Events can be selected and their folder tag edited.
+        Args:
+            index (QModelIndex): The event's index.
+        Returns:
+            Qt.ItemFlag: The item flags.
+        """
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def add_events(self, events: List[Tuple[str, List[str]]]) -> None:
+        """Append events with a single row insertion.
+        Args:
+            events (List[Tuple[str, List[str]]]): (event name, video files) pairs.
+        """
+        if not events:
+            return
+        first_row = len(self._event_names)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(events) - 1)
+        for event_name, video_files in events:
+            self._event_names.append(event_name)
+            self._video_files.append(video_files)
+            self._is_liked.append(False)
+            self._folder_tags.append("")
+        self.endInsertRows()
+
+    def update_event(self, row: int, video_files: List[str]) -> None:
+        """Replace an event's video files, e.g. when a camera's clip was written after the event was added.
+        Args:
+            row (int): The event's row.
+            video_files (List[str]): The event's video files.
+        """
+        if 0 <= row < len(self._event_names):
+            self._video_files[row] = video_files
+            # The thumbnail shows the previous video files.
+            self._thumbnail_fpaths.pop(row, None)
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [VideoFilesRole, ThumbnailRole])
+
+    def set_clip_problems(self, row: int, clip_problems: Dict[str, str]) -> None:
+        """Set what is wrong with an event's broken clips, which are badged and left out of playback.
+        Args:
+            row (int): The event's row.
+            clip_problems (Dict[str, str]): The problem keyed by video file, empty if no clip is broken.
+        """
+        if 0 <= row < len(self._event_names):
+            if clip_problems:
+                self._clip_problems[row] = clip_problems
+            elif self._clip_problems.pop(row, None) is None:
+                return
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [ClipProblemsRole])
+
+    def set_thumbnail(self, row: int, thumbnail_fpath: str) -> None:
+        """Set an event's thumbnail.
+        Args:
+            row (int): The event's row.
+            thumbnail_fpath (str): The thumbnail's image file.
+        """
+        if 0 <= row < len(self._event_names):
+            self._thumbnail_fpaths[row] = thumbnail_fpath
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [ThumbnailRole])
+
+
+class EventRowFilterModel(QAbstractListModel):
+    """Exposes only the filtered rows of a VideoEventListModel, in the model's order.
+
+    Changing the filter is one model reset however many rows it hides, where hiding rows in the view costs a
+    call per row. Without a filter every row is passed through as is. It is a list model rather than a
+    QAbstractProxyModel so the view's layout, which asks for every row's index, doesn't call into python for
+    each one.
+    """
+    def __init__(self, event_model: VideoEventListModel, parent: QObject=None) -> None:
+        """
+        Args:
+            event_model (VideoEventListModel): The model whose rows are filtered.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        # The shown event model rows in ascending order, None when every row is shown.
+        self._source_rows = None
+        # The view asks for the row count with every index it lays out, so it is kept rather than computed.
+        self._row_count = 0
+        self._event_model = event_model
+        event_model.rowsAboutToBeInserted.connect(self._on_rows_about_to_be_inserted)
+        event_model.rowsInserted.connect(self._on_rows_inserted)
+        event_model.dataChanged.connect(self._on_data_changed)
+        event_model.modelAboutToBeReset.connect(self.beginResetModel)
+        event_model.modelReset.connect(self._on_model_reset)
+
+    @property
+    def is_filtered(self) -> bool:
+        """Whether some rows may be hidden.
+        Returns:
+            bool: True if a row filter is set.
+        """
+        return self._source_rows is not None
+
+    def set_row_filter(self, rows: Union[Iterable[int], None], first_row: int=0) -> None:
+        """Show only some of the event model's rows.
+        Args:
+            rows (Union[Iterable[int], None]): The event model rows to show, None shows every row.
+            first_row (int, optional): Only rows from this one on are shown or hidden, e.g. just added rows.
+                Defaults to 0.
+        """
+        if first_row > 0 and self._source_rows is not None:
+            # Just added rows, which are after every shown row.
+            added_rows = sorted(row for row in rows if row >= first_row) if rows is not None else range(
+                first_row, self._event_model.rowCount())
+            kept_count = bisect_left(self._source_rows, first_row)
+            if kept_count < len(self._source_rows):
+                self.beginRemoveRows(QModelIndex(), kept_count, len(self._source_rows) - 1)
+                del self._source_rows[kept_count:]
+                self._row_count = kept_count
+                self.endRemoveRows()
+            if added_rows:
+                self.beginInsertRows(QModelIndex(), kept_count, kept_count + len(added_rows) - 1)
+                self._source_rows.extend(added_rows)
+                self._row_count = len(self._source_rows)
+                self.endInsertRows()
+            return
+        self.beginResetModel()
+        if rows is None and first_row == 0:
+            self._source_rows = None
+        else:
+            shown_rows = sorted(row for row in rows if row >= first_row) if rows is not None else range(
+                first_row, self._event_model.rowCount())
+            self._source_rows = list(range(first_row)) + list(shown_rows)
+        self._row_count = len(self._source_rows) if self._source_rows is not None else self._event_model.rowCount()
+        self.endResetModel()
+
+    def source_row(self, row: int) -> int:
+        """Get the event model row of a shown row.
+        Args:
+            row (int): The shown row.
+        Returns:
+            int: The event model row.
+        """
+        return self._source_rows[row] if self._source_rows is not None else row
+
+    def rowCount(self, parent: QModelIndex=QModelIndex()) -> int:
+        """The number of shown events.
+        Args:
+            parent (QModelIndex, optional): Unused, list models have no children.
+        Returns:
+            int: The number of shown events.
+        """
+        return 0 if parent.isValid() else self._row_count
+
+    def data(self, index: QModelIndex, role: int=EventNameRole):
+        """Get a shown event's data from the event model, see VideoEventListModel.data."""
+        if not index.isValid():
+            return None
+        return self._event_model.data(self._source_index(index), role)
+
+    def setData(self, index: QModelIndex, value, role: int=Qt.ItemDataRole.EditRole) -> bool:
+        """Set a shown event's data in the event model, see VideoEventListModel.setData."""
+        if not index.isValid():
+            return False
+        return self._event_model.setData(self._source_index(index), value, role)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        """The event model's item flags, see VideoEventListModel.flags."""
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return self._event_model.flags(self._source_index(index))
+
+    def _source_index(self, index: QModelIndex) -> QModelIndex:
+        return self._event_model.index(self.source_row(index.row()))
+
+    def _shown_row(self, source_row: int) -> int:
+        if self._source_rows is None:
+            return source_row
+        row = bisect_left(self._source_rows, source_row)
+        if row < len(self._source_rows) and self._source_rows[row] == source_row:
+            return row
+        return -1
+
+    def _on_rows_about_to_be_inserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        # While filtered, added rows stay hidden until the filter is applied to them.
+        if self._source_rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_rows_inserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        if self._source_rows is None:
+            self._row_count = self._event_model.rowCount()
+            self.endInsertRows()
+
+    def _on_model_reset(self) -> None:
+        self._source_rows = None
+        self._row_count = self._event_model.rowCount()
+        self.endResetModel()
+
+    def _on_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles: List[int]) -> None:
+        if self._source_rows is None:
+            self.dataChanged.emit(self.index(top_left.row()), self.index(bottom_right.row()), roles)
+            return
+        for source_row in range(top_left.row(), bottom_right.row() + 1):
+            row = self._shown_row(source_row)
+            if row != -1:
+                self.dataChanged.emit(self.index(row), self.index(row), roles)
+
+
+class VideoEventItemDelegate(QStyledItemDelegate):
+    """Paints an event row to look like a VideoEventWidget without creating any widgets for it."""
+    play_clicked = Signal(int)
+    tag_clicked = Signal(QModelIndex)
+    row_height = 2 * THUMBNAIL_CAMERA_HEIGHT + 8
+
+    def __init__(self, parent: QObject=None) -> None:
+        """
+        Args:
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._font = QFont()
+        self._font.setPixelSize(14)
+        self._button_color = QColor('#0078d7')
+        self._background_color = QColor('#f0f0f0')
+        self._partial_color = QColor(PARTIAL_EVENT_COLOR)
+        self._corrupt_color = QColor(CORRUPT_EVENT_COLOR)
+
+    def row_rects(self, rect: QRect) -> dict:
+        """Split a row into the rectangles of its label, buttons and tag field.
+        Args:
+            rect (QRect): The row's rectangle.
+        Returns:
+            dict: The rectangle of each part, keyed by name.
+        """
+        rects = {'thumbnail': QRect(rect.left() + 2, rect.top() + 4, 2 * THUMBNAIL_CAMERA_WIDTH,
+                                    2 * THUMBNAIL_CAMERA_HEIGHT)}
+        top = rect.top() + (rect.height() - 28) // 2
+        height = 28
+        left = rects['thumbnail'].right() + 6
+        for name, width in (('label', 170), ('play', 60), ('like', 36), ('tag_label', 130), ('tag', 150)):
+            rects[name] = QRect(left, top, width, height)
+            left += width + 6
+        return rects
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
+        """Every row has the same size so the view can lay rows out without asking for each one.
+        Returns:
+            QSize: The row size.
+        """
+        rects = self.row_rects(QRect(0, 0, 0, self.row_height))
+        return QSize(rects['tag'].right() + 4, self.row_height)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        """Paint an event row.
+        Args:
+            painter (QPainter): The painter.
+            option (QStyleOptionViewItem): The style options, including the row's rectangle.
+            index (QModelIndex): The event's index.
+        """
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self._font)
+        painter.fillRect(option.rect, self._background_color)
+        rects = self.row_rects(option.rect)
+        thumbnail_fpath = index.data(ThumbnailRole)
+        if thumbnail_fpath:
+            # QPixmapCache keeps the decoded thumbnails of recently painted rows.
+            pixmap = QPixmapCache.find(thumbnail_fpath)
+            if pixmap is None or pixmap.isNull():
+                pixmap = QPixmap(thumbnail_fpath)
+                QPixmapCache.insert(thumbnail_fpath, pixmap)
+            painter.drawPixmap(rects['thumbnail'], pixmap)
+        else:
+            painter.fillRect(rects['thumbnail'], QColor('black'))
+        painter.setPen(Qt.PenStyle.NoPen)
+        for name in ('label', 'play', 'like', 'tag_label'):
+            painter.setBrush(self._button_color)
+            painter.drawRoundedRect(rects[name], 4, 4)
+        clip_problems = index.data(ClipProblemsRole)
+        if clip_problems:
+            # Badge events with broken clips, red when none of the clips can be played.
+            is_corrupt = len(clip_problems) >= len(index.data(VideoFilesRole))
+            painter.setBrush(self._corrupt_color if is_corrupt else self._partial_color)
+            painter.drawRoundedRect(rects['label'], 4, 4)
+        painter.setBrush(QColor('white'))
+        painter.drawRoundedRect(rects['tag'], 4, 4)
+        painter.setPen(QColor('white'))
+        painter.drawText(rects['label'], Qt.AlignmentFlag.AlignCenter, index.data(EventNameRole))
+        play_text = "Pause" if index.data(IsPlayingRole) else "Play"
+        painter.drawText(rects['play'], Qt.AlignmentFlag.AlignCenter, play_text)
+        painter.drawText(rects['tag_label'], Qt.AlignmentFlag.AlignCenter, "Event's Folder Tag")
+        painter.setPen(QColor('red') if index.data(IsLikedRole) else QColor('white'))
+        painter.drawText(rects['like'], Qt.AlignmentFlag.AlignCenter, "\u2764")
+        painter.setPen(QColor('black'))
+        painter.drawText(rects['tag'].adjusted(4, 0, -4, 0), Qt.AlignmentFlag.AlignVCenter,
+                         index.data(FolderTagRole))
+        painter.restore()
+
+    def editorEvent(self, event: QEvent, model: QAbstractListModel, option: QStyleOptionViewItem,
+                    index: QModelIndex) -> bool:
+        """Handle clicks on the painted play and like buttons and the tag field.
+        Returns:
+            bool: True if the event was handled.
+        """
+        if event.type() == QEvent.Type.MouseButtonRelease and isinstance(event, QMouseEvent):
+            rects = self.row_rects(option.rect)
+            position = event.position().toPoint()
+            if rects['play'].contains(position):
+                self.play_clicked.emit(index.row())
+                return True
+            if rects['like'].contains(position):
+                model.setData(index, not index.data(IsLikedRole), IsLikedRole)
+                return True
+            if rects['tag'].contains(position):
+                self.tag_clicked.emit(QModelIndex(index))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def createEditor(self, parent: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> QWidget:
+        """Create the line edit used to change an event's folder tag.
+        Returns:
+            QWidget: The editor.
+        """
+        editor = QLineEdit(parent)
+        editor.setStyleSheet("QLineEdit { color: black; background-color: white; }")
+        return editor
+
+    def updateEditorGeometry(self, editor: QWidget, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        """Place the editor over the painted tag field."""
+        editor.setGeometry(self.row_rects(option.rect)['tag'])
+
+    def setEditorData(self, editor: QLineEdit, index: QModelIndex) -> None:
+        """Fill the editor with the event's folder tag."""
+        editor.setText(index.data(FolderTagRole))
+
+    def setModelData(self, editor: QLineEdit, model: QAbstractListModel, index: QModelIndex) -> None:
+        """Save the edited folder tag to the model."""
+        model.setData(index, editor.text(), FolderTagRole)
+
+
+class VideoEventListView(QListView):
+    """A list view of VideoEventListModel rows, drawn by VideoEventItemDelegate. Rows are filtered by an
+    EventRowFilterModel, the rows in play_clicked and visible_rows_changed are event_model rows."""
+    play_clicked = Signal(int)
+    # A dict of video files keyed by row. Signal(dict) would convert it to a QVariantMap, which only has
+    # string keys, and emit an empty dict.
+    visible_rows_changed = Signal(object)
+
+    def __init__(self, parent: QWidget=None) -> None:
+        """
+        Args:
+            parent (QWidget, optional): The parent widget. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.event_model = VideoEventListModel(self)
+        self._filter_model = EventRowFilterModel(self.event_model, self)
+        self.setModel(self._filter_model)
+        self._delegate = VideoEventItemDelegate(self)
+        self.setItemDelegate(self._delegate)
+        # All rows have the same height, so scrolling and layout don't depend on the number of rows.
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setMinimumWidth(self._delegate.sizeHint(None, QModelIndex()).width()
+                             + self.verticalScrollBar().sizeHint().width())
+        self._delegate.play_clicked.connect(self._on_play_clicked)
+        self._delegate.tag_clicked.connect(self.edit_folder_tag)
+        # Scrolling emits many value changes, the visible rows are only reported once it settles.
+        self._visible_rows_timer = QTimer(self)
+        self._visible_rows_timer.setSingleShot(True)
+        self._visible_rows_timer.setInterval(100)
+        self._visible_rows_timer.timeout.connect(self.emit_visible_rows)
+        self.verticalScrollBar().valueChanged.connect(self._visible_rows_timer.start)
+        self._filter_model.rowsInserted.connect(self._visible_rows_timer.start)
+
+    def resizeEvent(self, event: QEvent) -> None:
+        """Report the visible rows again after a resize."""
+        super().resizeEvent(event)
+        self._visible_rows_timer.start()
+
+    def visible_rows(self) -> range:
+        """Get the shown rows which are on screen.
+        Returns:
+            range: The visible rows, of the filtered rows.
+        """
+        row_count = self._filter_model.rowCount()
+        if row_count == 0:
+            return range(0)
+        viewport_rect = self.viewport().rect()
+        first_index = self.indexAt(viewport_rect.topLeft())
+        last_index = self.indexAt(viewport_rect.bottomLeft())
+        first_row = first_index.row() if first_index.isValid() else 0
+        last_row = last_index.row() if last_index.isValid() else row_count - 1
+        return range(first_row, last_row + 1)
+
+    def emit_visible_rows(self) -> None:
+        """Emit visible_rows_changed with the video files of every visible row."""
+        source_rows = [self._filter_model.source_row(row) for row in self.visible_rows()]
+        self.visible_rows_changed.emit(
+            {row: self.event_model.data(self.event_model.index(row), VideoFilesRole) for row in source_rows})
+
+    def set_row_filter(self, rows: Union[Iterable[int], None], first_row: int=0) -> None:
+        """Show only some rows.
+        Args:
+            rows (Union[Iterable[int], None]): The rows to show, None shows every row.
+            first_row (int, optional): Only rows from this one on are shown or hidden, e.g. just added rows.
+                Defaults to 0.
+        """
+        self._filter_model.set_row_filter(rows, first_row=first_row)
+        self._visible_rows_timer.start()
+
+    def _on_play_clicked(self, row: int) -> None:
+        self.play_clicked.emit(self._filter_model.source_row(row))
+
+    def edit_folder_tag(self, index: QModelIndex) -> None:
+        """Open the folder tag editor of an event.
+        Args:
+            index (QModelIndex): The event's index.
+        """
+        self.edit(index)
+
+    def count(self) -> int:
+        """Return the number of events in the list.
+        Returns:
+            int: The number of events.
+        """
+        return self.event_model.rowCount()
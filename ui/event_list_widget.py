@@ -1,10 +1,25 @@
 """A widget to hold all the video event widgets."""
+from collections import deque
+from typing import Any, Callable, Iterable, List, Union
 
+from PySide6.QtCore import QTimer, Signal
 from PySide6.QtWidgets import QWidget, QScrollArea, QVBoxLayout, QSizePolicy, QLayoutItem
 
+# Queued rows are built this many at a time, then the event loop runs before the next chunk.
+ROW_INSERT_CHUNK_SIZE = 200
+
+
 class ScrollableWidget(QWidget):
+    # First row and number of rows, emitted when a chunk of queued rows has been added.
+    rows_added = Signal(int, int)
+
     def __init__(self, parent: QWidget=None) -> None:
         super().__init__(parent=parent)
+        # (row, make_widget) of the rows waiting to be built.
+        self._pending_rows = deque()
+        self._insert_timer = QTimer(self)
+        self._insert_timer.setSingleShot(True)
+        self._insert_timer.timeout.connect(self._insert_next_chunk)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         # Create a vertical layout for the custom widget
@@ -45,14 +60,94 @@ class ScrollableWidget(QWidget):
         """
         return self.container_layout.itemAt(value)
 
+    @property
+    def pending_count(self) -> int:
+        """The number of queued rows which are not built yet."""
+        return len(self._pending_rows)
+
+    def set_row_style_sheet(self, style_sheet: str) -> None:
+        """Style every widget in the container with one stylesheet, which Qt parses once rather than per widget.
+        Args:
+            style_sheet (str): The stylesheet, its selectors should be scoped to the widgets' class.
+        """
+        self.container.setStyleSheet(style_sheet)
+
     def add_widget(self, widget: QWidget) -> None:
         """ Add a widget to the container layout.
         Args:
             widget (QWidget): The widget to add.
         """
-        self.container_layout.addWidget(widget)
-        # Adjust the container's minimum width based on the added widget
-        self._adjust_width(widget)
+        self.add_widgets([widget])
+
+    def add_widgets(self, widgets: List[QWidget]) -> None:
+        """Add widgets to the container layout with updates suspended, and fit the container's width once.
+        Args:
+            widgets (List[QWidget]): The widgets to add.
+        """
+        if not widgets:
+            return
+        self.container.setUpdatesEnabled(False)
+        self.container_layout.setEnabled(False)
+        try:
+            for widget in widgets:
+                self.container_layout.addWidget(widget)
+                # Shown here while the layout is disabled, the layout would otherwise show each added widget later
+                # and lay the container out again for every one.
+                widget.show()
+        finally:
+            self.container_layout.setEnabled(True)
+            self.container_layout.activate()
+            self.container.setUpdatesEnabled(True)
+        # Adjust the container's minimum width based on the widest added widget
+        self._adjust_width(max(widgets, key=lambda widget: widget.sizeHint().width()))
+
+    def queue_rows(self, rows: Iterable[Any], make_widget: Callable[[Any], QWidget]) -> None:
+        """Build and add widgets for rows in chunks, letting the event loop run between chunks, so a large
+        batch doesn't freeze the window. rows_added is emitted after every chunk.
+        Args:
+            rows (Iterable[Any]): The rows to add, passed to make_widget.
+            make_widget (Callable[[Any], QWidget]): Builds a row's widget when its chunk is added.
+        """
+        self._pending_rows.extend((row, make_widget) for row in rows)
+        if self._pending_rows and not self._insert_timer.isActive():
+            self._insert_timer.start(0)
+
+    def _insert_next_chunk(self) -> None:
+        """Build and add the next chunk of queued rows, then let the event loop run before the next."""
+        widgets = []
+        while self._pending_rows and len(widgets) < ROW_INSERT_CHUNK_SIZE:
+            row, make_widget = self._pending_rows.popleft()
+            widgets.append(make_widget(row))
+        first_row = self.container_layout.count()
+        self.add_widgets(widgets)
+        if self._pending_rows:
+            self._insert_timer.start(0)
+        if widgets:
+            self.rows_added.emit(first_row, len(widgets))
+
+    def set_row_filter(self, rows: Union[Iterable[int], None], first_row: int=0) -> None:
+        """Show only some of the widgets.
+        Args:
+            rows (Union[Iterable[int], None]): The indexes of the widgets to show, None shows every widget.
+            first_row (int, optional): Only widgets from this index on are shown or hidden. Defaults to 0.
+        """
+        shown_rows = set(rows) if rows is not None else None
+        # Showing a widget lays its parent out again at once, so with the layout enabled showing every row takes
+        # time quadratic in the rows, and every change would repaint the container on its own.
+        self.container.setUpdatesEnabled(False)
+        self.container_layout.setEnabled(False)
+        try:
+            for row in range(first_row, self.container_layout.count()):
+                widget = self.container_layout.itemAt(row).widget()
+                if widget is None:
+                    continue
+                is_shown = shown_rows is None or row in shown_rows
+                if widget.isHidden() == is_shown:
+                    widget.setVisible(is_shown)
+        finally:
+            self.container_layout.setEnabled(True)
+            self.container_layout.activate()
+            self.container.setUpdatesEnabled(True)
 
     def _adjust_width(self, widget: QWidget) -> None:
         """Adjust the container's width to fit the new widget.
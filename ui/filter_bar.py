@@ -0,0 +1,129 @@
+"""A bar of controls which narrows the event list down by time range, clip folder, cameras and event.json fields."""
+import datetime
+from typing import Iterable, Union
+
+from PySide6.QtCore import QDateTime, Qt, Signal
+from PySide6.QtWidgets import QCheckBox, QComboBox, QDateTimeEdit, QHBoxLayout, QLabel, QSizePolicy, QWidget
+
+from file_utils.event_query import CLIP_SOURCES, EventFilter
+
+ALL_SOURCES_TEXT = "All Folders"
+ALL_REASONS_TEXT = "All Reasons"
+ALL_CITIES_TEXT = "All Cities"
+DATETIME_DISPLAY_FORMAT = "yyyy-MM-dd HH:mm"
+
+
+class EventFilterBar(QWidget):
+    """Emits filter_changed with an EventFilter, or None when filtering is off, whenever a control changes."""
+    filter_changed = Signal(object)
+
+    def __init__(self, parent: QWidget=None) -> None:
+        """
+        Args:
+            parent (QWidget, optional): The parent widget. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        hlayout = QHBoxLayout()
+        hlayout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(hlayout)
+        self.enabled_checkbox = QCheckBox("Filter Events")
+        self.enabled_checkbox.setFocusPolicy(Qt.NoFocus)
+        hlayout.addWidget(self.enabled_checkbox)
+        hlayout.addWidget(QLabel("From"))
+        now = QDateTime.currentDateTime()
+        self.start_edit = QDateTimeEdit(now.addDays(-7))
+        self.start_edit.setDisplayFormat(DATETIME_DISPLAY_FORMAT)
+        self.start_edit.setCalendarPopup(True)
+        hlayout.addWidget(self.start_edit)
+        hlayout.addWidget(QLabel("To"))
+        self.end_edit = QDateTimeEdit(now)
+        self.end_edit.setDisplayFormat(DATETIME_DISPLAY_FORMAT)
+        self.end_edit.setCalendarPopup(True)
+        hlayout.addWidget(self.end_edit)
+        self.source_combo_box = QComboBox()
+        self.source_combo_box.addItems([ALL_SOURCES_TEXT, *CLIP_SOURCES])
+        hlayout.addWidget(self.source_combo_box)
+        self.all_cameras_checkbox = QCheckBox("All Four Cameras")
+        self.all_cameras_checkbox.setFocusPolicy(Qt.NoFocus)
+        hlayout.addWidget(self.all_cameras_checkbox)
+        self.hide_corrupt_checkbox = QCheckBox("Hide Broken Events")
+        self.hide_corrupt_checkbox.setFocusPolicy(Qt.NoFocus)
+        hlayout.addWidget(self.hide_corrupt_checkbox)
+        # Filled in with the reasons and cities of the scanned event folders' event.json files.
+        self.reason_combo_box = QComboBox()
+        self.reason_combo_box.addItem(ALL_REASONS_TEXT)
+        hlayout.addWidget(self.reason_combo_box)
+        self.city_combo_box = QComboBox()
+        self.city_combo_box.addItem(ALL_CITIES_TEXT)
+        hlayout.addWidget(self.city_combo_box)
+        hlayout.addStretch(stretch=1)
+        for widget in self._filter_widgets():
+            widget.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.enabled_checkbox.toggled.connect(self._on_enabled_toggled)
+        self.start_edit.dateTimeChanged.connect(self._emit_filter)
+        self.end_edit.dateTimeChanged.connect(self._emit_filter)
+        self.source_combo_box.currentIndexChanged.connect(self._emit_filter)
+        self.all_cameras_checkbox.toggled.connect(self._emit_filter)
+        self.hide_corrupt_checkbox.toggled.connect(self._emit_filter)
+        self.reason_combo_box.currentIndexChanged.connect(self._emit_filter)
+        self.city_combo_box.currentIndexChanged.connect(self._emit_filter)
+        self._on_enabled_toggled(False)
+
+    def set_time_range(self, start: datetime.datetime, end: datetime.datetime) -> None:
+        """Set the time range controls, e.g. to the scanned events' first and last time.
+        Args:
+            start (datetime.datetime): The range's start.
+            end (datetime.datetime): The range's end.
+        """
+        self.start_edit.setDateTime(QDateTime(start))
+        self.end_edit.setDateTime(QDateTime(end))
+
+    def set_event_metadata_choices(self, reasons: Iterable[str], cities: Iterable[str]) -> None:
+        """Offer the trigger reasons and cities found in the scanned event folders, keeping the current choices.
+        Args:
+            reasons (Iterable[str]): The reasons.
+            cities (Iterable[str]): The cities.
+        """
+        for combo_box, all_text, values in ((self.reason_combo_box, ALL_REASONS_TEXT, reasons),
+                                            (self.city_combo_box, ALL_CITIES_TEXT, cities)):
+            current_text = combo_box.currentText()
+            values = [value for value in values if value]
+            if [combo_box.itemText(i) for i in range(1, combo_box.count())] == values:
+                continue
+            # Changing the items would emit filter_changed for every item.
+            combo_box.blockSignals(True)
+            combo_box.clear()
+            combo_box.addItems([all_text, *values])
+            combo_box.setCurrentIndex(max(combo_box.findText(current_text), 0))
+            combo_box.blockSignals(False)
+
+    def event_filter(self) -> Union[EventFilter, None]:
+        """The filter the controls describe.
+        Returns:
+            Union[EventFilter, None]: The filter, None when filtering is off.
+        """
+        if not self.enabled_checkbox.isChecked():
+            return None
+        source = self.source_combo_box.currentText()
+        reason = self.reason_combo_box.currentText()
+        city = self.city_combo_box.currentText()
+        return EventFilter(
+            start=self.start_edit.dateTime().toPython(),
+            end=self.end_edit.dateTime().toPython(),
+            sources=None if source == ALL_SOURCES_TEXT else (source,),
+            all_cameras_only=self.all_cameras_checkbox.isChecked(),
+            hide_corrupt=self.hide_corrupt_checkbox.isChecked(),
+            reasons=None if reason == ALL_REASONS_TEXT else (reason,),
+            cities=None if city == ALL_CITIES_TEXT else (city,))
+
+    def _filter_widgets(self) -> tuple:
+        return (self.start_edit, self.end_edit, self.source_combo_box, self.all_cameras_checkbox,
+                self.hide_corrupt_checkbox, self.reason_combo_box, self.city_combo_box)
+
+    def _on_enabled_toggled(self, checked: bool) -> None:
+        for widget in self._filter_widgets():
+            widget.setEnabled(checked)
+        self._emit_filter()
+
+    def _emit_filter(self, *args) -> None:
+        self.filter_changed.emit(self.event_filter())
@@ -0,0 +1,95 @@
+"""Watches scanned directories so clips added by the car or a sync job show up without a rescan."""
+import logging
+import os
+from typing import List, Union
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+from file_utils.scan_index import list_directory
+from file_utils.video_events import read_directories_events
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FolderWatcher(QObject):
+    """Re-groups only the directories which changed, once a burst of file creation has settled.
+
+    Every scanned directory is watched. A new clip changes its directory, and a new SavedClips or
+    SentryClips event folder changes its parent, so the work done per change is listing those directories,
+    never walking the drive. events_changed carries every event of the changed directories, with their
+    event.json metadata and clip problems as a scan finds them, receivers tell new and updated events apart
+    by their event_key.
+    """
+    events_changed = Signal(list)
+
+    def __init__(self, debounce_ms: int=1000, parent: Union[QObject, None]=None) -> None:
+        """
+        Args:
+            debounce_ms (int, optional): Wait for this long without changes before reading the changed
+                directories. Tesla writes the four cameras' clips one after another. Defaults to 1000.
+            parent (Union[QObject, None], optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._changed_dirs = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._read_changed_dirs)
+
+    def watch(self, dir_paths: List[str]) -> None:
+        """Watch directories, directories which are already watched are skipped.
+        Args:
+            dir_paths (List[str]): The directories.
+        """
+        watched_dirs = set(self._watcher.directories())
+        new_dirs = [dir_path for dir_path in dir_paths if dir_path not in watched_dirs]
+        if new_dirs:
+            failed_dirs = self._watcher.addPaths(new_dirs)
+            if failed_dirs:
+                # e.g. the OS's limit on watches was reached.
+                logger.warning(f'Could not watch {len(failed_dirs)} directories, e.g. {failed_dirs[0]}')
+
+    def clear(self) -> None:
+        """Stop watching every directory."""
+        self._timer.stop()
+        self._changed_dirs.clear()
+        watched_dirs = self._watcher.directories()
+        if watched_dirs:
+            self._watcher.removePaths(watched_dirs)
+
+    def _on_directory_changed(self, dir_path: str) -> None:
+        self._changed_dirs.add(dir_path)
+        # Restarting the timer on every change waits for the burst to end.
+        self._timer.start()
+
+    def _read_changed_dirs(self) -> None:
+        pending_dirs = sorted(self._changed_dirs)
+        self._changed_dirs.clear()
+        dir_listings = []
+        new_dirs = []
+        watched_dirs = set(self._watcher.directories())
+        while pending_dirs:
+            dir_path = pending_dirs.pop()
+            try:
+                sub_dir_names, video_file_names = list_directory(dir_path)
+            except OSError:
+                # Removed, e.g. the drive was unmounted. The watcher drops removed directories itself.
+                continue
+            for sub_dir_name in sub_dir_names:
+                sub_dir_path = os.path.join(dir_path, sub_dir_name)
+                if sub_dir_path not in watched_dirs:
+                    # A new event folder, its clips were written before it could be watched.
+                    watched_dirs.add(sub_dir_path)
+                    new_dirs.append(sub_dir_path)
+                    pending_dirs.append(sub_dir_path)
+            dir_listings.append((dir_path, video_file_names))
+        self.watch(new_dirs)
+        # A changed directory holds at most an hour of RecentClips or one event folder, so reading its
+        # event.json and checking its clips like the scan does is quick enough between two bursts.
+        events = read_directories_events(dir_listings)
+        if events:
+            logger.info(f'{len(events)} events in changed directories.')
+            self.events_changed.emit(events)
@@ -0,0 +1,853 @@
+"""The app's main window."""
+import datetime
+from functools import partial
+from typing import Dict, List, Tuple, Union
+import  logging
+
+from constants import (
+    APP_VERSION,
+    SETTINGS_KEY_USE_VIRTUALIZED_EVENT_LIST,
+    SETTINGS_KEY_PLAYBACK_SYNC_TOLERANCE_MS,
+    TESLAS_CAMERA_NAMES)
+from file_utils.video_events import VideoEventData, make_directory_events
+from file_utils.event_catalog import EventCatalog
+from file_utils.event_query import EventFilter, EventQueryIndex
+from file_utils.sessions import DriveSession, DriveSessionIndex
+from file_utils.copy_engine import CopyReport, CopyProgress, make_liked_event_copy_jobs
+from file_utils.startup_profile import StartupProfiler
+from file_utils.session_store import SessionStore
+
+from PySide6.QtWidgets import (
+    QApplication, QWidget, QHBoxLayout, QVBoxLayout,QMainWindow,
+    QFileDialog, QSizePolicy)
+
+from PySide6.QtCore import Qt, QSize, QEvent, QTimer, QModelIndex
+from PySide6.QtMultimediaWidgets import QVideoWidget
+from PySide6.QtGui import QScreen
+
+from ui.video_widget import EVENT_WIDGET_STYLE_SHEET, VideoEventWidget
+from ui.timeline_slider import TimelineSliderWidget
+from ui.pop_up_info_window import InfoPopup
+from ui.event_list_widget import ScrollableWidget
+from ui.event_list_view import VideoEventListView, IsLikedRole, FolderTagRole, ClipProblemsRole
+from ui.video_screens import QVideoScreenGrid
+from ui.main_window_widgets import CommandButtonsRow
+from ui.scan_worker import DirectoryScanThread
+from ui.copy_worker import CopyThread
+from ui.thumbnail_loader import ThumbnailLoader
+from ui.player_pool import MediaPlayerPool
+from ui.playback_controller import PlaybackController
+from ui.playback_sync import DEFAULT_SYNC_TOLERANCE_MS, PlaybackSynchronizer
+from ui.session_player import SessionPlayer
+from ui.update_worker import UpdateCheckThread
+from ui.folder_watcher import FolderWatcher
+from ui.filter_bar import EventFilterBar
+
+from file_utils.settings import AppSettings
+from file_utils.updates import should_check_for_update
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The previous session's events are listed this many per event loop iteration, the first chunk fills the screen.
+SESSION_RESTORE_CHUNK_SIZE = 500
+
+
+class PendingEventWidget:
+    """A listed event whose VideoEventWidget isn't built yet, holding what is set on it until then."""
+    __slots__ = ('event_name', 'clip_problems')
+
+    def __init__(self, event_name: str, clip_problems: Dict[str, str]) -> None:
+        self.event_name = event_name
+        self.clip_problems = clip_problems
+
+
+class MainWindow(QMainWindow):
+    def __init__(self, startup_profiler: StartupProfiler=None):
+        """
+        Args:
+            startup_profiler (StartupProfiler, optional): Records how long each part of the window takes to
+                build. Defaults to None.
+        """
+        super().__init__()
+        profiler = startup_profiler or StartupProfiler()
+        # Get App Settings
+        self._settings = AppSettings()
+        profiler.mark('settings')
+        self.is_dragging = False
+        screen = QScreen.availableGeometry(QApplication.primaryScreen())
+        self.aspect_ratio = 1.63
+        startup_height = int(screen.height() * 0.9)
+        startup_width = int(startup_height * self.aspect_ratio)
+        x = (screen.width() - startup_width) // 2
+        y = (screen.height() - startup_height) // 2
+        # MainWindows appears in center of display using 90% of height, width is based on
+        # desired UI aspect ratio.
+        self.setGeometry(x, y, startup_width, startup_height)
+        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self._camera_names = TESLAS_CAMERA_NAMES
+        self.media_player_video_widget_dict = {}
+        self._scan_thread = None
+        self._copy_thread = None
+        self._thumbnail_loader = None
+        self._update_check_thread = None
+        # The model/view event list only paints visible rows and scales to very large scans.
+        self._use_virtualized_event_list = self._settings.bool_value(SETTINGS_KEY_USE_VIRTUALIZED_EVENT_LIST, False)
+        self._event_playback_positions = {}
+        # The event whose drive session the session player has loaded, it resumes the session when played again.
+        self._drive_session_event_key = None
+        # Every listed event in a compact columnar catalog.
+        self._event_catalog = EventCatalog()
+        # Events are added to the catalog in the order they are added to the event list, so a catalog row is
+        # also the event's row in the list.
+        self._event_query_index = EventQueryIndex(self._event_catalog)
+        self._event_filter = None
+        # The drive sessions of the listed events, a directory's sessions are merged again after its events change.
+        self._drive_session_index = DriveSessionIndex()
+        # [row or VideoEventWidget, video files] keyed by event_key, the widget is a PendingEventWidget until the
+        # event list builds it, so rescans and watched directories
+        # only add new events and update changed ones.
+        self._event_items = {}
+        # The scanned roots, listed events, likes and folder tags are saved as they change, and the next start
+        # lists them again from the store rather than the drives.
+        self._session_store = SessionStore()
+        self._restored_events = []
+        self._restore_position = 0
+        self._is_restoring_session = False
+        # Running totals of the events whose MP4 metadata has been read: count, duration and truncated events.
+        self._events_summary = [0, 0, 0]
+        # Main layout
+        main_widget = QWidget()
+        main_vlayout = QVBoxLayout()
+        main_hlayout = QHBoxLayout()
+
+        # Video display area
+        self.video_screens = QVideoScreenGrid()
+        main_hlayout.addWidget(self.video_screens, 3)
+        for count, camera_name in enumerate(self._camera_names):
+            video_widget = QVideoWidget()
+            video_widget.setAspectRatioMode(Qt.AspectRatioMode.KeepAspectRatio)
+            self.video_screens.addWidget(video_widget, count // 2, count % 2)
+            self.media_player_video_widget_dict[camera_name] = {'video_widget': video_widget}
+        # Adds the active media players to media_player_video_widget_dict, and keeps a standby set which
+        # preloads the next event.
+        self.player_pool = MediaPlayerPool(self.media_player_video_widget_dict, self._camera_names, parent=self)
+        # The other cameras follow the front camera's clock while playing.
+        self.playback_sync = PlaybackSynchronizer(
+            self.player_pool,
+            tolerance_ms=self._settings.int_value(SETTINGS_KEY_PLAYBACK_SYNC_TOLERANCE_MS, DEFAULT_SYNC_TOLERANCE_MS),
+            parent=self)
+        profiler.mark('video screens and media players')
+
+        # Playback slider
+        self.slider = TimelineSliderWidget(self.media_player_video_widget_dict, self.player_pool)
+        self.player_pool.positionChanged.connect(self.update_slider)
+        self.player_pool.durationChanged.connect(self.update_slider_range)
+        self.session_player = SessionPlayer(self.player_pool, self.slider.seek_scheduler, parent=self)
+        self.slider.session_player = self.session_player
+        self.session_player.position_changed.connect(self.update_slider_from_session)
+        self.session_player.duration_changed.connect(self.update_slider_range_from_session)
+        # The playing event and the liked events, tells which event ended once its clips or its session end.
+        self.playback_controller = PlaybackController(self.player_pool, self.session_player, parent=self)
+        self.playback_controller.playing_event_ended.connect(self.on_playing_event_ended)
+        profiler.mark('timeline slider')
+
+        # Video clip list column
+        if self._use_virtualized_event_list:
+            self.video_widget_layout = VideoEventListView()
+            self.video_widget_layout.play_clicked.connect(self.toggle_event_play_pause)
+            # Thumbnails are only made for the rows on screen.
+            self._thumbnail_loader = ThumbnailLoader(parent=self)
+            self.video_widget_layout.visible_rows_changed.connect(self._thumbnail_loader.set_visible_rows)
+            self._thumbnail_loader.thumbnail_ready.connect(self.video_widget_layout.event_model.set_thumbnail)
+            self.video_widget_layout.event_model.dataChanged.connect(self.on_event_model_data_changed)
+        else:
+            self.video_widget_layout = ScrollableWidget()
+            self.video_widget_layout.set_row_style_sheet(EVENT_WIDGET_STYLE_SHEET)
+            self.video_widget_layout.rows_added.connect(self.on_event_rows_added)
+        main_hlayout.addWidget(self.video_widget_layout, stretch=True)
+        self.command_buttons_row = CommandButtonsRow(
+            self.add_video, self.copy_liked_videos, self.cancel_scan, self.cancel_copy)
+        main_vlayout.addWidget(self.command_buttons_row)
+        self.command_buttons_row.playback_rate_combo_box.currentIndexChanged.connect(self.on_playback_rate_changed)
+        self.filter_bar = EventFilterBar()
+        self.filter_bar.filter_changed.connect(self.on_event_filter_changed)
+        main_vlayout.addWidget(self.filter_bar)
+        self._folder_watcher = FolderWatcher(parent=self)
+        self._folder_watcher.events_changed.connect(self.add_video_events)
+        self.command_buttons_row.watch_folders_checkbox.toggled.connect(self.on_watch_folders_toggled)
+        main_vlayout.addLayout(main_hlayout)
+        main_vlayout.addWidget(self.slider, stretch=False)
+        main_widget.setLayout(main_vlayout)
+        self.setCentralWidget(main_widget)
+        self.setWindowTitle(f"Tesla Dashcam Reviewer {APP_VERSION}")
+        #self.setAttribute(Qt.WA_OpaquePaintEvent)
+        profiler.mark('event list and command buttons')
+        QTimer.singleShot(0, self.restore_session)
+        # The update check waits on the network, it is started once the event loop runs so the window
+        # appears immediately.
+        QTimer.singleShot(0, self.start_update_check)
+
+    def start_update_check(self) -> None:
+        """Check for a newer version on a background thread, if it is time to check again."""
+        if self._update_check_thread is not None or not should_check_for_update(self._settings):
+            return
+        self._update_check_thread = UpdateCheckThread()
+        self._update_check_thread.update_available.connect(self.show_update_available)
+        self._update_check_thread.finished.connect(self.on_update_check_finished)
+        self._update_check_thread.start()
+
+    def on_update_check_finished(self) -> None:
+        """Clean up once the update check is done."""
+        self._update_check_thread = None
+
+    def show_update_available(self, latest_version: str) -> None:
+        """Tell the user a newer version is available.
+        Args:
+            latest_version (str): The newer version.
+        """
+        popup = InfoPopup(
+            title='Update Available',
+            message=f"A newer version {latest_version} is available. You are currently " \
+                    f"running {APP_VERSION}.\nGet the new version at \nhttps://www.adamchrystie.com/tesla_dashcam_viewer.html",
+            parent=self)
+        popup.show()
+
+    def closeEvent(self, event):
+        """Handle cleanup when the window is closed."""
+        # Settings changed within the last flush delay are still only in memory.
+        self._settings.flush()
+        for thread in (self._scan_thread, self._copy_thread):
+            if thread is not None:
+                thread.cancel()
+                thread.wait()
+        if self._update_check_thread is not None:
+            # The request can't be interrupted and may take up to REQUESTS_TIMEOUT_LIMIT, so rather than
+            # waiting for it its result is dropped.
+            self._update_check_thread.discard()
+        if self._thumbnail_loader is not None:
+            self._thumbnail_loader.shutdown()
+        self._session_store.close()
+
+    def resizeEvent(self, event: QEvent) -> None:
+        """Resize the window.
+        Args:
+            event (QEvent): The resize event.
+        """
+        self.setUpdatesEnabled(False)
+        height = self.height()
+        width = int(height * self.aspect_ratio)
+        self.resize(QSize(width, height))
+        super().resizeEvent(event)
+        self.setUpdatesEnabled(True)
+
+    def pause_others(self, event_key: Tuple[str, str]) -> None:
+        """Pause the playing VideoEventWidget before another one starts playing.
+        Args:
+            event_key (Tuple[str, str]): The (directory, timestamp) of the event which is about to play.
+        """
+        playing_event_key = self.playback_controller.playing_event_key
+        if playing_event_key is None or playing_event_key == event_key:
+            return
+        widget = self._event_items[playing_event_key][0]
+        if isinstance(widget, VideoEventWidget) and widget.is_playing:
+            widget.toggle_play_pause()
+
+    def on_event_playback_started(self, event_key: Tuple[str, str]) -> None:
+        """Play the drive session of the VideoEventWidget which started playing, or preload the next event.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        """
+        self.playback_controller.set_playing(event_key)
+        dir_path, event_name = event_key
+        if self.resume_drive_session(event_key) or self.start_drive_session(event_key):
+            return
+        self.set_slider_range_from_metadata(event_key)
+        # A catalog row is also the event's row in the list.
+        event_row = self._event_catalog.find(event_name, dir_path)
+        if event_row is None or event_row.row + 1 >= len(self._event_catalog):
+            return
+        next_event_key = self._event_catalog[event_row.row + 1].event_key
+        if next_event_key in self._event_items:
+            self.player_pool.preload(self.get_playable_video_files(next_event_key))
+
+    def on_event_playback_paused(self, event_key: Tuple[str, str]) -> None:
+        """Stop advancing through the drive session while the event is paused.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        """
+        self.playback_controller.set_paused(event_key)
+        self.session_player.set_playing(False)
+
+    def on_event_liked_changed(self, event_key: Tuple[str, str], is_liked: bool) -> None:
+        """Save a like toggled on a VideoEventWidget.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+            is_liked (bool): Whether the event is liked.
+        """
+        self.playback_controller.set_liked(event_key, is_liked)
+        self._session_store.set_liked(event_key, is_liked)
+
+    def on_event_folder_tag_changed(self, event_key: Tuple[str, str], folder_tag: str) -> None:
+        """Save a folder tag edited on a VideoEventWidget.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+            folder_tag (str): The event's folder tag.
+        """
+        self.playback_controller.set_folder_tag(event_key, folder_tag)
+        self._session_store.set_folder_tag(event_key, folder_tag)
+
+    def get_drive_session(self, event_key: Tuple[str, str]) -> Tuple[Union[DriveSession, None], int]:
+        """Get the drive session an event belongs to.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        Returns:
+            Tuple[Union[DriveSession, None], int]: The session and the event's clip index in it, (None, -1) if the
+                event wasn't scanned.
+        """
+        return self._drive_session_index.find(event_key)
+
+    def start_drive_session(self, event_key: Tuple[str, str]) -> bool:
+        """Play an event's drive session from the event on, if continuous drive playback is enabled.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        Returns:
+            bool: True if a drive session of more than one clip was started.
+        """
+        if not self.command_buttons_row.continuous_playback_checkbox.isChecked():
+            if self.session_player.is_active:
+                self.session_player.stop()
+                self.set_drive_session_event_key(None)
+                self.update_slider_range(self.player_pool.main_player.duration())
+            return False
+        session, clip_index = self.get_drive_session(event_key)
+        if session is None or len(session.clips) < 2:
+            self.session_player.stop()
+            self.set_drive_session_event_key(None)
+            return False
+        self.session_player.start(session, clip_index, self.player_pool.main_player.position())
+        self.set_drive_session_event_key(event_key)
+        return True
+
+    def resume_drive_session(self, event_key: Tuple[str, str]) -> bool:
+        """Resume the paused drive session an event started, in the clip and at the offset it was paused at.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        Returns:
+            bool: True if the event's drive session is loaded and was resumed.
+        """
+        if not self.session_player.is_active or self._drive_session_event_key != event_key:
+            return False
+        self.session_player.set_playing(True)
+        return True
+
+    def set_drive_session_event_key(self, event_key: Union[Tuple[str, str], None]) -> None:
+        """Record which event's drive session is loaded, so playing the event again resumes it.
+        Args:
+            event_key (Union[Tuple[str, str], None]): The event's (directory, timestamp), None once no session is
+                loaded.
+        """
+        for widget_event_key, resumes_drive_session in ((self._drive_session_event_key, False), (event_key, True)):
+            event_item = self._event_items.get(widget_event_key)
+            if event_item is not None and isinstance(event_item[0], VideoEventWidget):
+                event_item[0].resumes_drive_session = resumes_drive_session
+        self._drive_session_event_key = event_key
+
+    def pause_all_media_players(self) -> None:
+        """Pause all the media players."""
+        for widgets_dict in self.media_player_video_widget_dict.values():
+            widgets_dict['media_player'].pause()
+
+    def toggle_event_play_pause(self, row: int) -> None:
+        """Play or pause an event of the model/view event list.
+        Args:
+            row (int): The event's row.
+        """
+        event_model = self.video_widget_layout.event_model
+        playing_row = event_model.playing_row
+        if playing_row != -1:
+            self.pause_all_media_players()
+            self.session_player.set_playing(False)
+            self._event_playback_positions[playing_row] = self.player_pool.main_player.position()
+            event_model.playing_row = -1
+            self.playback_controller.set_paused(self._event_catalog[playing_row].event_key)
+            if playing_row == row:
+                return
+        event_key = self._event_catalog[row].event_key
+        video_files = self.get_playable_video_files(event_key)
+        if not video_files:
+            # None of the clips can be played.
+            return
+        position = self._event_playback_positions.get(row, 0)
+        event_model.playing_row = row
+        self.playback_controller.set_playing(event_key)
+        if self.resume_drive_session(event_key):
+            for media_player in self.player_pool.media_players():
+                media_player.play()
+            return
+        if self.player_pool.load(video_files):
+            self.set_slider_range_from_metadata(event_key)
+            for media_player in self.player_pool.media_players():
+                media_player.setPosition(position)
+        for media_player in self.player_pool.media_players():
+            media_player.play()
+        if self.start_drive_session(event_key):
+            return
+        if row + 1 < event_model.rowCount():
+            self.player_pool.preload(self.get_playable_video_files(self._event_catalog[row + 1].event_key))
+
+    def get_playable_video_files(self, event_key: Tuple[str, str]) -> List[str]:
+        """Get a listed event's video files without its broken clips, as they are loaded and preloaded.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        Returns:
+            List[str]: The video files, the player pool matches them to the cameras by file name.
+        """
+        event_item = self._event_items[event_key]
+        if isinstance(event_item[0], int):
+            event_model = self.video_widget_layout.event_model
+            clip_problems = event_model.data(event_model.index(event_item[0]), ClipProblemsRole)
+        elif isinstance(event_item[0], VideoEventWidget):
+            return [video_fpath for video_fpath in event_item[0].playable_video_files if video_fpath]
+        else:
+            clip_problems = event_item[0].clip_problems
+        return [video_fpath for video_fpath in event_item[1] if video_fpath not in (clip_problems or {})]
+
+    def on_playing_event_ended(self, event_key: Tuple[str, str]) -> None:
+        """Stop showing the playing event as playing when its clips end.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        """
+        if event_key == self._drive_session_event_key:
+            # The session's last clip ended, playing the event again starts it over.
+            self.session_player.stop()
+            self.set_drive_session_event_key(None)
+        event_item = self._event_items.get(event_key)
+        if event_item is None:
+            return
+        if isinstance(event_item[0], VideoEventWidget):
+            if event_item[0].is_playing:
+                event_item[0].toggle_play_pause()
+        elif isinstance(event_item[0], int) and self.video_widget_layout.event_model.playing_row == event_item[0]:
+            self.toggle_event_play_pause(event_item[0])
+
+    def get_liked_events(self) -> List[tuple]:
+        """Get the liked events of the event list.
+        Returns:
+            List[tuple]: (event name, video files, folder tag) for every liked event.
+        """
+        liked_event_keys = [event_key for event_key in self.playback_controller.liked_event_keys()
+                            if event_key in self._event_items]
+        for event_key in liked_event_keys:
+            widget = self._event_items[event_key][0]
+            # A tag is only saved once its edit is finished, the one being typed is taken as it is.
+            if (isinstance(widget, VideoEventWidget)
+                    and widget.liked_folder_name_widget.text() != self.playback_controller.folder_tag(event_key)):
+                self.on_event_folder_tag_changed(event_key, widget.liked_folder_name_widget.text())
+        return [(event_key[1], self._event_items[event_key][1], self.playback_controller.folder_tag(event_key))
+                for event_key in liked_event_keys]
+
+    def copy_liked_videos(self) -> None:
+        """Copy the liked videos to a specified directory on a background thread."""
+        self.pause_all_media_players()
+        if self._copy_thread is not None:
+            return
+        file_dialog = QFileDialog(self)
+        dir_path = file_dialog.getExistingDirectory()
+        if dir_path:
+            # Read once the dialog is closed, likes and tags can change while it is open.
+            liked_events = self.get_liked_events()
+            jobs = make_liked_event_copy_jobs(liked_events, dir_path)
+            self._copy_thread = CopyThread(jobs, dir_path, parent=self)
+            self._copy_thread.progress.connect(self.on_copy_progress)
+            self._copy_thread.copy_finished.connect(self.on_copy_finished)
+            self.command_buttons_row.set_copy_in_progress(True)
+            self._copy_thread.start()
+
+    def cancel_copy(self) -> None:
+        """Cancel copying the liked videos, the next copy to the same directory resumes where it stopped."""
+        if self._copy_thread is not None:
+            self._copy_thread.cancel()
+
+    def on_copy_progress(self, progress: CopyProgress) -> None:
+        """Show the copy's progress.
+        Args:
+            progress (CopyProgress): The copy's progress.
+        """
+        self.command_buttons_row.set_copy_progress(progress.files_done, progress.files_total,
+                                                   progress.bytes_per_second)
+
+    def on_copy_finished(self, report: CopyReport) -> None:
+        """Tell the user how copying the liked videos went.
+        Args:
+            report (CopyReport): The outcome of the copy.
+        """
+        self.command_buttons_row.set_copy_in_progress(False)
+        self._copy_thread.wait()
+        self._copy_thread.deleteLater()
+        self._copy_thread = None
+        info_messages = list(report.errors)
+        if report.was_cancelled:
+            info_messages.insert(0, 'Copying was cancelled, copy to the same directory again to resume.')
+        if info_messages:
+            info_messages.insert(0, 'Done copying videos but there were some issues.')
+            long_msg = ""
+            for msg in info_messages:
+                long_msg = long_msg + f'{msg}\n'
+            logger.warning(long_msg)
+            info_popup = InfoPopup(message=long_msg, parent=self)
+        else:
+            msg = f'Done copying files. {report.copied} copied, {report.skipped} already copied.'
+            info_popup = InfoPopup(message=msg, parent=self)
+            logger.info(msg)
+        info_popup.show()
+
+    def on_playback_rate_changed(self, index: int) -> None:
+        """Play all four cameras at the chosen speed.
+        Args:
+            index (int): The index of the chosen speed in the speed combo box.
+        """
+        rate = self.command_buttons_row.playback_rate_combo_box.itemData(index)
+        self.player_pool.set_playback_rate(rate)
+        logger.info(f'Playback rate: {rate:g}x')
+
+    def update_slider_range(self, duration: int) -> None:
+        """Update the slider range when video duration changes.
+        Args:
+            duration (int): The duration of the video.
+        """
+        if self.session_player.is_active:
+            # The slider spans the whole drive session rather than the current clip.
+            return
+        self.slider.setRange(0, duration)
+
+    def update_slider_range_from_session(self, duration: int) -> None:
+        """Make the slider span a drive session.
+        Args:
+            duration (int): The duration of the session.
+        """
+        self.slider.setRange(0, duration)
+
+    def update_slider_from_session(self, position: int) -> None:
+        """Update slider to match the playback position on the drive session's timeline.
+        Args:
+            position (int): The position on the session's timeline.
+        """
+        self.slider.setValue(position)
+
+    def update_slider(self, position: int) -> None:
+        """Update slider to match current video playback position.
+        Args:
+            position (int): The current position of the video.
+        """
+        if self.session_player.is_active:
+            return
+        duration = self.player_pool.main_player.duration()
+        if duration:
+            slider_position = position
+            self.slider.setValue(slider_position)
+
+    def add_video(self) -> None:
+        """Ask for a directory and scan it for video events on a background thread."""
+        self.pause_all_media_players()
+        if self._scan_thread is not None:
+            return
+        file_dialog = QFileDialog(self)
+        dir_path = file_dialog.getExistingDirectory()
+        if dir_path:
+            self._session_store.add_root(dir_path)
+            self._scan_thread = DirectoryScanThread(dir_path, parent=self)
+            self._scan_thread.events_found.connect(self.add_video_events)
+            self._scan_thread.events_probed.connect(self.on_events_probed)
+            self._scan_thread.directories_scanned.connect(self.on_directories_scanned)
+            self._scan_thread.progress.connect(self.command_buttons_row.set_scan_progress)
+            self._scan_thread.scan_finished.connect(self.on_scan_finished)
+            self.command_buttons_row.set_scan_in_progress(True)
+            self._scan_thread.start()
+
+    def cancel_scan(self) -> None:
+        """Cancel the directory scan which is in progress, events found so far are kept."""
+        if self._scan_thread is not None:
+            self._scan_thread.cancel()
+
+    def on_scan_finished(self, was_cancelled: bool) -> None:
+        """Clean up once the background directory scan is done.
+        Args:
+            was_cancelled (bool): Whether the scan was cancelled by the user.
+        """
+        self.command_buttons_row.set_scan_in_progress(False)
+        self._scan_thread.wait()
+        self._scan_thread.deleteLater()
+        self._scan_thread = None
+        self.set_filter_bar_time_range()
+
+    def set_filter_bar_time_range(self) -> None:
+        """Start the filter bar's range at the listed events, unless the events are being filtered, and offer
+        the event folders' reasons and cities."""
+        metadata_index = self._event_query_index.metadata_index
+        self.filter_bar.set_event_metadata_choices(metadata_index.reason_counts(), metadata_index.city_counts())
+        time_range = self._event_query_index.time_range()
+        if time_range is not None and self._event_filter is None:
+            # The end is exclusive.
+            self.filter_bar.set_time_range(time_range[0], time_range[1] + datetime.timedelta(minutes=1))
+
+    def on_directories_scanned(self, dir_paths: List[str]) -> None:
+        """Watch the scanned directories for new clips, if watching is enabled.
+        Args:
+            dir_paths (List[str]): The directories the scan walked.
+        """
+        if self.command_buttons_row.watch_folders_checkbox.isChecked():
+            self._folder_watcher.watch(dir_paths)
+
+    def on_watch_folders_toggled(self, checked: bool) -> None:
+        """Stop watching the scanned directories when watching is disabled, the next scan watches again.
+        Args:
+            checked (bool): Whether watching is enabled.
+        """
+        if not checked:
+            self._folder_watcher.clear()
+
+    def add_video_events(self, event_data_objs: List[VideoEventData]) -> None:
+        """Add a batch of scanned video events to the event list. Events which are already listed are
+        skipped, or updated if their video files changed.
+        Args:
+            event_data_objs (List[VideoEventData]): The video events to add.
+        """
+        events = []
+        stored_events = []
+        event_model = self.video_widget_layout.event_model if self._use_virtualized_event_list else None
+        for event_data in event_data_objs:
+            vide_files = event_data.video_files
+            event_key = event_data.event_key
+            if event_data.event_metadata is not None:
+                self._event_query_index.set_event_metadata(event_key[0], event_data.event_metadata)
+            event_item = self._event_items.get(event_key)
+            if event_item is not None:
+                if event_item[1] != vide_files:
+                    self.update_video_event(event_item, vide_files)
+                    self._drive_session_index.add(self._event_catalog.add_event_data(event_data))
+                    stored_events.append((*event_key, list(event_data.camera_file_names.values())))
+                if event_data.integrity is not None:
+                    # A clip which was being written when the event was last scanned may be complete now.
+                    self.set_event_clip_problems(event_item, event_data.video_file_problems)
+                    self._event_catalog.set_integrity(
+                        self._event_catalog.find(event_data.timestamp, event_key[0]).row, event_data.integrity)
+                continue
+            if event_model is not None:
+                self._event_items[event_key] = [event_model.rowCount() + len(events), vide_files]
+            else:
+                self._event_items[event_key] = [
+                    PendingEventWidget(event_data.timestamp, event_data.video_file_problems), vide_files]
+            events.append((event_data.timestamp, vide_files, event_key, event_data.video_file_problems))
+            self._drive_session_index.add(self._event_catalog.add_event_data(event_data))
+            stored_events.append((*event_key, list(event_data.camera_file_names.values())))
+        if stored_events and not self._is_restoring_session:
+            self._session_store.add_events(stored_events)
+        if not events:
+            return
+        if event_model is None:
+            # The widgets are built a chunk at a time between event loop iterations, and filtered as they are
+            # added.
+            self.video_widget_layout.queue_rows(
+                [event_key for _, _, event_key, _ in events], self.make_video_clip_widget)
+            return
+        first_row = event_model.rowCount()
+        event_model.add_events([(event_name, vide_files) for event_name, vide_files, _, _ in events])
+        for row, (_, _, _, clip_problems) in enumerate(events, start=first_row):
+            if clip_problems:
+                event_model.set_clip_problems(row, clip_problems)
+        self.on_event_rows_added(first_row, len(events))
+
+    def on_event_rows_added(self, first_row: int, count: int) -> None:
+        """Check newly added events against the event filter.
+        Args:
+            first_row (int): The first added row.
+            count (int): The number of added rows.
+        """
+        if self._event_filter is None:
+            return
+        # Only the new events are checked against the filter.
+        self.video_widget_layout.set_row_filter(
+            [row for row in range(first_row, first_row + count)
+             if self._event_query_index.matches(row, self._event_filter)], first_row=first_row)
+
+    def on_event_filter_changed(self, event_filter: Union[EventFilter, None]) -> None:
+        """Show only the events the filter bar matches.
+        Args:
+            event_filter (Union[EventFilter, None]): The filter, None shows every event.
+        """
+        self._event_filter = event_filter
+        if event_filter is None:
+            self.video_widget_layout.set_row_filter(None)
+            return
+        rows = self._event_query_index.filter_rows(event_filter)
+        logger.debug(f'Event filter {event_filter} matches {len(rows)} events.')
+        self.video_widget_layout.set_row_filter(rows)
+
+    def update_video_event(self, event_item: list, video_files: List[str]) -> None:
+        """Replace a listed event's video files.
+        Args:
+            event_item (list): The event's [row or VideoEventWidget, video files].
+            video_files (List[str]): The event's new video files.
+        """
+        event_item[1] = video_files
+        if isinstance(event_item[0], PendingEventWidget):
+            return
+        if isinstance(event_item[0], VideoEventWidget):
+            event_item[0].video_files = video_files
+            return
+        self.video_widget_layout.event_model.update_event(event_item[0], video_files)
+        if self._thumbnail_loader is not None:
+            self._thumbnail_loader.invalidate_row(event_item[0])
+
+    def set_event_clip_problems(self, event_item: list, clip_problems: Dict[str, str]) -> None:
+        """Badge a listed event's broken clips.
+        Args:
+            event_item (list): The event's [row or VideoEventWidget, video files].
+            clip_problems (Dict[str, str]): What is wrong keyed by video file, empty if no clip is broken.
+        """
+        if isinstance(event_item[0], PendingEventWidget):
+            event_item[0].clip_problems = clip_problems
+        elif isinstance(event_item[0], VideoEventWidget):
+            event_item[0].set_clip_problems(clip_problems)
+        else:
+            self.video_widget_layout.event_model.set_clip_problems(event_item[0], clip_problems)
+
+    def on_events_probed(self, event_data_objs: List[VideoEventData]) -> None:
+        """Add a batch of events whose MP4 metadata was read to the events summary.
+        Args:
+            event_data_objs (List[VideoEventData]): The probed video events.
+        """
+        for event_data in event_data_objs:
+            event_row = self._event_catalog.find(event_data.timestamp, event_data.dir_path)
+            if event_row is not None:
+                self._event_catalog.set_duration_ms(event_row.row, event_data.duration_ms)
+                # The clip's session is merged again with its probed duration.
+                self._drive_session_index.add(event_row)
+            self._events_summary[0] += 1
+            self._events_summary[1] += event_data.duration_ms or 0
+            self._events_summary[2] += event_data.is_truncated
+        self.command_buttons_row.set_events_summary(*self._events_summary)
+
+    def set_slider_range_from_metadata(self, event_key: Tuple[str, str]) -> None:
+        """Set the slider's range from an event's probed duration, before its media players report it.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        """
+        dir_path, event_name = event_key
+        event_row = self._event_catalog.find(event_name, dir_path)
+        if event_row is not None and event_row.duration_ms and not self.session_player.is_active:
+            self.slider.setRange(0, event_row.duration_ms)
+
+    def make_video_clip_widget(self, event_key: Tuple[str, str]) -> VideoEventWidget:
+        """Build the video clip widget of a listed event, for the event list to add.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp), under which its like and folder
+                tag are saved.
+        Returns:
+            VideoEventWidget: The event's widget.
+        """
+        event_item = self._event_items[event_key]
+        pending = event_item[0]
+        video_clip_widget = VideoEventWidget(pending.event_name, self.media_player_video_widget_dict,
+                                             event_item[1], self.player_pool)
+        if pending.clip_problems:
+            video_clip_widget.set_clip_problems(pending.clip_problems)
+        # Restored likes may have been set before the widget was built.
+        folder_tag = self.playback_controller.folder_tag(event_key)
+        if self.playback_controller.is_liked(event_key) or folder_tag:
+            video_clip_widget.set_liked(self.playback_controller.is_liked(event_key))
+            video_clip_widget.liked_folder_name_widget.setText(folder_tag)
+        event_item[0] = video_clip_widget
+        video_clip_widget.resumes_drive_session = event_key == self._drive_session_event_key
+        video_clip_widget.play_pressed.connect(partial(self.pause_others, event_key))
+        video_clip_widget.playback_started.connect(partial(self.on_event_playback_started, event_key))
+        video_clip_widget.playback_paused.connect(partial(self.on_event_playback_paused, event_key))
+        video_clip_widget.liked_changed.connect(partial(self.on_event_liked_changed, event_key))
+        video_clip_widget.folder_tag_changed.connect(partial(self.on_event_folder_tag_changed, event_key))
+        return video_clip_widget
+
+    def on_event_model_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex,
+                                    roles: List[int]) -> None:
+        """Keep and save the likes and folder tags edited in the model/view event list.
+        Args:
+            top_left (QModelIndex): The first changed row.
+            bottom_right (QModelIndex): The last changed row.
+            roles (List[int]): The changed roles.
+        """
+        if self._is_restoring_session:
+            return
+        is_liked_changed = IsLikedRole in roles
+        folder_tag_changed = FolderTagRole in roles or Qt.ItemDataRole.EditRole in roles
+        if not (is_liked_changed or folder_tag_changed):
+            return
+        event_model = self.video_widget_layout.event_model
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            # A catalog row is also the event's row in the list.
+            event_key = self._event_catalog[row].event_key
+            if is_liked_changed:
+                is_liked = event_model.data(event_model.index(row), IsLikedRole)
+                self.playback_controller.set_liked(event_key, is_liked)
+                self._session_store.set_liked(event_key, is_liked)
+            if folder_tag_changed:
+                folder_tag = event_model.data(event_model.index(row), FolderTagRole)
+                self.playback_controller.set_folder_tag(event_key, folder_tag)
+                self._session_store.set_folder_tag(event_key, folder_tag)
+
+    def restore_session(self) -> None:
+        """List the previous session's events with their likes and folder tags, from the session store only."""
+        self._restored_events = self._session_store.load_events()
+        self._restore_position = 0
+        if self._restored_events:
+            logger.info(f'Restoring {len(self._restored_events)} events of the previous session.')
+            self.restore_next_session_chunk()
+
+    def restore_next_session_chunk(self) -> None:
+        """List the next chunk of the previous session's events, then let the event loop run before the next."""
+        stored_events = self._restored_events[
+            self._restore_position:self._restore_position + SESSION_RESTORE_CHUNK_SIZE]
+        self._restore_position += len(stored_events)
+        event_data_objs = []
+        for stored_event in stored_events:
+            event_data_objs.extend(make_directory_events(stored_event.dir_path, stored_event.video_file_names))
+        self._is_restoring_session = True
+        try:
+            self.add_video_events(event_data_objs)
+            for stored_event in stored_events:
+                if stored_event.is_liked or stored_event.folder_tag:
+                    self.set_event_like_state((stored_event.dir_path, stored_event.timestamp),
+                                              stored_event.is_liked, stored_event.folder_tag)
+        finally:
+            self._is_restoring_session = False
+        if self._restore_position < len(self._restored_events):
+            QTimer.singleShot(0, self.restore_next_session_chunk)
+            return
+        dir_paths = {stored_event.dir_path for stored_event in self._restored_events}
+        self._restored_events = []
+        self.set_filter_bar_time_range()
+        if self.command_buttons_row.watch_folders_checkbox.isChecked():
+            # Once everything is listed, directories on drives which are plugged in are watched again.
+            self._folder_watcher.watch(sorted(dir_paths.union(self._session_store.roots())))
+
+    def set_event_like_state(self, event_key: Tuple[str, str], is_liked: bool, folder_tag: str) -> None:
+        """Set a listed event's like and folder tag.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+            is_liked (bool): Whether the event is liked.
+            folder_tag (str): The event's folder tag.
+        """
+        event_item = self._event_items.get(event_key)
+        if event_item is None:
+            return
+        self.playback_controller.set_liked(event_key, is_liked)
+        self.playback_controller.set_folder_tag(event_key, folder_tag)
+        if isinstance(event_item[0], PendingEventWidget):
+            return
+        if isinstance(event_item[0], VideoEventWidget):
+            event_item[0].set_liked(is_liked)
+            event_item[0].liked_folder_name_widget.setText(folder_tag)
+            return
+        event_model = self.video_widget_layout.event_model
+        index = event_model.index(event_item[0])
+        event_model.setData(index, is_liked, IsLikedRole)
+        event_model.setData(index, folder_tag, FolderTagRole)
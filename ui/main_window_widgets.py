@@ -1,12 +1,19 @@
 """Widgets which belong to the app's QMainWindow."""
-from PySide6.QtWidgets import QWidget, QHBoxLayout, QPushButton, QSizePolicy
+from typing import Callable
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QPushButton, QSizePolicy, QLabel, QCheckBox, QComboBox
 from PySide6.QtCore import Qt
 
+# The playback speeds offered, all four cameras play at the chosen speed.
+PLAYBACK_RATES = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+
 class CommandButtonsRow(QWidget):
-    def __init__(self, add_video: QPushButton, copy_liked_videos: QPushButton, parent: QWidget=None):
+    def __init__(self, add_video: QPushButton, copy_liked_videos: QPushButton, cancel_scan: Callable=None,
+                 cancel_copy: Callable=None, parent: QWidget=None):
         super().__init__(parent=parent)
         self._copy_liked_videos = copy_liked_videos
         self._add_video = add_video
+        self._cancel_scan = cancel_scan
+        self._cancel_copy = cancel_copy
         self.setup_ui()
 
     def setup_ui(self) -> None:
@@ -14,19 +21,119 @@ class CommandButtonsRow(QWidget):
         self.set_style()
         command_buttons_hlayout = QHBoxLayout()
         self.setLayout(command_buttons_hlayout)
-        add_video_button = QPushButton("Scan A Directory For Videos")
-        add_video_button.setFocusPolicy(Qt.NoFocus)
-        add_video_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        add_video_button.clicked.connect(self._add_video)
-        command_buttons_hlayout.addWidget(add_video_button)
+        self.add_video_button = QPushButton("Scan A Directory For Videos")
+        self.add_video_button.setFocusPolicy(Qt.NoFocus)
+        self.add_video_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.add_video_button.clicked.connect(self._add_video)
+        command_buttons_hlayout.addWidget(self.add_video_button)
+        # Cancel button and progress label are only shown while a scan is running.
+        self.cancel_scan_button = QPushButton("Cancel Scan")
+        self.cancel_scan_button.setFocusPolicy(Qt.NoFocus)
+        self.cancel_scan_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        if self._cancel_scan:
+            self.cancel_scan_button.clicked.connect(self._cancel_scan)
+        self.cancel_scan_button.hide()
+        command_buttons_hlayout.addWidget(self.cancel_scan_button)
+        self.scan_progress_label = QLabel("")
+        self.scan_progress_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.scan_progress_label.hide()
+        command_buttons_hlayout.addWidget(self.scan_progress_label)
+        # Total footage and truncated clips, filled in as the scanned events' MP4 metadata is read.
+        self.events_summary_label = QLabel("")
+        self.events_summary_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.events_summary_label.hide()
+        command_buttons_hlayout.addWidget(self.events_summary_label)
         command_buttons_hlayout.addStretch(stretch=50)
-        copy_liked_videos_button = QPushButton("Copy Liked Events")
-        copy_liked_videos_button.setFocusPolicy(Qt.NoFocus)
-        copy_liked_videos_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        copy_liked_videos_button.clicked.connect(self._copy_liked_videos)
-        command_buttons_hlayout.addWidget(copy_liked_videos_button)
+        self.copy_liked_videos_button = QPushButton("Copy Liked Events")
+        self.copy_liked_videos_button.setFocusPolicy(Qt.NoFocus)
+        self.copy_liked_videos_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.copy_liked_videos_button.clicked.connect(self._copy_liked_videos)
+        command_buttons_hlayout.addWidget(self.copy_liked_videos_button)
+        # Cancel button and progress label are only shown while liked events are being copied.
+        self.cancel_copy_button = QPushButton("Cancel Copy")
+        self.cancel_copy_button.setFocusPolicy(Qt.NoFocus)
+        self.cancel_copy_button.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        if self._cancel_copy:
+            self.cancel_copy_button.clicked.connect(self._cancel_copy)
+        self.cancel_copy_button.hide()
+        command_buttons_hlayout.addWidget(self.cancel_copy_button)
+        self.copy_progress_label = QLabel("")
+        self.copy_progress_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.copy_progress_label.hide()
+        command_buttons_hlayout.addWidget(self.copy_progress_label)
+        # Play the clips which follow the played event one after another, as a single drive.
+        self.continuous_playback_checkbox = QCheckBox("Continuous Drive Playback")
+        self.continuous_playback_checkbox.setFocusPolicy(Qt.NoFocus)
+        self.continuous_playback_checkbox.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        command_buttons_hlayout.addWidget(self.continuous_playback_checkbox)
+        # Add clips written to the scanned directories after the scan, e.g. by the car or a sync job.
+        self.watch_folders_checkbox = QCheckBox("Watch For New Clips")
+        self.watch_folders_checkbox.setFocusPolicy(Qt.NoFocus)
+        self.watch_folders_checkbox.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.watch_folders_checkbox.setChecked(True)
+        command_buttons_hlayout.addWidget(self.watch_folders_checkbox)
+        self.playback_rate_combo_box = QComboBox()
+        self.playback_rate_combo_box.setFocusPolicy(Qt.NoFocus)
+        self.playback_rate_combo_box.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        for rate in PLAYBACK_RATES:
+            self.playback_rate_combo_box.addItem(f"{rate:g}x", rate)
+        self.playback_rate_combo_box.setCurrentIndex(PLAYBACK_RATES.index(1.0))
+        command_buttons_hlayout.addWidget(self.playback_rate_combo_box)
         command_buttons_hlayout.addStretch(stretch=400)
 
+    def set_scan_in_progress(self, in_progress: bool) -> None:
+        """Show or hide the scan progress controls.
+        Args:
+            in_progress (bool): Whether a directory scan is running.
+        """
+        self.add_video_button.setEnabled(not in_progress)
+        self.cancel_scan_button.setVisible(in_progress)
+        self.scan_progress_label.setVisible(in_progress)
+        if in_progress:
+            self.scan_progress_label.setText("Scanning...")
+
+    def set_scan_progress(self, events_count: int) -> None:
+        """Update the scan progress label.
+        Args:
+            events_count (int): The number of events found so far.
+        """
+        self.scan_progress_label.setText(f"Scanning... {events_count} events found")
+
+    def set_events_summary(self, events_count: int, total_duration_ms: int, truncated_count: int) -> None:
+        """Show the probed events' total duration and how many of them have truncated clips.
+        Args:
+            events_count (int): The number of events probed so far.
+            total_duration_ms (int): The events' total duration in milliseconds.
+            truncated_count (int): The number of events with a truncated or unreadable clip.
+        """
+        hours, remainder = divmod(total_duration_ms // 1000, 3600)
+        text = f"{events_count} events, {hours}h {remainder // 60:02d}m of footage"
+        if truncated_count:
+            text += f", {truncated_count} truncated"
+        self.events_summary_label.setText(text)
+        self.events_summary_label.show()
+
+    def set_copy_in_progress(self, in_progress: bool) -> None:
+        """Show or hide the copy progress controls.
+        Args:
+            in_progress (bool): Whether liked events are being copied.
+        """
+        self.copy_liked_videos_button.setEnabled(not in_progress)
+        self.cancel_copy_button.setVisible(in_progress)
+        self.copy_progress_label.setVisible(in_progress)
+        if in_progress:
+            self.copy_progress_label.setText("Copying...")
+
+    def set_copy_progress(self, files_done: int, files_total: int, bytes_per_second: float) -> None:
+        """Update the copy progress label.
+        Args:
+            files_done (int): The number of files copied, skipped or failed so far.
+            files_total (int): The number of files to copy.
+            bytes_per_second (float): The copy throughput.
+        """
+        self.copy_progress_label.setText(
+            f"Copying... {files_done}/{files_total} files, {bytes_per_second / 1e6:.1f} MB/s")
+
     def set_style(self) -> None:
         """Apply a stylesheet."""
         qml = """
@@ -0,0 +1,119 @@
+"""Keeps which event is playing and which events are liked, so neither is looked up by walking the event list."""
+from typing import List, Tuple, Union
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtMultimedia import QMediaPlayer
+
+from ui.player_pool import MediaPlayerPool
+from ui.session_player import SessionPlayer
+
+
+class PlaybackController(QObject):
+    """The playing event and the liked events with their folder tags, keyed by event_key.
+
+    It tells the event list which event ended rather than every row checking whether it was the one playing.
+    While a drive session is loaded the session player owns the end of media, and the event only ends with the
+    session's last clip. Likes and folder tags are kept for every listed
+    event, including widgets which aren't built yet, so copying the liked events only visits those.
+    """
+    # The event_key of the event whose clips ended while it was playing.
+    playing_event_ended = Signal(object)
+
+    def __init__(self, player_pool: MediaPlayerPool, session_player: SessionPlayer,
+                 parent: Union[QObject, None]=None) -> None:
+        """
+        Args:
+            player_pool (MediaPlayerPool): The media players the events are played in.
+            session_player (SessionPlayer): Plays the drive sessions in the same players.
+            parent (Union[QObject, None], optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._playing_event_key = None
+        # Liked event_keys in the order they were liked, a dict keeps the order and finds a key in O(1).
+        self._liked_event_keys = {}
+        self._folder_tags = {}
+        self._session_player = session_player
+        player_pool.mediaStatusChanged.connect(self._on_media_status_changed)
+        session_player.session_ended.connect(self._on_session_ended)
+
+    @property
+    def playing_event_key(self) -> Union[Tuple[str, str], None]:
+        """The (directory, timestamp) of the playing event, None if no event is playing."""
+        return self._playing_event_key
+
+    def set_playing(self, event_key: Tuple[str, str]) -> Union[Tuple[str, str], None]:
+        """Make an event the playing one.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        Returns:
+            Union[Tuple[str, str], None]: The other event which was playing and should be paused, if any.
+        """
+        previous_event_key = self._playing_event_key
+        self._playing_event_key = event_key
+        return previous_event_key if previous_event_key != event_key else None
+
+    def set_paused(self, event_key: Tuple[str, str]) -> None:
+        """Record that an event was paused, if it was the playing one.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        """
+        if self._playing_event_key == event_key:
+            self._playing_event_key = None
+
+    def is_liked(self, event_key: Tuple[str, str]) -> bool:
+        """Whether an event is liked.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        Returns:
+            bool: True if the event is liked.
+        """
+        return event_key in self._liked_event_keys
+
+    def folder_tag(self, event_key: Tuple[str, str]) -> str:
+        """Get an event's folder tag.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+        Returns:
+            str: The folder tag, empty if the event has none.
+        """
+        return self._folder_tags.get(event_key, '')
+
+    def set_liked(self, event_key: Tuple[str, str], is_liked: bool) -> None:
+        """Like or unlike an event.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+            is_liked (bool): Whether the event is liked.
+        """
+        if is_liked:
+            self._liked_event_keys[event_key] = None
+        else:
+            self._liked_event_keys.pop(event_key, None)
+
+    def set_folder_tag(self, event_key: Tuple[str, str], folder_tag: str) -> None:
+        """Set the folder a liked event is copied into.
+        Args:
+            event_key (Tuple[str, str]): The event's (directory, timestamp).
+            folder_tag (str): The folder's name, empty for none.
+        """
+        if folder_tag:
+            self._folder_tags[event_key] = folder_tag
+        else:
+            self._folder_tags.pop(event_key, None)
+
+    def liked_event_keys(self) -> List[Tuple[str, str]]:
+        """Get the liked events.
+        Returns:
+            List[Tuple[str, str]]: The (directory, timestamp) of every liked event, in the order they were liked.
+        """
+        return list(self._liked_event_keys)
+
+    def _on_media_status_changed(self, status: QMediaPlayer.MediaStatus) -> None:
+        # A clip ending mid-session is the session player's to advance, whichever of the two hears it first.
+        if self._session_player.is_active:
+            return
+        if status == QMediaPlayer.MediaStatus.EndOfMedia and self._playing_event_key is not None:
+            self.playing_event_ended.emit(self._playing_event_key)
+
+    def _on_session_ended(self) -> None:
+        if self._playing_event_key is not None:
+            self.playing_event_ended.emit(self._playing_event_key)
@@ -0,0 +1,142 @@
+"""Keeps the back and repeater cameras' media players in step with the front camera's."""
+import logging
+from typing import Dict, Union
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtMultimedia import QMediaPlayer
+
+from file_utils.playback_drift import RESYNC, WITHIN_TOLERANCE, correct_drift
+from ui.player_pool import MediaPlayerPool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tesla cameras record at about 36 frames per second, so this is a little under a frame.
+DEFAULT_SYNC_TOLERANCE_MS = 25
+
+
+class PlaybackSynchronizer(QObject):
+    """Treats the front camera's media player as the master clock and corrects the other players' drift.
+
+    The four players are started one after another and decode independently, so they drift apart over a
+    clip and after seeks. While they play, every follower's position is sampled against the master's. A
+    follower off by more than the tolerance has its playback rate nudged by up to max_rate_adjustment, so
+    it catches up without a visible jump. A follower off by more than resync_threshold_ms, e.g. after a
+    seek landed on a different frame, is sought to the master's position instead.
+    """
+    def __init__(self, player_pool: MediaPlayerPool, tolerance_ms: int=DEFAULT_SYNC_TOLERANCE_MS,
+                 resync_threshold_ms: int=300, interval_ms: int=200, max_rate_adjustment: float=0.05,
+                 correction_ms: int=1000, parent: Union[QObject, None]=None) -> None:
+        """
+        Args:
+            player_pool (MediaPlayerPool): The media players to keep in step.
+            tolerance_ms (int, optional): Drift which is left alone. Defaults to DEFAULT_SYNC_TOLERANCE_MS.
+            resync_threshold_ms (int, optional): Drift which is corrected with a seek. Defaults to 300.
+            interval_ms (int, optional): How often the players are sampled. Defaults to 200.
+            max_rate_adjustment (float, optional): The largest change to a follower's playback rate, as a
+                fraction of the master's rate. Defaults to 0.05.
+            correction_ms (int, optional): The rate is adjusted to make up the drift over this long, up to
+                max_rate_adjustment. Defaults to 1000.
+            parent (Union[QObject, None], optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._player_pool = player_pool
+        self.tolerance_ms = tolerance_ms
+        self._resync_threshold_ms = resync_threshold_ms
+        self._max_rate_adjustment = max_rate_adjustment
+        self._correction_ms = correction_ms
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.synchronize)
+        self._player_pool.playbackStateChanged.connect(self._on_playback_state_changed)
+        # Swapped in players keep whatever rate they were left with.
+        self._player_pool.active_players_changed.connect(self.reset_rates)
+        self.reset_stats()
+
+    @property
+    def stats(self) -> dict:
+        """Drift instrumentation since the last reset_stats().
+        Returns:
+            dict: samples, the mean and max absolute drift in milliseconds, the fraction of samples within
+                tolerance, rate corrections, resyncs, and the max absolute drift per camera.
+        """
+        samples = self._samples
+        return {
+            'samples': samples,
+            'mean_drift_ms': self._drift_sum_ms / samples if samples else 0.0,
+            'max_drift_ms': max(self._max_drift_ms.values(), default=0),
+            'within_tolerance': self._within_tolerance / samples if samples else 1.0,
+            'rate_corrections': self._rate_corrections,
+            'resyncs': self._resyncs,
+            'max_drift_ms_by_camera': dict(self._max_drift_ms),
+        }
+
+    def reset_stats(self) -> None:
+        """Reset the drift instrumentation."""
+        self._samples = 0
+        self._drift_sum_ms = 0
+        self._within_tolerance = 0
+        self._rate_corrections = 0
+        self._resyncs = 0
+        self._max_drift_ms: Dict[str, int] = {}
+
+    def log_stats(self) -> None:
+        """Log the drift instrumentation."""
+        stats = self.stats
+        if not stats['samples']:
+            return
+        logger.info(f"Playback drift over {stats['samples']} samples: mean {stats['mean_drift_ms']:.1f} ms, "
+                    f"max {stats['max_drift_ms']} ms, {stats['within_tolerance']:.1%} within "
+                    f"{self.tolerance_ms} ms, {stats['rate_corrections']} rate corrections, "
+                    f"{stats['resyncs']} resyncs.")
+
+    def reset_rates(self) -> None:
+        """Play every active player at the pool's rate."""
+        rate = self._player_pool.playback_rate
+        for media_player in self._player_pool.media_players():
+            if media_player.playbackRate() != rate:
+                media_player.setPlaybackRate(rate)
+
+    def synchronize(self) -> None:
+        """Sample the followers' drift from the master and correct it."""
+        main_player = self._player_pool.main_player
+        media_players = self._player_pool.media_players()
+        # Seeks and loads make a player's position jump, those samples would only measure the seek.
+        if not all(self._is_settled(media_player) for media_player in media_players):
+            return
+        master_position = main_player.position()
+        master_rate = self._player_pool.playback_rate
+        for camera_name, media_player in zip(self._player_pool.camera_names, media_players):
+            if media_player is main_player:
+                continue
+            # Positive when the follower is ahead of the master.
+            drift_ms = media_player.position() - master_position
+            abs_drift_ms = abs(drift_ms)
+            self._samples += 1
+            self._drift_sum_ms += abs_drift_ms
+            if abs_drift_ms > self._max_drift_ms.get(camera_name, -1):
+                self._max_drift_ms[camera_name] = abs_drift_ms
+            correction = correct_drift(drift_ms, master_rate, self.tolerance_ms, self._resync_threshold_ms,
+                                       self._max_rate_adjustment, self._correction_ms)
+            if correction.kind == WITHIN_TOLERANCE:
+                self._within_tolerance += 1
+            elif correction.kind == RESYNC:
+                self._resyncs += 1
+                media_player.setPosition(master_position)
+            else:
+                self._rate_corrections += 1
+            if media_player.playbackRate() != correction.rate:
+                media_player.setPlaybackRate(correction.rate)
+
+    def _on_playback_state_changed(self, state: QMediaPlayer.PlaybackState) -> None:
+        if state == QMediaPlayer.PlaybackState.PlayingState:
+            self._timer.start()
+            return
+        self._timer.stop()
+        self.reset_rates()
+        self.log_stats()
+
+    @staticmethod
+    def _is_settled(media_player: QMediaPlayer) -> bool:
+        return (media_player.playbackState() == QMediaPlayer.PlaybackState.PlayingState and
+                media_player.mediaStatus() == QMediaPlayer.MediaStatus.BufferedMedia)
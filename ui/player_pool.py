@@ -0,0 +1,192 @@
+"""A double buffered set of media players, so the next event is already opened when it is played."""
+import logging
+import os
+from typing import Dict, List, Union
+
+from PySide6.QtCore import QObject, QUrl, Signal
+from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MediaPlayerPool(QObject):
+    """Owns two sets of four media players: the active set shown in the video widgets, and a standby set.
+
+    The standby set opens the sources of the event which is likely to be played next. Playing that event
+    swaps the sets, so its demuxers and decoders are already set up. The active set is always the one in
+    media_player_video_widget_dict, and the front player's signals are forwarded by the pool so receivers
+    don't have to reconnect after a swap.
+    """
+    positionChanged = Signal(int)
+    durationChanged = Signal(int)
+    mediaStatusChanged = Signal(QMediaPlayer.MediaStatus)
+    playbackStateChanged = Signal(QMediaPlayer.PlaybackState)
+    active_players_changed = Signal()
+
+    def __init__(self, media_player_video_widget_dict: dict, camera_names: List[str], parent: QObject=None) -> None:
+        """
+        Args:
+            media_player_video_widget_dict (dict): The camera's video widgets keyed by camera name. The media
+                player and audio output entries are added, and updated on every swap.
+            camera_names (List[str]): The camera names, in the order of an event's video files.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self.media_player_video_widget_dict = media_player_video_widget_dict
+        self._camera_names = camera_names
+        self._active = self._make_player_set()
+        self._standby = self._make_player_set()
+        self._standby_video_files = None
+        self._playback_rate = 1.0
+        for camera_name in camera_names:
+            widgets_dict = media_player_video_widget_dict[camera_name]
+            widgets_dict['media_player'] = self._active[camera_name]['media_player']
+            widgets_dict['audio_output'] = self._active[camera_name]['audio_output']
+            widgets_dict['media_player'].setVideoOutput(widgets_dict['video_widget'])
+        self._connect_main_player()
+
+    @property
+    def main_player(self) -> QMediaPlayer:
+        """The active front camera's media player, which the other players follow.
+        Returns:
+            QMediaPlayer: The media player.
+        """
+        return self._active['front']['media_player']
+
+    @property
+    def camera_names(self) -> List[str]:
+        """The camera names, in the order of an event's video files and of media_players().
+        Returns:
+            List[str]: The camera names.
+        """
+        return self._camera_names
+
+    def media_players(self) -> List[QMediaPlayer]:
+        """The active media players.
+        Returns:
+            List[QMediaPlayer]: The media players, in camera name order.
+        """
+        return [self._active[camera_name]['media_player'] for camera_name in self._camera_names]
+
+    @property
+    def playback_rate(self) -> float:
+        """The rate every media player plays at, 1.0 is normal speed.
+        Returns:
+            float: The playback rate.
+        """
+        return self._playback_rate
+
+    def set_playback_rate(self, rate: float) -> None:
+        """Play the active and standby media players at a rate, so swapped in players keep it.
+        Args:
+            rate (float): The playback rate, 1.0 is normal speed.
+        """
+        self._playback_rate = rate
+        for player_set in (self._active, self._standby):
+            for camera_name in self._camera_names:
+                player_set[camera_name]['media_player'].setPlaybackRate(rate)
+
+    def load(self, video_files: List[str]) -> bool:
+        """Make the active players show an event's video files.
+
+        Nothing is reopened if they already show them, and the standby players are swapped in if they
+        preloaded them. The players of cameras the event has no file for, or whose path is empty, are cleared.
+        Args:
+            video_files (List[str]): The event's video files.
+        Returns:
+            bool: True if sources were changed, False if the active players already had them.
+        """
+        camera_video_files = self._camera_video_files(video_files)
+        if self._has_sources(self._active, camera_video_files):
+            return False
+        if self._standby_video_files == camera_video_files:
+            self._swap()
+            return True
+        for media_player, fpath in zip(self.media_players(), camera_video_files):
+            media_player.setSource(self._source_url(fpath))
+        return True
+
+    def preload(self, video_files: Union[List[str], None]) -> None:
+        """Open an event's video files in the standby players.
+        Args:
+            video_files (Union[List[str], None]): The event's video files, as they will be passed to load.
+        """
+        camera_video_files = self._camera_video_files(video_files or [])
+        if not any(camera_video_files) or self._standby_video_files == camera_video_files:
+            return
+        if self._has_sources(self._active, camera_video_files):
+            return
+        self._standby_video_files = camera_video_files
+        for camera_name, fpath in zip(self._camera_names, camera_video_files):
+            media_player = self._standby[camera_name]['media_player']
+            media_player.stop()
+            media_player.setSource(self._source_url(fpath))
+
+    def _swap(self) -> None:
+        self._disconnect_main_player()
+        for media_player in self.media_players():
+            media_player.pause()
+        self._active, self._standby = self._standby, self._active
+        self._standby_video_files = None
+        for camera_name in self._camera_names:
+            widgets_dict = self.media_player_video_widget_dict[camera_name]
+            self._standby[camera_name]['media_player'].setVideoOutput(None)
+            widgets_dict['media_player'] = self._active[camera_name]['media_player']
+            widgets_dict['audio_output'] = self._active[camera_name]['audio_output']
+            widgets_dict['media_player'].setVideoOutput(widgets_dict['video_widget'])
+        self._connect_main_player()
+        self.active_players_changed.emit()
+        # The new active player's duration was reported while it was on standby.
+        self.durationChanged.emit(self.main_player.duration())
+
+    def _connect_main_player(self) -> None:
+        main_player = self.main_player
+        main_player.positionChanged.connect(self.positionChanged)
+        main_player.durationChanged.connect(self.durationChanged)
+        main_player.mediaStatusChanged.connect(self.mediaStatusChanged)
+        main_player.playbackStateChanged.connect(self.playbackStateChanged)
+
+    def _disconnect_main_player(self) -> None:
+        main_player = self.main_player
+        main_player.positionChanged.disconnect(self.positionChanged)
+        main_player.durationChanged.disconnect(self.durationChanged)
+        main_player.mediaStatusChanged.disconnect(self.mediaStatusChanged)
+        main_player.playbackStateChanged.disconnect(self.playbackStateChanged)
+
+    def _make_player_set(self) -> Dict[str, dict]:
+        player_set = {}
+        for camera_name in self._camera_names:
+            media_player = QMediaPlayer(self)
+            audio_output = QAudioOutput(self)
+            audio_output.setMuted(True)
+            media_player.setAudioOutput(audio_output)
+            player_set[camera_name] = {'media_player': media_player, 'audio_output': audio_output}
+        return player_set
+
+    def _camera_video_files(self, video_files: List[str]) -> List[str]:
+        """Match video files to the cameras by file name rather than position, as an event may lack a camera.
+        Args:
+            video_files (List[str]): The video files, empty paths are skipped.
+        Returns:
+            List[str]: One path per camera in camera name order, empty for a camera without a file.
+        """
+        camera_video_files = dict.fromkeys(self._camera_names, '')
+        for fpath in video_files:
+            file_name = os.path.basename(fpath)
+            for camera_name in self._camera_names:
+                if camera_name in file_name:
+                    camera_video_files[camera_name] = fpath
+                    break
+        return list(camera_video_files.values())
+
+    @staticmethod
+    def _source_url(fpath: str) -> QUrl:
+        # An empty url clears the player rather than leaving the previous event's clip in it.
+        return QUrl.fromLocalFile(fpath) if fpath else QUrl()
+
+    def _has_sources(self, player_set: Dict[str, dict], camera_video_files: List[str]) -> bool:
+        for camera_name, fpath in zip(self._camera_names, camera_video_files):
+            if player_set[camera_name]['media_player'].source() != self._source_url(fpath):
+                return False
+        return True
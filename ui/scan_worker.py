@@ -0,0 +1,78 @@
+"""A background thread which scans a directory for video events without blocking the UI."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Union
+
+from PySide6.QtCore import QThread, Signal, QObject
+
+from file_utils.scan_index import ScanIndex
+from file_utils.video_events import iter_video_event_batches, probe_video_events
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class DirectoryScanThread(QThread):
+    """Walk a directory tree on a worker thread and stream the discovered events back to the UI."""
+    events_found = Signal(list)
+    events_probed = Signal(list)
+    progress = Signal(int)
+    directories_scanned = Signal(list)
+    scan_finished = Signal(bool)
+
+    def __init__(self, dir_path: Union[Path, str], use_scan_index: bool=True, parent: QObject=None) -> None:
+        """
+        Args:
+            dir_path (Path|str): The directory to scan, subdirectories are also scanned.
+            use_scan_index (bool, optional): Reuse the on-disk index of previous scans. Defaults to True.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._dir_path = dir_path
+        self._use_scan_index = use_scan_index
+        self._is_cancelled = False
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Whether the scan was cancelled.
+        Returns:
+            bool: True if cancel() was called.
+        """
+        return self._is_cancelled
+
+    def cancel(self) -> None:
+        """Ask the scan to stop, it stops after the directory currently being read."""
+        self._is_cancelled = True
+
+    def run(self) -> None:
+        """Scan the directory, emitting events_found for every batch and progress with the running total."""
+        events_count = 0
+        # SQLite connections can only be used by the thread which created them.
+        scan_index = ScanIndex() if self._use_scan_index else None
+        # Events are shown as soon as they are found, their MP4 metadata follows once it has been read.
+        probe_executor = ThreadPoolExecutor(max_workers=4)
+        visited_dirs = []
+        batches = iter_video_event_batches(self._dir_path, is_cancelled=lambda: self._is_cancelled,
+                                           scan_index=scan_index, visited_dirs=visited_dirs)
+        try:
+            for batch in batches:
+                events_count += len(batch)
+                # Signals emitted from this thread are queued to the receivers living in the GUI thread.
+                self.events_found.emit(batch)
+                self.progress.emit(events_count)
+                probe_executor.submit(self._probe_batch, batch)
+        finally:
+            # The generator commits the scan index when it is closed, which has to happen before the index is.
+            batches.close()
+            if scan_index is not None:
+                scan_index.close()
+            probe_executor.shutdown(wait=True, cancel_futures=self._is_cancelled)
+        logger.info(f'Scan of {self._dir_path} found {events_count} events. Cancelled: {self._is_cancelled}')
+        self.directories_scanned.emit(visited_dirs)
+        self.scan_finished.emit(self._is_cancelled)
+
+    def _probe_batch(self, batch: list) -> None:
+        if self._is_cancelled:
+            return
+        probe_video_events(batch, max_workers=2)
+        self.events_probed.emit(batch)
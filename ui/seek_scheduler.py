@@ -0,0 +1,123 @@
+"""Coalesces and rate limits the seeks sent to the four media players while the timeline is dragged."""
+import logging
+import time
+from typing import Union
+
+from PySide6.QtCore import QObject, QTimer
+
+from ui.player_pool import MediaPlayerPool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SeekScheduler(QObject):
+    """Sends the latest requested position to every media player, at most once per interval.
+
+    A drag emits far more positions than four decoders can seek to, so only the newest pending position is
+    kept (latest wins). A new seek is dispatched when the front player reported the previous one, or when
+    the interval has passed without it doing so. seek_now() bypasses the scheduling for a final precise seek.
+    """
+    def __init__(self, player_pool: MediaPlayerPool, min_interval_ms: int=40, max_wait_ms: int=250,
+                 position_tolerance_ms: int=100, parent: Union[QObject, None]=None) -> None:
+        """
+        Args:
+            player_pool (MediaPlayerPool): The media players to seek.
+            min_interval_ms (int, optional): The minimum time between two dispatched seeks. Defaults to 40.
+            max_wait_ms (int, optional): Dispatch the next seek even if the previous one wasn't reported by
+                then. Defaults to 250.
+            position_tolerance_ms (int, optional): How close a reported position has to be to count as the
+                seek having landed. Defaults to 100.
+            parent (Union[QObject, None], optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._player_pool = player_pool
+        self._max_wait = max_wait_ms / 1000
+        self._position_tolerance_ms = position_tolerance_ms
+        self._pending_position = None
+        self._pending_request_time = 0.0
+        self._in_flight_position = None
+        self._in_flight_request_time = 0.0
+        self._in_flight_dispatch_time = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(min_interval_ms)
+        self._timer.timeout.connect(self._on_timer)
+        self._player_pool.positionChanged.connect(self._on_position_changed)
+        self.reset_stats()
+
+    @property
+    def stats(self) -> dict:
+        """Seek instrumentation since the last reset_stats().
+        Returns:
+            dict: requests, dispatched, landed, and mean/max handle to frame latency in milliseconds.
+        """
+        landed = len(self._latencies)
+        return {
+            'requests': self._requests,
+            'dispatched': self._dispatched,
+            'landed': landed,
+            'mean_latency_ms': sum(self._latencies) / landed * 1000 if landed else 0.0,
+            'max_latency_ms': max(self._latencies) * 1000 if landed else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        """Reset the seek instrumentation."""
+        self._requests = 0
+        self._dispatched = 0
+        self._latencies = []
+
+    def request_seek(self, position: int) -> None:
+        """Ask for the media players to seek, the seek may be merged with later requests.
+        Args:
+            position (int): The position in milliseconds.
+        """
+        self._requests += 1
+        self._pending_position = position
+        self._pending_request_time = time.perf_counter()
+        if not self._timer.isActive():
+            # Idle, seek right away and then throttle the requests which follow.
+            self._dispatch()
+            self._timer.start()
+
+    def seek_now(self, position: int) -> None:
+        """Drop any pending seek and seek every media player to position immediately.
+        Args:
+            position (int): The position in milliseconds.
+        """
+        self._requests += 1
+        self._timer.stop()
+        self._pending_position = position
+        self._pending_request_time = time.perf_counter()
+        self._dispatch()
+
+    def log_stats(self) -> None:
+        """Log the seek instrumentation."""
+        stats = self.stats
+        logger.info(f"Seeks requested: {stats['requests']}, dispatched: {stats['dispatched']}, "
+                    f"landed: {stats['landed']}, handle to frame latency mean: {stats['mean_latency_ms']:.1f} ms, "
+                    f"max: {stats['max_latency_ms']:.1f} ms")
+
+    def _on_timer(self) -> None:
+        if self._pending_position is None:
+            self._timer.stop()
+            return
+        waiting_for = time.perf_counter() - self._in_flight_dispatch_time
+        if self._in_flight_position is None or waiting_for >= self._max_wait:
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        position = self._pending_position
+        self._pending_position = None
+        self._in_flight_position = position
+        self._in_flight_request_time = self._pending_request_time
+        self._in_flight_dispatch_time = time.perf_counter()
+        self._dispatched += 1
+        for media_player in self._player_pool.media_players():
+            media_player.setPosition(position)
+
+    def _on_position_changed(self, position: int) -> None:
+        if self._in_flight_position is None:
+            return
+        if abs(position - self._in_flight_position) <= self._position_tolerance_ms:
+            self._latencies.append(time.perf_counter() - self._in_flight_request_time)
+            self._in_flight_position = None
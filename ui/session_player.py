@@ -0,0 +1,163 @@
+"""Plays a drive session's clips back to back on a single timeline."""
+import logging
+from typing import Dict, List, Union
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtMultimedia import QMediaPlayer
+
+from constants import TESLAS_CAMERA_NAMES
+from file_utils.mp4_boxes import Mp4ParseError, nearest_keyframe_time, read_video_track_tables
+from file_utils.sessions import DriveSession
+from ui.player_pool import MediaPlayerPool
+from ui.seek_scheduler import SeekScheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A clip is treated as finished this close to its end. Switching before EndOfMedia avoids the players
+# stopping and the pause/resume which would follow it.
+CLIP_END_MARGIN_MS = 40
+
+
+class SessionPlayer(QObject):
+    """Drives the player pool through a drive session.
+
+    The next clip is always preloaded in the pool's standby players, so crossing a clip boundary is a swap
+    of already opened players rather than opening four new sources. Positions are reported and sought on
+    the session's global timeline.
+    """
+    position_changed = Signal(int)
+    duration_changed = Signal(int)
+    # Emitted when the session's last clip ends while playing.
+    session_ended = Signal()
+
+    def __init__(self, player_pool: MediaPlayerPool, seek_scheduler: SeekScheduler, parent: QObject=None) -> None:
+        """
+        Args:
+            player_pool (MediaPlayerPool): The media players.
+            seek_scheduler (SeekScheduler): Used for seeks within the current clip.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._player_pool = player_pool
+        self._seek_scheduler = seek_scheduler
+        self._session: Union[DriveSession, None] = None
+        self._clip_index = 0
+        self._is_playing = False
+        # Keyframe times of the session's clips read so far, keyed by clip index.
+        self._keyframe_times_ms: Dict[int, List[int]] = {}
+        self._player_pool.positionChanged.connect(self._on_position_changed)
+        self._player_pool.mediaStatusChanged.connect(self._on_media_status_changed)
+
+    @property
+    def is_active(self) -> bool:
+        """Whether a session is loaded.
+        Returns:
+            bool: True if a session is loaded.
+        """
+        return self._session is not None
+
+    @property
+    def session(self) -> Union[DriveSession, None]:
+        """The loaded session.
+        Returns:
+            Union[DriveSession, None]: The session, None if no session is loaded.
+        """
+        return self._session
+
+    def start(self, session: DriveSession, clip_index: int, offset_ms: int=0) -> None:
+        """Load a session and play it from a clip.
+        Args:
+            session (DriveSession): The session.
+            clip_index (int): The clip to start from.
+            offset_ms (int, optional): The offset into the clip. Defaults to 0.
+        """
+        self._session = session
+        self._is_playing = True
+        self._keyframe_times_ms = {}
+        self.duration_changed.emit(session.duration_ms)
+        logger.info(f'Playing a drive session of {len(session.clips)} clips from clip {clip_index}.')
+        self._load_clip(clip_index, offset_ms)
+
+    def stop(self) -> None:
+        """Unload the session, the players are left as they are."""
+        self._session = None
+        self._is_playing = False
+
+    def set_playing(self, is_playing: bool) -> None:
+        """Track whether the session is playing, clips are only advanced while it is.
+        Args:
+            is_playing (bool): Whether the players are playing.
+        """
+        self._is_playing = is_playing
+
+    def seek(self, position_ms: int, precise: bool=True) -> None:
+        """Seek to a position on the session's timeline, changing clips if needed.
+        Args:
+            position_ms (int): The position in milliseconds.
+            precise (bool, optional): Seek immediately instead of letting the seek scheduler coalesce it. A
+                seek which isn't precise, e.g. while the slider is dragged, is snapped to the clip's nearest
+                keyframe. Defaults to True.
+        """
+        if self._session is None:
+            return
+        clip_index, offset_ms = self._session.locate(position_ms)
+        if not precise:
+            # Keyframes can be shown without decoding the frames before them, so seeking to them is cheap.
+            offset_ms = nearest_keyframe_time(self._clip_keyframe_times_ms(clip_index), offset_ms)
+        if clip_index != self._clip_index:
+            self._load_clip(clip_index, offset_ms)
+        elif precise:
+            self._seek_scheduler.seek_now(offset_ms)
+        else:
+            self._seek_scheduler.request_seek(offset_ms)
+
+    def _clip_keyframe_times_ms(self, clip_index: int) -> List[int]:
+        keyframe_times_ms = self._keyframe_times_ms.get(clip_index)
+        if keyframe_times_ms is None:
+            keyframe_times_ms = []
+            video_files = self._session.clips[clip_index].video_files
+            # The front camera's clip, which the other cameras follow, or another camera if it is missing.
+            for fpath in [video_files[TESLAS_CAMERA_NAMES.index('front')]] + video_files:
+                if not fpath:
+                    continue
+                try:
+                    keyframe_times_ms = read_video_track_tables(fpath).keyframe_times_ms
+                    break
+                except (OSError, Mp4ParseError) as e:
+                    logger.warning(f'Could not read the keyframes of {fpath}: {e}')
+            self._keyframe_times_ms[clip_index] = keyframe_times_ms
+        return keyframe_times_ms
+
+    def _load_clip(self, clip_index: int, offset_ms: int) -> None:
+        self._clip_index = clip_index
+        clips = self._session.clips
+        self._player_pool.load(clips[clip_index].video_files)
+        for media_player in self._player_pool.media_players():
+            media_player.setPosition(offset_ms)
+            if self._is_playing:
+                media_player.play()
+        if clip_index + 1 < len(clips):
+            self._player_pool.preload(clips[clip_index + 1].video_files)
+
+    def _advance(self) -> None:
+        if self._clip_index + 1 >= len(self._session.clips):
+            return
+        self._load_clip(self._clip_index + 1, 0)
+
+    def _on_position_changed(self, position: int) -> None:
+        if self._session is None:
+            return
+        clip = self._session.clips[self._clip_index]
+        self.position_changed.emit(clip.start_ms + position)
+        if self._is_playing and position >= self._player_pool.main_player.duration() - CLIP_END_MARGIN_MS > 0:
+            self._advance()
+
+    def _on_media_status_changed(self, status: QMediaPlayer.MediaStatus) -> None:
+        if self._session is None or not self._is_playing or status != QMediaPlayer.MediaStatus.EndOfMedia:
+            return
+        if self._clip_index + 1 < len(self._session.clips):
+            self._advance()
+        else:
+            self._is_playing = False
+            self.session_ended.emit()
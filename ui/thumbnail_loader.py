@@ -0,0 +1,103 @@
+"""Loads event thumbnails in the background for the rows of the event list which are on screen."""
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List
+
+from PySide6.QtCore import QObject, Signal
+
+from file_utils.thumbnails import ThumbnailCache, find_ffmpeg, make_event_thumbnail
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailLoader(QObject):
+    """Makes thumbnails for the visible rows on a pool of worker threads.
+
+    Every worker waits on its own ffmpeg process, so the frames are decoded in parallel processes while
+    the GUI thread only receives finished thumbnail paths. Requests for rows which scrolled out of view
+    before a worker picked them up are cancelled.
+    """
+    thumbnail_ready = Signal(int, str)
+    _thumbnail_finished = Signal(int, str)
+
+    def __init__(self, max_workers: int=max(1, min(4, (os.cpu_count() or 2) // 2)), parent: QObject=None) -> None:
+        """
+        Args:
+            max_workers (int, optional): The number of thumbnails made at once.
+            parent (QObject, optional): The parent object. Defaults to None.
+        """
+        super().__init__(parent=parent)
+        self._ffmpeg_fpath = find_ffmpeg()
+        self._executor = None
+        self._cache = None
+        self._pending: Dict[int, Future] = {}
+        self._done_rows = set()
+        # Bookkeeping happens in the GUI thread, the workers only emit this queued signal.
+        self._thumbnail_finished.connect(self._on_thumbnail_finished)
+        if self._ffmpeg_fpath:
+            self._cache = ThumbnailCache()
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        else:
+            logger.info('ffmpeg was not found, event thumbnails are disabled.')
+
+    @property
+    def is_enabled(self) -> bool:
+        """Whether thumbnails can be made.
+        Returns:
+            bool: True if ffmpeg is available.
+        """
+        return self._executor is not None
+
+    def set_visible_rows(self, rows: Dict[int, List[str]]) -> None:
+        """Request thumbnails for the visible rows and cancel the requests of rows no longer visible.
+        Args:
+            rows (Dict[int, List[str]]): The visible rows' video files, keyed by row.
+        """
+        if not self.is_enabled:
+            return
+        for row in list(self._pending):
+            if row not in rows and self._pending[row].cancel():
+                del self._pending[row]
+        for row, video_files in rows.items():
+            if row in self._pending or row in self._done_rows or not video_files:
+                continue
+            future = self._executor.submit(make_event_thumbnail, video_files, self._cache, self._ffmpeg_fpath)
+            future.add_done_callback(lambda done_future, row=row: self._on_done(row, done_future))
+            self._pending[row] = future
+
+    def invalidate_row(self, row: int) -> None:
+        """Make a row's thumbnail again the next time it is visible, e.g. after a camera's clip was added.
+        Args:
+            row (int): The row.
+        """
+        future = self._pending.pop(row, None)
+        if future is not None:
+            future.cancel()
+        self._done_rows.discard(row)
+
+    def reset(self) -> None:
+        """Forget every row, e.g. after the event list was cleared."""
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._done_rows.clear()
+
+    def shutdown(self) -> None:
+        """Cancel pending thumbnails and stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, row: int, future: Future) -> None:
+        # Runs on a worker thread, or in the GUI thread for cancelled futures.
+        if future.cancelled():
+            return
+        thumbnail_fpath = future.result()
+        self._thumbnail_finished.emit(row, os.fspath(thumbnail_fpath) if thumbnail_fpath is not None else '')
+
+    def _on_thumbnail_finished(self, row: int, thumbnail_fpath: str) -> None:
+        self._pending.pop(row, None)
+        self._done_rows.add(row)
+        if thumbnail_fpath:
+            self.thumbnail_ready.emit(row, thumbnail_fpath)
@@ -1,17 +1,27 @@
 """A widget to scrub through the video timeline manually."""
+import logging
 import platform
 from typing import Union
 from PySide6.QtWidgets import QSlider, QWidget
 from PySide6.QtCore import Qt, QRect, QSize
-from PySide6.QtGui import QPainter, QColor, QSurfaceFormat, QPaintEvent
+from PySide6.QtMultimedia import QMediaPlayer
+from PySide6.QtGui import QPainter, QColor, QSurfaceFormat, QPaintEvent, QKeyEvent
+
+from file_utils.mp4_boxes import Mp4ParseError, nearest_keyframe_time, read_video_track_tables, step_frame_time
+from ui.player_pool import MediaPlayerPool
+from ui.seek_scheduler import SeekScheduler
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 class TimelineSliderWidget(QSlider):
-    def __init__(self, media_player_video_widget_dict: dict,
+    def __init__(self, media_player_video_widget_dict: dict, player_pool: MediaPlayerPool,
                  orientation: Qt.Orientation=Qt.Orientation.Horizontal,
                  parent: Union[QWidget, None]=None):
         """A widget to scrub through the video timeline manually.
         Args:
             media_player_video_widget_dict (dict): A dictionary containing the media player and video widget.
+            player_pool (MediaPlayerPool): The pool which owns the active media players.
             orientation (Qt.Orientation, optional): The orientation of the slider. Defaults to Qt.Orientation.Horizontal.
             parent (Union[QWidget, None], optional): The parent widget. Defaults to None.
         """
@@ -19,13 +29,27 @@ class TimelineSliderWidget(QSlider):
         self._handle_size = 30 # Diameter of the slider's handle.
         # Flag to see if timeline is being manually scrolled.
         self.is_dragging = False
-        # Flag to track if an arrow key is pressed
+        # Flag to track if an arrow key is pressed, the left and right arrow keys step a frame at a time.
         self.arrow_key_pressed = False
         self.media_player_video_widget_dict = media_player_video_widget_dict
-        self.main_player = media_player_video_widget_dict['front']['media_player']
+        self._player_pool = player_pool
+        # Coalesces the seeks of a drag so the decoders only get as many as they can keep up with.
+        self.seek_scheduler = SeekScheduler(player_pool, parent=self)
+        # When a drive session is playing the slider spans the whole session, see ui.session_player.
+        self.session_player = None
+        # Keyframe times of the front camera's clip, in-drag seeks are snapped to them.
+        self._keyframe_times_ms = []
         self.setup_ui()
         self.setup_connections()
 
+    @property
+    def main_player(self) -> QMediaPlayer:
+        """The active front camera's media player, it changes when the player pool swaps players.
+        Returns:
+            QMediaPlayer: The media player.
+        """
+        return self._player_pool.main_player
+
     def setup_connections(self) -> None:
         """ Setup the widget's connections. """
         self.sliderMoved.connect(self.on_slider_moved)
@@ -43,6 +67,10 @@ class TimelineSliderWidget(QSlider):
     def on_slider_pressed(self) -> None:
         """Pause video when slider is pressed."""
         self.is_dragging = True
+        self.seek_scheduler.reset_stats()
+        self._keyframe_times_ms = self.read_main_player_keyframe_times()
+        if self.session_player is not None and self.session_player.is_active:
+            self.session_player.set_playing(False)
         for camera_name, widgets_dict in self.media_player_video_widget_dict.items():
             media_player = self.media_player_video_widget_dict[camera_name]['media_player']
             media_player.pause()
@@ -54,10 +82,16 @@ class TimelineSliderWidget(QSlider):
         if duration:
             # Map the slider value to the video's position in milliseconds
             new_position = int(self.value())
+            # One final precise seek to where the handle was released.
+            if self.session_player is not None and self.session_player.is_active:
+                self.session_player.set_playing(True)
+                self.session_player.seek(new_position, precise=True)
+            else:
+                self.seek_scheduler.seek_now(new_position)
             for camera_name, widgets_dict in self.media_player_video_widget_dict.items():
                 media_player = self.media_player_video_widget_dict[camera_name]['media_player']
-                media_player.setPosition(new_position)  # Seek to new position
                 media_player.play()
+            self.seek_scheduler.log_stats()
 
     def on_slider_moved(self, position: int) -> None:
         """ Seek video when slider is moved.
@@ -65,21 +99,80 @@ class TimelineSliderWidget(QSlider):
                 position (int): The position of the slider.
         """
         duration = self.main_player.duration()  # Get total video duration in milliseconds
-        if duration:
-            new_position = position
-            for camera_name, widgets_dict in self.media_player_video_widget_dict.items():
-                media_player = self.media_player_video_widget_dict[camera_name]['media_player']
-                media_player.setPosition(new_position)  # Seek to new position
+        if duration and self.session_player is not None and self.session_player.is_active:
+            # The position is on the session's timeline, the session player maps it to a clip.
+            self.session_player.seek(position, precise=False)
+        elif duration:
+            # Keyframes can be shown without decoding the frames before them, so seeking to them is
+            # cheap. The exact position is sought once the slider is released.
+            new_position = nearest_keyframe_time(self._keyframe_times_ms, position)
+            self.seek_scheduler.request_seek(new_position)
+
+    def read_main_player_keyframe_times(self) -> list:
+        """Read the keyframe times of the clip loaded in the front camera's media player.
+        Returns:
+            list: The sorted keyframe times in milliseconds, empty if they couldn't be read.
+        """
+        fpath = self.main_player.source().toLocalFile()
+        if not fpath:
+            return []
+        try:
+            return read_video_track_tables(fpath).keyframe_times_ms
+        except (OSError, Mp4ParseError) as e:
+            logger.warning(f'Could not read the keyframes of {fpath}: {e}')
+            return []
+
+    def read_main_player_frame_times(self) -> list:
+        """Read the frame times of the clip loaded in the front camera's media player, cached per file.
+        Returns:
+            list: The sorted frame presentation times in milliseconds, empty if they couldn't be read.
+        """
+        fpath = self.main_player.source().toLocalFile()
+        if not fpath:
+            return []
+        try:
+            return read_video_track_tables(fpath).frame_times_ms
+        except (OSError, Mp4ParseError) as e:
+            logger.warning(f'Could not read the frame times of {fpath}: {e}')
+            return []
+
+    def step_frames(self, steps: int) -> None:
+        """Pause and show the frame a number of frames before or after the current one, within the clip.
+        Args:
+            steps (int): The number of frames to step, negative to step back.
+        """
+        frame_times_ms = self.read_main_player_frame_times()
+        if not frame_times_ms:
+            return
+        if self.session_player is not None and self.session_player.is_active:
+            self.session_player.set_playing(False)
+        for media_player in self._player_pool.media_players():
+            media_player.pause()
+        # One exact seek to the frame's presentation time, the same for all four cameras.
+        self.seek_scheduler.seek_now(step_frame_time(frame_times_ms, self.main_player.position(), steps))
+
+    def keyPressEvent(self, event: QKeyEvent) -> None:
+        """Step a frame back or forward with the left and right arrow keys, shift steps 10 frames.
+        Args:
+            event (QKeyEvent): The key event.
+        """
+        key = event.key()
+        if key not in (Qt.Key.Key_Left, Qt.Key.Key_Right) or not self.main_player.duration():
+            super().keyPressEvent(event)
+            return
+        self.arrow_key_pressed = True
+        steps = 10 if event.modifiers() & Qt.KeyboardModifier.ShiftModifier else 1
+        self.step_frames(steps if key == Qt.Key.Key_Right else -steps)
+        event.accept()
 
-    def on_slider_value_changed(self, value: int) -> None:
-        """Seek video when slider is moved.
+    def keyReleaseEvent(self, event: QKeyEvent) -> None:
+        """Track the arrow keys being released.
         Args:
-                value (int): The value of the slider.
+            event (QKeyEvent): The key event.
         """
-        if self.is_dragging:
-            pass
-        elif self.arrow_key_pressed:
-            pass
+        if event.key() in (Qt.Key.Key_Left, Qt.Key.Key_Right):
+            self.arrow_key_pressed = False
+        super().keyReleaseEvent(event)
 
     def paintEvent(self, event: QPaintEvent) -> None:
         """Override paintEvent to draw the slider with a custom look.
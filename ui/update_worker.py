@@ -0,0 +1,65 @@
+"""A background thread which checks for a newer version without blocking the UI."""
+import threading
+
+from PySide6.QtCore import Qt, Signal, QObject
+
+from constants import API_URL, REQUESTS_TIMEOUT_LIMIT
+from file_utils.updates import check_for_new_version
+
+
+class UpdateCheckThread(QObject):
+    """Query the update server on a worker thread, update_available is only emitted if there is a newer version.
+
+    The request can't be interrupted, so closing the window doesn't wait for it: discard drops the result, and
+    the thread is a daemon thread which doesn't keep the app running. The object has no parent, the thread
+    keeps it alive until the check ends. The result is queued to this object, which lives in the GUI thread,
+    and only passed on if it wasn't discarded by then, so a discard racing the end of the check still drops it.
+    """
+    update_available = Signal(str)
+    finished = Signal()
+    # The check's result from the worker thread, the newer version or '' if there is none.
+    _checked = Signal(str)
+
+    def __init__(self, api_url: str=API_URL, timeout: float=REQUESTS_TIMEOUT_LIMIT) -> None:
+        """
+        Args:
+            api_url (str, optional): The update server's API. Defaults to API_URL.
+            timeout (float, optional): Seconds to wait for the server. Defaults to REQUESTS_TIMEOUT_LIMIT.
+        """
+        super().__init__()
+        self._api_url = api_url
+        self._timeout = timeout
+        self._is_discarded = False
+        self._thread = threading.Thread(target=self.run, name='update-check', daemon=True)
+        self._checked.connect(self._on_checked, Qt.QueuedConnection)
+
+    def start(self) -> None:
+        """Start the check."""
+        self._thread.start()
+
+    def wait(self, timeout: float=None) -> bool:
+        """Wait for the check to end.
+        Args:
+            timeout (float, optional): Seconds to wait at most. Defaults to waiting until it ends.
+        Returns:
+            bool: True if the check ended.
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def discard(self) -> None:
+        """Drop the result, neither update_available nor finished is emitted after this."""
+        self._is_discarded = True
+
+    def run(self) -> None:
+        """Check for a newer version, emitting update_available with it if there is one."""
+        latest_version = check_for_new_version(api_url=self._api_url, timeout=self._timeout)
+        self._checked.emit(latest_version or '')
+
+    def _on_checked(self, latest_version: str) -> None:
+        # In the GUI thread, where discard is called, so it can't be discarded between this check and the emits.
+        if self._is_discarded:
+            return
+        if latest_version:
+            self.update_available.emit(latest_version)
+        self.finished.emit()
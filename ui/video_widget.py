@@ -1,34 +1,88 @@
-from typing import List
+import os
+from typing import Dict, List
 from PySide6.QtMultimedia import QMediaPlayer
 from PySide6.QtWidgets import (
     QWidget, QHBoxLayout, QLabel, QPushButton, QSizePolicy, QLineEdit)
-from PySide6.QtCore import QUrl, Signal
+from PySide6.QtCore import Signal
+
+from ui.event_list_view import CORRUPT_EVENT_COLOR, PARTIAL_EVENT_COLOR
+from ui.player_pool import MediaPlayerPool
+
+# Set once on the event list rather than on every VideoEventWidget, so Qt parses it once for all the events.
+EVENT_WIDGET_STYLE_SHEET = """
+    VideoEventWidget, VideoEventWidget QWidget {
+        font-size: 14px;
+        font-weight: normal;
+        background-color: #f0f0f0;
+        border-radius: 4px;
+        border: 0px solid #d0d0d0;
+        padding: 4px 0px;
+    }
+    VideoEventWidget QLabel {
+        background-color: #0078d7;
+        color: white;
+    }
+    VideoEventWidget QPushButton {
+        background-color: #0078d7;
+        color: white;
+    }
+    VideoEventWidget QPushButton:hover {
+        background-color: #005bb5;
+    }
+    VideoEventWidget QLineEdit {
+        color: black;
+    }
+    """
 
 
 class VideoEventWidget(QWidget):
     play_pressed = Signal()
-    def __init__(self, event_name: str, media_video_players: dict, video_files: List[str], parent: QWidget=None):
+    playback_started = Signal()
+    playback_paused = Signal()
+    liked_changed = Signal(bool)
+    folder_tag_changed = Signal(str)
+    def __init__(self, event_name: str, media_video_players: dict, video_files: List[str],
+                 player_pool: MediaPlayerPool, parent: QWidget=None):
         """A single multi view video event to represent a specific time.
         Args:
             event_name (str): The name of the event.
             media_video_players (dict): A dictionary containing the media players for the event.
             video_files (List[str]): A list of video files to play.
+            player_pool (MediaPlayerPool): The pool which loads video files into the media players.
             parent (QWidget, optional): The parent widget. Defaults to None.
         """
         super().__init__(parent=parent)
         self._is_playing = False
         self._event_name = event_name
         self._liked_folder_name = None
-        self._backup_player = media_video_players['back']['media_player']
-        self._front_upper_player = media_video_players['front']['media_player']
-        self._left_repeater_player = media_video_players['left_repeater']['media_player']
-        self._right_repeater_player = media_video_players['right_repeater']['media_player']
+        # The pool swaps the players in this dict, so they are looked up when needed rather than kept.
+        self._media_video_players = media_video_players
+        self._player_pool = player_pool
         self._video_files = video_files
+        # What is wrong with each broken clip keyed by video file.
+        self._clip_problems = {}
         self._is_liked = False
         self._current_playback_position = 0
+        self._resumes_drive_session = False
         self.setup_ui()
         self.setup_connections()
 
+    @property
+    def _backup_player(self) -> QMediaPlayer:
+        return self._media_video_players['back']['media_player']
+
+    @property
+    def _front_upper_player(self) -> QMediaPlayer:
+        return self._media_video_players['front']['media_player']
+
+    @property
+    def _left_repeater_player(self) -> QMediaPlayer:
+        return self._media_video_players['left_repeater']['media_player']
+
+    @property
+    def _right_repeater_player(self) -> QMediaPlayer:
+        return self._media_video_players['right_repeater']['media_player']
+
     @property
     def liked_folder_name(self) -> str:
         """An optional name to use as the events parent folder when copying liked events.
@@ -46,6 +100,14 @@ class VideoEventWidget(QWidget):
         """
         return self._is_liked
 
+    @property
+    def is_playing(self) -> bool:
+        """Whether the event is playing.
+        Returns:
+            bool: True if the event is playing, False if it is paused or wasn't started.
+        """
+        return self._is_playing
+
     @property
     def video_files(self) -> List[str]:
         """The video files associated with the event.
@@ -62,6 +124,40 @@ class VideoEventWidget(QWidget):
         """
         self._video_files = list(value)
 
+    @property
+    def playable_video_files(self) -> List[str]:
+        """The video files to load, with empty paths in place of broken clips so the other cameras keep their
+        players.
+        Returns:
+            List[str]: The video files.
+        """
+        return [video_fpath if video_fpath not in self._clip_problems else '' for video_fpath in self._video_files]
+
+    @property
+    def resumes_drive_session(self) -> bool:
+        """Whether Play resumes the players as they were paused instead of loading the event's clips, because
+        the event's drive session is loaded and may have moved on to a later clip.
+        Returns:
+            bool: True while the event's drive session is loaded.
+        """
+        return self._resumes_drive_session
+
+    @resumes_drive_session.setter
+    def resumes_drive_session(self, value: bool):
+        """Set whether Play resumes the event's drive session.
+        Args:
+            value (bool): True while the event's drive session is loaded.
+        """
+        self._resumes_drive_session = value
+
+    @property
+    def is_corrupt(self) -> bool:
+        """Whether none of the event's clips can be played.
+        Returns:
+            bool: True if every clip is broken.
+        """
+        return bool(self._clip_problems) and len(self._clip_problems) >= len(self._video_files)
+
     @property
     def event_name(self) -> str:
         """The name of the event.
@@ -79,9 +175,7 @@ class VideoEventWidget(QWidget):
         self._event_name = value
 
     def setup_ui(self):
-        """Setup the widget's UI."""
-        # Set up style
-        self.set_style()
+        """Setup the widget's UI. The event list styles it with EVENT_WIDGET_STYLE_SHEET."""
         # Set up layout
         layout = QHBoxLayout()
         layout.setContentsMargins(1, 2, 1, 2)
@@ -113,25 +207,44 @@ class VideoEventWidget(QWidget):
         """Setup the widget's connections."""
         self.play_pause_button.clicked.connect(self.toggle_play_pause)
         self.like_clip_button.clicked.connect(self.toggle_is_liked)
-        self._front_upper_player.mediaStatusChanged.connect(self.handle_media_status_change)
-
-    def handle_media_status_change(self, status: QMediaPlayer.MediaStatus) -> None:
-        """Handle the media status changing.
-        Args:
-            status (QMediaPlayer.MediaStatus): The new media status.
-        """
-        if status == QMediaPlayer.MediaStatus.EndOfMedia:
-            if self._is_playing:
-                self.toggle_play_pause()
+        self.liked_folder_name_widget.editingFinished.connect(
+            lambda: self.folder_tag_changed.emit(self.liked_folder_name_widget.text()))
 
     def toggle_is_liked(self) -> None:
         """Handle the heart button being pressed."""
-        self._is_liked = not self._is_liked
+        self.set_liked(not self._is_liked)
+        self.liked_changed.emit(self._is_liked)
+
+    def set_liked(self, is_liked: bool) -> None:
+        """Show the event as liked or not, e.g. when restoring a session.
+        Args:
+            is_liked (bool): Whether the event is liked.
+        """
+        self._is_liked = is_liked
         if self._is_liked:
             self.like_clip_button.setStyleSheet("color: red;")
         else:
             self.like_clip_button.setStyleSheet("color: white;")
 
+    def set_clip_problems(self, clip_problems: Dict[str, str]) -> None:
+        """Badge the event if some of its clips are broken, and don't let it be played if all of them are.
+        Args:
+            clip_problems (Dict[str, str]): What is wrong keyed by video file, empty if no clip is broken.
+        """
+        if dict(clip_problems) == self._clip_problems:
+            return
+        self._clip_problems = dict(clip_problems)
+        if not clip_problems:
+            self.label.setStyleSheet("")
+            self.label.setToolTip("")
+            self.play_pause_button.setEnabled(True)
+            return
+        color = CORRUPT_EVENT_COLOR if self.is_corrupt else PARTIAL_EVENT_COLOR
+        self.label.setStyleSheet(f"background-color: {color};")
+        self.label.setToolTip('\n'.join(f'{os.path.basename(video_fpath)}: {problem}'
+                                        for video_fpath, problem in clip_problems.items()))
+        self.play_pause_button.setEnabled(not self.is_corrupt)
+
     def toggle_play_pause(self) -> None:
         """Handle the play/pause button being pressed."""
         if self._is_playing:
@@ -144,45 +257,24 @@ class VideoEventWidget(QWidget):
         else:
             self.play_pressed.emit()
             self.play_pause_button.setText("Pause")
-            self._backup_player.setSource(QUrl.fromLocalFile(self._video_files[0]))
-            self._front_upper_player.setSource(QUrl.fromLocalFile(self._video_files[1]))
-            self._left_repeater_player.setSource(QUrl.fromLocalFile(self._video_files[2]))
-            self._right_repeater_player.setSource(QUrl.fromLocalFile(self._video_files[3]))
-            self._backup_player.setPosition(self._current_playback_position)
-            self._front_upper_player.setPosition(self._current_playback_position)
-            self._left_repeater_player.setPosition(self._current_playback_position)
-            self._right_repeater_player.setPosition(self._current_playback_position)
+            # Resuming the same event keeps the already open sources, which are paused where they were left. A
+            # drive session is resumed in the clip it was paused in, which isn't necessarily the event's.
+            if not self._resumes_drive_session and self._player_pool.load(self.playable_video_files):
+                self._backup_player.setPosition(self._current_playback_position)
+                self._front_upper_player.setPosition(self._current_playback_position)
+                self._left_repeater_player.setPosition(self._current_playback_position)
+                self._right_repeater_player.setPosition(self._current_playback_position)
             self._backup_player.play()
             self._front_upper_player.play()
             self._left_repeater_player.play()
             self._right_repeater_player.play()
         self._is_playing = not self._is_playing
+        if self._is_playing:
+            self.playback_started.emit()
+        else:
+            self.playback_paused.emit()
 
     def set_style(self) -> None:
-        """Apply a stylesheet."""
-        qml = """
-        QWidget {
-                font-size: 14px;
-                font-weight: normal;
-                background-color: #f0f0f0;
-                border-radius: 4px;
-                border: 0px solid #d0d0d0;
-                padding: 4px 0px;
-            }
-        QLabel {
-            background-color: #0078d7;
-            color: white;
-        }
-        QPushButton {
-            background-color: #0078d7;
-            color: white;
-        }
-        QPushButton:hover {
-            background-color: #005bb5;
-        }
-        QLineEdit { 
-            color: black;
-        }
-        """
-        self.setStyleSheet(qml)
+        """Apply the event stylesheet to this widget alone, for a widget which isn't in the event list."""
+        self.setStyleSheet(EVENT_WIDGET_STYLE_SHEET)
 